@@ -4,7 +4,7 @@ Manages environment variables and application settings
 """
 
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Any, Dict, Optional
 import os
 
 
@@ -39,7 +39,59 @@ class Settings(BaseSettings):
     langsmith_project: str = "safarbot"
     langsmith_endpoint: str = "https://api.smith.langchain.com"
     
-    # ChromaDB Configuration
+    # Cache Configuration
+    # Backend: "memory" (per process), "sqlite" (shared by workers on one host) or "redis" (uses redis_url)
+    cache_backend: str = os.getenv("CACHE_BACKEND", "memory")
+    cache_sqlite_path: str = os.getenv("CACHE_SQLITE_PATH", "./cache_db/safarbot_cache.sqlite3")
+    # JSON overrides per namespace, e.g. {"image_cache": {"max_entries": 200, "max_bytes": 33554432}}
+    cache_namespace_limits: Dict[str, Dict[str, int]] = {}
+    # JSON overrides of the L1/L2 tier policies, e.g. {"sessions": {"l1_size": 500, "l1_ttl": 15}}
+    cache_tier_policies: Dict[str, Dict[str, Any]] = {}
+
+    # SERP response store (MongoDB) and how many of its most-hit entries to preload on startup
+    serp_store_enabled: bool = os.getenv("SERP_STORE_ENABLED", "true").lower() in ("true", "1", "yes")
+    serp_warm_start_keys: int = int(os.getenv("SERP_WARM_START_KEYS", "200"))
+
+    # SerpApi quota governor: token bucket per process, budgets shared through the cache (0 = unlimited)
+    serp_rate_per_minute: float = float(os.getenv("SERP_RATE_PER_MINUTE", "60"))
+    serp_burst: int = int(os.getenv("SERP_BURST", "10"))
+    serp_daily_budget: int = int(os.getenv("SERP_DAILY_BUDGET", "0"))
+    serp_monthly_budget: int = int(os.getenv("SERP_MONTHLY_BUDGET", "0"))
+
+    # Off-peak SERP cache prewarming for the most requested destinations
+    prewarm_enabled: bool = os.getenv("PREWARM_ENABLED", "true").lower() in ("true", "1", "yes")
+    prewarm_top_k: int = int(os.getenv("PREWARM_TOP_K", "20"))
+    # SerpApi searches one prewarm run may spend (it also stays within the prefetch budget share)
+    prewarm_serp_budget: int = int(os.getenv("PREWARM_SERP_BUDGET", "150"))
+    prewarm_window_days: int = int(os.getenv("PREWARM_WINDOW_DAYS", "7"))
+    # UTC hour range "start-end" (inclusive, may wrap midnight); default is ~01:30-05:30 IST
+    prewarm_hours_utc: str = os.getenv("PREWARM_HOURS_UTC", "20-23")
+
+    # Concurrent Gemini itinerary generations per process; extra requests queue (0 = unbounded queue/wait)
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    llm_max_queue: int = int(os.getenv("LLM_MAX_QUEUE", "20"))
+    llm_queue_timeout_seconds: float = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "60"))
+    # Reuse of generated itineraries for identical normalized inputs (0 = disabled)
+    llm_cache_ttl_seconds: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    # Adapt a cached itinerary for a near-identical request (same destination, similar preferences)
+    llm_similar_reuse_enabled: bool = os.getenv("LLM_SIMILAR_REUSE_ENABLED", "true").lower() in ("true", "1", "yes")
+    llm_similarity_threshold: float = float(os.getenv("LLM_SIMILARITY_THRESHOLD", "0.85"))
+    llm_index_max_entries: int = int(os.getenv("LLM_INDEX_MAX_ENTRIES", "5000"))
+    # Trips this long or longer are generated as a skeleton plus concurrent per-day calls (0 = never)
+    itinerary_map_reduce_min_days: int = int(os.getenv("ITINERARY_MAP_REDUCE_MIN_DAYS", "5"))
+    itinerary_day_retries: int = int(os.getenv("ITINERARY_DAY_RETRIES", "2"))
+    # Estimated tokens the prompt's place list may use; best-ranked places are kept (0 = no limit)
+    prompt_places_token_budget: int = int(os.getenv("PROMPT_PLACES_TOKEN_BUDGET", "800"))
+    # Background itinerary jobs: workers per process, waiting jobs allowed (0 = unbounded) and
+    # how long job status and results are kept for polling
+    itinerary_job_workers: int = int(os.getenv("ITINERARY_JOB_WORKERS", "2"))
+    itinerary_job_max_queue: int = int(os.getenv("ITINERARY_JOB_MAX_QUEUE", "50"))
+    itinerary_job_ttl_seconds: int = int(os.getenv("ITINERARY_JOB_TTL_SECONDS", "3600"))
+    # Duplicate /generate-itinerary-complete requests share one generation and get its result
+    # for this long afterwards (0 = disabled)
+    idempotency_grace_seconds: int = int(os.getenv("IDEMPOTENCY_GRACE_SECONDS", "300"))
+
+    # ChromaDB Configuration (the itinerary similarity index is stored here too)
     chroma_persist_directory: str = "./chroma_db"
     
     # CORS Origins
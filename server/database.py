@@ -176,4 +176,7 @@ ITINERARY_INVITATIONS_COLLECTION = "itinerary_invitations"
 ITINERARY_COLLABORATORS_COLLECTION = "itinerary_collaborators"
 
 # AI Tracking collection
-AI_USAGE_COLLECTION = "ai_usage"   
\ No newline at end of file
+AI_USAGE_COLLECTION = "ai_usage"
+
+# SERP response store (survives restarts, see services/serp_response_store.py)
+SERP_RESPONSES_COLLECTION = "serp_responses"
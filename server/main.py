@@ -43,6 +43,17 @@ from routers.google_auth import router as google_auth_router
 from routers.image_proxy import router as image_proxy_router
 from config import settings
 from database import Database
+from services.cache_service import cache_service
+from services.serp_cache_service import serp_cache
+from services.cache_prewarmer import cache_prewarmer
+from services.serp_client import serp_client
+from services.weather_service import weather_service
+from services.circuit_breaker import breaker_states
+from services.llm_limiter import llm_limiter
+from services.ai_tracking_service import ai_tracking_service
+from services.itinerary_index import itinerary_index
+from services.itinerary_jobs import itinerary_jobs
+from services.tracing import stage_histograms
 
 
 @asynccontextmanager
@@ -57,8 +68,19 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logging.error(f"Database connection failed: {e}")
         logging.warning("Application will start without database connection")
+    cache_service.start_sweeper()
+    cache_service.start_invalidation_listener()
+    serp_cache.start()
+    cache_prewarmer.start()
+    itinerary_jobs.start()
     yield
     # Shutdown
+    await itinerary_jobs.stop()
+    await cache_prewarmer.stop()
+    await serp_cache.stop()
+    await serp_client.close()
+    await weather_service.close()
+    await cache_service.close()
     await Database.close_db()
     logging.info("Database connection closed")
 
@@ -156,7 +178,7 @@ app.add_middleware(
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type", "X-Requested-With", "Accept", "Origin"],
+    allow_headers=["Authorization", "Content-Type", "X-Requested-With", "Accept", "Origin", "Idempotency-Key"],
     expose_headers=["X-RateLimit-Limit", "X-RateLimit-Remaining", "X-RateLimit-Reset"],
 )
 
@@ -263,9 +285,22 @@ async def health_check():
         "status": "healthy",
         "message": "SafarBot API is running",
         "database": db_status,
+        "providers": breaker_states(),
+        "llm": {
+            **llm_limiter.stats(),
+            "response_cache": ai_tracking_service.get_cache_stats(),
+            "similar_reuse": itinerary_index.stats(),
+        },
+        "itinerary_jobs": itinerary_jobs.stats(),
+        "prewarm": cache_prewarmer.stats(),
         "version": "1.0.0"
     }
 
+@app.get("/health/stages")
+async def stage_timings():
+    """Itinerary pipeline latency histograms (p50/p95) per stage, since startup."""
+    return {"stages": stage_histograms.stats()}
+
 @app.get("/socket.io/")
 async def socket_io_blocked():
     """Block Socket.IO requests - service discontinued"""
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from models import (
     ItineraryRequest,
     ItineraryResponse,
@@ -7,8 +7,15 @@ from models import (
     AdditionalPlacesResponse,
     ItineraryDetailsRequest,
 )
+from config import settings
+from services.cache_service import cache_service
 from services.itinerary_service import ItineraryService
 from services.additional_places_service import AdditionalPlacesService
+from services.cache_prewarmer import cache_prewarmer
+from services.itinerary_jobs import JobQueueFullError, itinerary_jobs
+from typing import Any, Dict
+import hashlib
+import json
 import logging
 
 router = APIRouter()
@@ -121,6 +128,45 @@ async def generate_itinerary_details(request_body: ItineraryDetailsRequest):
         raise HTTPException(status_code=500, detail=f"Failed to fetch itinerary details: {str(e)}")
 
 
+@router.options("/generate-itinerary-details-stream")
+async def generate_itinerary_details_stream_options():
+    return Response(
+        status_code=200,
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "POST, OPTIONS",
+            "Access-Control-Allow-Headers": "*",
+            "Access-Control-Max-Age": "86400",
+        },
+    )
+
+
+@router.post("/generate-itinerary-details-stream")
+async def generate_itinerary_details_stream(request_body: ItineraryDetailsRequest, http_request: Request):
+    """
+    🌊 STREAMING ENDPOINT - Place details as Server-Sent Events, for when no
+    details token is available (place_ids only)
+    
+    ✅ place_detail - {place_id, details}, as soon as that place is fetched
+    ✅ complete     - {requested, fetched}
+    """
+    if not request_body.place_ids:
+        raise HTTPException(status_code=400, detail="No place_ids provided")
+    
+    async def event_stream():
+        async for event in itinerary_service.stream_itinerary_details(
+            place_ids=request_body.place_ids,
+            request=http_request
+        ):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # 2. ADDITIONAL PLACES ONLY - Get all additional places for a destination
 #    Returns comprehensive place suggestions beyond the itinerary
 
@@ -185,6 +231,64 @@ async def get_additional_places(request: AdditionalPlacesRequest):
         )
 
 
+IDEMPOTENCY_NAMESPACE = "itinerary_idempotency"
+
+
+class _SharedRequest:
+    """The first caller's request without disconnect checks: the generation is
+    shared by its duplicates, so one client going away must not abort it.
+
+    It never reports a disconnect, so once started the generation runs to
+    completion (and its result is cached for the grace period) even if every
+    client waiting on it has gone away."""
+
+    def __init__(self, request: Request):
+        self._request = request
+
+    def __getattr__(self, name):
+        return getattr(self._request, name)
+
+    async def is_disconnected(self) -> bool:
+        return False
+
+
+class _UncachedResponse(Exception):
+    """A fallback or incomplete itinerary; carries the response so it is served
+    to the callers waiting on it but not cached for the grace period."""
+
+    def __init__(self, response: Dict[str, Any]):
+        super().__init__("itinerary response is incomplete")
+        self.response = response
+
+
+def _caller(http_request: Request) -> str:
+    return getattr(http_request.state, 'user_id', None) or (http_request.client.host if http_request.client else "anonymous")
+
+
+def _body_hash(request_body: ItineraryRequest) -> str:
+    return hashlib.sha256(json.dumps(request_body.model_dump(), sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _idempotency_key(request_body: ItineraryRequest, http_request: Request) -> str:
+    """Idempotency-Key header (if sent) plus the request body, scoped to the user (or client IP)"""
+    header = http_request.headers.get("Idempotency-Key") or ""
+    return hashlib.sha256(f"{_caller(http_request)}|{header}|{_body_hash(request_body)}".encode()).hexdigest()
+
+
+async def _check_idempotency_body(request_body: ItineraryRequest, http_request: Request) -> None:
+    """Refuse (422) an Idempotency-Key reused with a different body within the grace period"""
+    header = http_request.headers.get("Idempotency-Key")
+    if not header:
+        return
+    key = "body:" + hashlib.sha256(f"{_caller(http_request)}|{header}".encode()).hexdigest()
+    body_hash = _body_hash(request_body)
+    seen = await cache_service.get(IDEMPOTENCY_NAMESPACE, key)
+    if seen is None:
+        await cache_service.set(IDEMPOTENCY_NAMESPACE, key, body_hash, ttl=settings.idempotency_grace_seconds)
+    elif seen != body_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+
+
 # 3. COMPLETE ITINERARY - AI + Additional Places + Place Details (2-3 minutes)
 #    Returns everything: AI itinerary + place details + additional places
 
@@ -214,6 +318,12 @@ async def generate_itinerary_complete(request_body: ItineraryRequest, http_reque
     
     Use this when you need complete data in one API call.
     For faster response, use /generate-itinerary-ai + /places/additional separately.
+    
+    Idempotent: a repeat of an in-flight request (same body from the same user,
+    and the same Idempotency-Key header if one is sent) waits for the first one's
+    result, and gets it from the cache for IDEMPOTENCY_GRACE_SECONDS afterwards
+    (fallback or incomplete itineraries are not cached). Reusing an
+    Idempotency-Key with a different body in that time is a 422.
     """
     try:
         user_id = getattr(http_request.state, 'user_id', None)
@@ -235,26 +345,54 @@ async def generate_itinerary_complete(request_body: ItineraryRequest, http_reque
         logger.info(f"   📧 Email: {request_body.email or 'Not provided'}")
         logger.info("="*80)
         
-        complete_response = await itinerary_service.generate_itinerary(
-            destination=request_body.destination,
-            start_date=request_body.start_date,
-            end_date=request_body.end_date,
-            budget=request_body.budget,
-            budget_range=request_body.budget_range,
-            interests=request_body.interests,
-            travelers=request_body.travelers,
-            travel_companion=request_body.travel_companion,
-            trip_pace=request_body.trip_pace,
-            departure_city=request_body.departure_city,
-            flight_class_preference=request_body.flight_class_preference,
-            hotel_rating_preference=request_body.hotel_rating_preference,
-            accommodation_type=request_body.accommodation_type,
-            email=request_body.email,
-            dietary_preferences=request_body.dietary_preferences,
-            halal_preferences=request_body.halal_preferences,
-            vegetarian_preferences=request_body.vegetarian_preferences,
-            request=http_request
-        )
+        generated = False
+        
+        async def generate():
+            nonlocal generated
+            generated = True
+            # Demand signal for off-peak cache prewarming
+            await cache_prewarmer.record_destination(request_body.destination, request_body.interests)
+            return await itinerary_service.generate_itinerary(
+                destination=request_body.destination,
+                start_date=request_body.start_date,
+                end_date=request_body.end_date,
+                budget=request_body.budget,
+                budget_range=request_body.budget_range,
+                interests=request_body.interests,
+                travelers=request_body.travelers,
+                travel_companion=request_body.travel_companion,
+                trip_pace=request_body.trip_pace,
+                departure_city=request_body.departure_city,
+                flight_class_preference=request_body.flight_class_preference,
+                hotel_rating_preference=request_body.hotel_rating_preference,
+                accommodation_type=request_body.accommodation_type,
+                email=request_body.email,
+                dietary_preferences=request_body.dietary_preferences,
+                halal_preferences=request_body.halal_preferences,
+                vegetarian_preferences=request_body.vegetarian_preferences,
+                request=_SharedRequest(http_request)
+            )
+        
+        async def generate_cacheable():
+            response = await generate()
+            if not response.get("metadata", {}).get("complete"):
+                raise _UncachedResponse(response)
+            return response
+        
+        if settings.idempotency_grace_seconds > 0:
+            await _check_idempotency_body(request_body, http_request)
+            try:
+                complete_response = await cache_service.get_or_load(
+                    IDEMPOTENCY_NAMESPACE, _idempotency_key(request_body, http_request), generate_cacheable,
+                    ttl=settings.idempotency_grace_seconds
+                )
+            except _UncachedResponse as e:
+                # Shared with the duplicates already waiting, but the next request generates again
+                complete_response = e.response
+            if not generated:
+                logger.info("🔁 ITINERARY API - Duplicate request answered with the original generation's result")
+        else:
+            complete_response = await generate()
         
         # Log the response structure for debugging
         itinerary = complete_response.get('itinerary', {})
@@ -274,11 +412,166 @@ async def generate_itinerary_complete(request_body: ItineraryRequest, http_reque
         
         return complete_response
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ ITINERARY API - Error generating complete itinerary: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate complete itinerary: {str(e)}")
 
 
+# 4. STREAMING ITINERARY - Server-Sent Events
+#    Same payload as /generate-itinerary-complete, delivered progressively:
+#    started -> places -> weather -> day (one per daily plan) -> complete | error
+
+@router.options("/generate-itinerary-stream")
+async def generate_itinerary_stream_options():
+    """Handle OPTIONS requests for CORS preflight"""
+    return Response(
+        status_code=200,
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "POST, OPTIONS",
+            "Access-Control-Allow-Headers": "*",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@router.post("/generate-itinerary-stream")
+async def generate_itinerary_stream(request_body: ItineraryRequest, http_request: Request):
+    """
+    🌊 STREAMING ENDPOINT - Complete itinerary as Server-Sent Events
+    
+    Each event is `event: <name>` plus a JSON `data:` line:
+    ✅ places   - prefetch finished (counts per category)
+    ✅ weather  - weather ready
+    ✅ day      - one daily plan, as soon as the model has written it
+    ✅ complete - the full /generate-itinerary-complete response
+    ❌ error    - generation failed
+    """
+    logger.info(f"🌊 ITINERARY API - Streaming generation request for {request_body.destination} "
+                f"({request_body.start_date} to {request_body.end_date})")
+    
+    # Demand signal for off-peak cache prewarming
+    await cache_prewarmer.record_destination(request_body.destination, request_body.interests)
+    
+    async def event_stream():
+        async for event in itinerary_service.stream_itinerary(
+            destination=request_body.destination,
+            start_date=request_body.start_date,
+            end_date=request_body.end_date,
+            budget=request_body.budget,
+            budget_range=request_body.budget_range,
+            interests=request_body.interests,
+            travelers=request_body.travelers,
+            travel_companion=request_body.travel_companion,
+            trip_pace=request_body.trip_pace,
+            departure_city=request_body.departure_city,
+            flight_class_preference=request_body.flight_class_preference,
+            hotel_rating_preference=request_body.hotel_rating_preference,
+            accommodation_type=request_body.accommodation_type,
+            email=request_body.email,
+            dietary_preferences=request_body.dietary_preferences,
+            halal_preferences=request_body.halal_preferences,
+            vegetarian_preferences=request_body.vegetarian_preferences,
+            request=http_request
+        ):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'], default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# 5. BACKGROUND JOBS - Same payload as /generate-itinerary-complete without holding the request open
+#    POST /jobs -> job_id; poll GET /jobs/{job_id} (or wait for an "itinerary_job"
+#    message on the chat WebSocket), then GET /jobs/{job_id}/result
+
+@router.options("/jobs")
+async def itinerary_jobs_options():
+    """Handle OPTIONS requests for CORS preflight"""
+    return Response(
+        status_code=200,
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "POST, OPTIONS",
+            "Access-Control-Allow-Headers": "*",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@router.post("/jobs", status_code=202)
+async def create_itinerary_job(request_body: ItineraryRequest, http_request: Request):
+    """
+    📥 JOB ENDPOINT - Queue a complete itinerary generation and return its job id at once
+    """
+    user_id = getattr(http_request.state, 'user_id', None)
+    logger.info(f"📥 ITINERARY API - Job request for {request_body.destination} "
+                f"({request_body.start_date} to {request_body.end_date}) by {user_id or 'Anonymous'}")
+    
+    # Demand signal for off-peak cache prewarming
+    await cache_prewarmer.record_destination(request_body.destination, request_body.interests)
+    
+    try:
+        job = await itinerary_service.submit_itinerary_job(
+            destination=request_body.destination,
+            start_date=request_body.start_date,
+            end_date=request_body.end_date,
+            budget=request_body.budget,
+            budget_range=request_body.budget_range,
+            interests=request_body.interests,
+            travelers=request_body.travelers,
+            travel_companion=request_body.travel_companion,
+            trip_pace=request_body.trip_pace,
+            departure_city=request_body.departure_city,
+            flight_class_preference=request_body.flight_class_preference,
+            hotel_rating_preference=request_body.hotel_rating_preference,
+            accommodation_type=request_body.accommodation_type,
+            email=request_body.email,
+            dietary_preferences=request_body.dietary_preferences,
+            halal_preferences=request_body.halal_preferences,
+            vegetarian_preferences=request_body.vegetarian_preferences,
+            request=http_request
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return {
+        **job,
+        "status_url": f"/itinerary/jobs/{job['job_id']}",
+        "result_url": f"/itinerary/jobs/{job['job_id']}/result",
+    }
+
+
+async def _get_job(job_id: str, http_request: Request) -> dict:
+    job = await itinerary_jobs.get(job_id)
+    # Jobs of signed-in users are only visible to them
+    if not job or (job.get("user_id") and job["user_id"] != getattr(http_request.state, 'user_id', None)):
+        raise HTTPException(status_code=404, detail="Itinerary job not found or expired")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_itinerary_job(job_id: str, http_request: Request):
+    """Job status: queued, running, completed or failed"""
+    return await _get_job(job_id, http_request)
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_itinerary_job_result(job_id: str, http_request: Request):
+    """The itinerary of a completed job; 202 with the job status while it is still queued or running"""
+    job = await _get_job(job_id, http_request)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Failed to generate complete itinerary: {job['error']}")
+    if job["status"] != "completed":
+        return JSONResponse(status_code=202, content=job)
+    result = await itinerary_jobs.get_result(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Itinerary job result expired")
+    return result
+
+
 # BACKWARD COMPATIBILITY - Keep /generate-itinerary for existing frontend code
 # This redirects to /generate-itinerary-complete
 
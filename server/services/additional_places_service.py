@@ -4,13 +4,39 @@ Returns all places found during SERP searches as "You might also like" suggestio
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from tools.places_search_tool import PlacesSearchTool
 from models import SerpSearchResponse
+from services.place_store import place_store
+from services.serp_cache_service import cached_places_tool
+from services.serp_quota import SerpPriority, serp_priority_scope
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+# Search queries per user interest
+INTEREST_QUERIES = {
+    "nightlife": ["bars", "clubs", "pubs", "nightlife"],
+    "shopping": ["shopping malls", "markets", "boutiques", "shopping districts"],
+    "activities": ["activities", "entertainment", "recreation", "experiences"],
+    "beaches": ["beaches", "beach clubs", "waterfront"],
+    "hiking": ["hiking trails", "nature walks", "parks"],
+    "culture": ["museums", "galleries", "cultural centers"],
+    "history": ["historical sites", "monuments", "heritage"],
+    "art": ["art galleries", "art museums", "studios"],
+    "food": ["food markets", "street food", "local cuisine"],
+    "sports": ["sports venues", "stadiums", "sports activities"],
+    "relaxation": ["spas", "wellness centers", "peaceful places"]
+}
+QUERIES_PER_INTEREST = 2
+RESULTS_PER_QUERY = 10
+RESULTS_PER_CATEGORY = 15
+INTEREST_SEARCH_CONCURRENCY = 6
+
+# Ranking prior: a place needs reviews to pull away from an average rating
+RANK_PRIOR_RATING = 4.0
+RANK_PRIOR_REVIEWS = 50
+
 class AdditionalPlacesService:
     """Service to provide additional place suggestions"""
     
@@ -31,6 +57,11 @@ class AdditionalPlacesService:
         Returns:
             Dictionary with categorized place suggestions
         """
+        # Suggestions are nice-to-have: they draw on the SERP budget after itineraries
+        with serp_priority_scope(SerpPriority.ADDITIONAL):
+            return await self._get_all_place_suggestions(destination, interests)
+    
+    async def _get_all_place_suggestions(self, destination: str, interests: List[str]) -> Dict[str, Any]:
         print(f"\n🌟 ADDITIONAL PLACES SERVICE - Finding all places in {destination}")
         print("-" * 70)
         
@@ -47,6 +78,10 @@ class AdditionalPlacesService:
         }
         
         try:
+            # Interest searches fan out in the background while the main categories load
+            print(f"   🎪 Searching interest-based places")
+            interest_task = asyncio.ensure_future(self._search_interest_places(destination, interests))
+            
             # Search with higher limits to get more comprehensive results
             print(f"   🏨 Searching ALL hotels in {destination}")
             hotels = await self.places_tool.search_hotels(
@@ -81,10 +116,13 @@ class AdditionalPlacesService:
             all_suggestions["attractions"] = attractions
             print(f"      ✅ Found {len(attractions)} attractions")
             
-            # Search for interest-specific places
-            print(f"   🎪 Searching interest-based places")
-            interest_places = await self._search_interest_places(destination, interests)
-            all_suggestions.update(interest_places)
+            all_suggestions.update(await interest_task)
+            
+            # Keep one record per place so place details can reuse these results
+            await place_store.upsert_many([
+                place for category in ("hotels", "restaurants", "cafes", "attractions", "activities", "shopping", "nightlife")
+                for place in all_suggestions[category]
+            ])
             
             # Calculate totals
             total_found = sum([
@@ -115,6 +153,74 @@ class AdditionalPlacesService:
             logger.error(f"Error getting additional places for {destination}: {str(e)}")
             return all_suggestions
     
+    def _plan_interest_queries(self, destination: str, interests: List[str]) -> List[Tuple[str, str]]:
+        """(category, query) pairs for the interests, each distinct query once"""
+        plan: Dict[str, str] = {}
+        for interest in dict.fromkeys(interest.strip().lower() for interest in interests if interest):
+            for query in INTEREST_QUERIES.get(interest, [])[:QUERIES_PER_INTEREST]:
+                # Overlapping interests share queries; dedupe on normalized text
+                plan.setdefault(" ".join(f"{query} in {destination}".split()).casefold(), self._query_category(query))
+        return [(category, query) for query, category in plan.items()]
+    
+    @staticmethod
+    def _query_category(query: str) -> str:
+        if "nightlife" in query or "bar" in query or "club" in query:
+            return "nightlife"
+        if "shopping" in query or "market" in query or "mall" in query:
+            return "shopping"
+        return "activities"
+    
+    @staticmethod
+    def _rank_score(place: Dict[str, Any]) -> float:
+        """Rating shrunk towards RANK_PRIOR_RATING when there are few reviews"""
+        try:
+            rating = float(place.get("rating") or 0)
+            reviews = float(place.get("reviews") or 0)
+        except (TypeError, ValueError):
+            return 0.0
+        if not rating:
+            return 0.0
+        return (rating * reviews + RANK_PRIOR_RATING * RANK_PRIOR_REVIEWS) / (reviews + RANK_PRIOR_REVIEWS)
+    
+    def _rank_places(self, places: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Deduplicated, best-first, capped at RESULTS_PER_CATEGORY"""
+        return sorted(self._remove_duplicates(places), key=self._rank_score, reverse=True)[:RESULTS_PER_CATEGORY]
+    
+    async def iter_interest_places(
+        self,
+        destination: str,
+        interests: List[str]
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Yield (category, ranked places so far) each time an interest query completes
+        
+        All planned queries run concurrently (at most INTEREST_SEARCH_CONCURRENCY
+        in flight) through the SERP cache and quota governor; a refused or
+        failed query just contributes nothing.
+        """
+        plan = self._plan_interest_queries(destination, interests)
+        if not plan:
+            return
+        print(f"      🔍 Running {len(plan)} interest searches in parallel")
+        
+        semaphore = asyncio.Semaphore(INTEREST_SEARCH_CONCURRENCY)
+        
+        async def search(category: str, query: str) -> Tuple[str, List[Dict[str, Any]]]:
+            async with semaphore:
+                return category, await self._raw_serp_search(query)
+        
+        found: Dict[str, List[Dict[str, Any]]] = {"activities": [], "shopping": [], "nightlife": []}
+        tasks = [asyncio.ensure_future(search(category, query)) for category, query in plan]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                category, places = await next_done
+                if places:
+                    found[category].extend(places[:RESULTS_PER_QUERY])
+                    yield category, self._rank_places(found[category])
+        finally:
+            for task in tasks:
+                task.cancel()
+    
     async def _search_interest_places(self, destination: str, interests: List[str]) -> Dict[str, List[Dict[str, Any]]]:
         """Search for places based on specific user interests"""
         
@@ -125,42 +231,10 @@ class AdditionalPlacesService:
         }
         
         try:
-            # Map interests to search queries
-            interest_mapping = {
-                "nightlife": ["bars", "clubs", "pubs", "nightlife"],
-                "shopping": ["shopping malls", "markets", "boutiques", "shopping districts"],
-                "activities": ["activities", "entertainment", "recreation", "experiences"],
-                "beaches": ["beaches", "beach clubs", "waterfront"],
-                "hiking": ["hiking trails", "nature walks", "parks"],
-                "culture": ["museums", "galleries", "cultural centers"],
-                "history": ["historical sites", "monuments", "heritage"],
-                "art": ["art galleries", "art museums", "studios"],
-                "food": ["food markets", "street food", "local cuisine"],
-                "sports": ["sports venues", "stadiums", "sports activities"],
-                "relaxation": ["spas", "wellness centers", "peaceful places"]
-            }
+            async for category, places in self.iter_interest_places(destination, interests):
+                interest_places[category] = places
             
-            for interest in interests:
-                if interest.lower() in interest_mapping:
-                    queries = interest_mapping[interest.lower()]
-                    
-                    for query in queries[:2]:  # Limit to 2 queries per interest
-                        print(f"      🔍 Searching {query} in {destination}")
-                        
-                        # Use raw SERP search for more comprehensive results
-                        places = await self._raw_serp_search(f"{query} in {destination}")
-                        
-                        # Categorize results
-                        if "nightlife" in query or "bar" in query or "club" in query:
-                            interest_places["nightlife"].extend(places[:10])
-                        elif "shopping" in query or "market" in query or "mall" in query:
-                            interest_places["shopping"].extend(places[:10])
-                        else:
-                            interest_places["activities"].extend(places[:10])
-            
-            # Remove duplicates and limit results
             for category in interest_places:
-                interest_places[category] = self._remove_duplicates(interest_places[category])[:15]
                 print(f"      ✅ {category.title()}: {len(interest_places[category])} places")
                 
         except Exception as e:
@@ -176,19 +250,8 @@ class AdditionalPlacesService:
             return []
         
         try:
-            import serpapi
-            
-            search = serpapi.GoogleSearch({
-                "q": query,
-                "api_key": self.places_tool.api_key,
-                "engine": "google_maps",
-                "type": "search",
-                "num": 15,
-                "hl": "en"  # Language parameter
-            })
-            
-            results = search.get_dict()
-            local_results = results.get("local_results", [])
+            # Cached per normalized query and shared with the itinerary prefetch
+            local_results = await cached_places_tool.raw_serp_search_cached(query)
             
             # Convert to our format
             formatted_results = []
@@ -235,14 +298,14 @@ class AdditionalPlacesService:
             return []
     
     def _remove_duplicates(self, places: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate places based on name and address"""
+        """Remove duplicate places based on place_id/data_id, else name and address"""
         
         seen = set()
         unique_places = []
         
         for place in places:
-            # Create a key based on name and address
-            key = f"{place.get('name', '').lower()}_{place.get('address', '').lower()}"
+            # Same Google place from different queries shares an id even if names differ
+            key = place_store.place_key(place) or f"{place.get('name', '').lower()}_{place.get('address', '').lower()}"
             
             if key not in seen and place.get('name'):
                 seen.add(key)
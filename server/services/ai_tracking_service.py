@@ -183,6 +183,44 @@ class AITrackingService:
             print(f"❌ Error logging AI usage: {str(e)}")
             return None
     
+    # Response cache counters (per process), fed by callers that cache LLM output
+    _cache_stats: Dict[str, Any] = {
+        "hits": 0, "misses": 0, "prompt_tokens_saved": 0, "completion_tokens_saved": 0, "cost_saved_usd": 0.0,
+    }
+    
+    @staticmethod
+    def log_cache_lookup(
+        provider: AIProvider,
+        model: str,
+        task_type: AITaskType,
+        hit: bool,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0
+    ) -> None:
+        """Count a response-cache lookup; a hit saves the tokens of the original generation"""
+        stats = AITrackingService._cache_stats
+        if not hit:
+            stats["misses"] += 1
+            return
+        saved_cost = AITrackingService.calculate_cost(provider, model, prompt_tokens, completion_tokens)
+        stats["hits"] += 1
+        stats["prompt_tokens_saved"] += prompt_tokens
+        stats["completion_tokens_saved"] += completion_tokens
+        stats["cost_saved_usd"] += saved_cost
+        logger.info(
+            f"AI Cache HIT | {provider.value}/{model} | {task_type.value} | "
+            f"Tokens saved: {prompt_tokens + completion_tokens} | Cost saved: ${saved_cost:.6f}"
+        )
+    
+    @staticmethod
+    def get_cache_stats() -> Dict[str, Any]:
+        """Response cache hit rate and tokens/cost saved since startup"""
+        stats = dict(AITrackingService._cache_stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["cost_saved_usd"] = round(stats["cost_saved_usd"], 6)
+        return stats
+    
     @staticmethod
     async def get_usage_stats(
         user_id: Optional[str] = None,
@@ -200,7 +238,8 @@ class AITrackingService:
             "total_cost_usd": 0.0,
             "avg_response_time_ms": 0.0,
             "successful_requests": 0,
-            "failed_requests": 0
+            "failed_requests": 0,
+            "response_cache": AITrackingService.get_cache_stats()
         }
 
 # Global instance
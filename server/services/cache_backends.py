@@ -0,0 +1,824 @@
+"""
+Cache Backends - Storage engines behind CacheService
+Memory (per-process LRU), SQLite WAL (shared by workers on one host) and Redis
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-namespace bounds for the memory backend. Each namespace is an independent
+# LRU segment so that large image payloads cannot push session or itinerary
+# entries out.
+DEFAULT_NAMESPACE_LIMITS = {"max_entries": 5000, "max_bytes": 32 * 1024 * 1024}
+NAMESPACE_LIMITS = {
+    "serp_cache": {"max_entries": 2000, "max_bytes": 64 * 1024 * 1024},
+    # Place records behind the serp_cache lists: ~20 places per list
+    "places": {"max_entries": 40000, "max_bytes": 128 * 1024 * 1024},
+    "image_cache": {"max_entries": 1000, "max_bytes": 128 * 1024 * 1024},
+    "sessions": {"max_entries": 10000, "max_bytes": 16 * 1024 * 1024},
+    "itinerary:details": {"max_entries": 500, "max_bytes": 64 * 1024 * 1024},
+    # Job records and results must outlive their TTL, or a finished job polls as 404
+    "itinerary_jobs": {"max_entries": 5000, "max_bytes": 256 * 1024 * 1024},
+    "itinerary_idempotency": {"max_entries": 1000, "max_bytes": 128 * 1024 * 1024},
+}
+
+
+# How long SQLite keeps invalidation rows for other workers to pick up
+INVALIDATION_RETENTION_SECONDS = 60
+# Keys Redis stats() counts before reporting a capped total
+REDIS_STATS_SCAN_LIMIT = 10000
+
+
+def namespace_of(cache_key: str) -> str:
+    """Resolve the namespace for a full cache key.
+
+    ``safarbot:<namespace>:...`` keys use their namespace segment; raw keys
+    written through ``store_json`` (e.g. ``itinerary:details:<token>``) use
+    everything before the last segment.
+    """
+    if cache_key.startswith("safarbot:"):
+        return cache_key.split(":", 2)[1]
+    return cache_key.rsplit(":", 1)[0] if ":" in cache_key else cache_key
+
+
+def _sizeof(value: Any) -> int:
+    """Estimated payload size in bytes (UTF-8 for text, raw length for binary).
+
+    Container and object overhead is not counted, so byte budgets enforced
+    with it are approximate: a namespace may hold more than ``max_bytes`` of
+    Python heap, but stays proportional to what it would take serialized.
+    """
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, dict):
+        return sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sum(_sizeof(v) for v in value)
+    return len(str(value).encode("utf-8"))
+
+
+def _dumps(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _loads(raw: Optional[bytes]) -> Optional[Any]:
+    """Decode a stored value; bare integers come from INCR on Redis"""
+    if raw is None:
+        return None
+    if raw[:1] == b"\x80":
+        return pickle.loads(raw)
+    return int(raw)
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Smallest string greater than every string starting with ``prefix``"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class CacheBackend(ABC):
+    """Storage interface used by CacheService. Keys are full cache keys."""
+
+    name = "abstract"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the live value for ``key`` or None"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: int) -> bool:
+        """Store ``value`` for ``ttl`` seconds; False if it was not stored"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        """Delete ``key``; True if it existed"""
+
+    @abstractmethod
+    async def delete_pattern(self, prefix: str) -> int:
+        """Delete every key starting with ``prefix``"""
+
+    @abstractmethod
+    async def scan_prefix(self, prefix: str) -> Dict[str, Any]:
+        """Return live ``{key: value}`` for every key starting with ``prefix``"""
+
+    @abstractmethod
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Return values for ``keys`` in order (None for misses)"""
+
+    @abstractmethod
+    async def mset(self, items: Dict[str, Any], ttl: int) -> bool:
+        """Store several values with the same TTL"""
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        """Atomically add ``amount`` to an integer counter and return it"""
+
+    @abstractmethod
+    async def clear(self) -> int:
+        """Remove every entry owned by this cache"""
+
+    async def cleanup_expired(self, max_entries: Optional[int] = None) -> int:
+        """Remove expired entries (no-op for stores with native expiry)"""
+        return 0
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        """Backend statistics for get_cache_stats()"""
+
+    async def publish_invalidation(self, origin: str, items: List[Tuple[str, bool]]) -> None:
+        """Tell other processes to drop L1 copies of ``(key_or_prefix, is_prefix)`` items"""
+
+    async def poll_invalidations(self, timeout: float) -> List[Tuple[str, str, bool]]:
+        """Wait up to ``timeout`` seconds for ``(origin, key_or_prefix, is_prefix)`` invalidations"""
+        await asyncio.sleep(timeout)
+        return []
+
+    async def close(self) -> None:
+        """Release connections"""
+
+
+class _KeyIndex:
+    """
+    Trie over the ``:``-separated key hierarchy (``safarbot:<namespace>:...``)
+    so prefix lookups cost O(matching keys) instead of a scan of every key.
+    """
+
+    __slots__ = ("_root",)
+
+    # Marks a node that is itself a stored key
+    _LEAF = None
+
+    def __init__(self):
+        self._root: Dict[Optional[str], Any] = {}
+
+    def add(self, key: str) -> None:
+        node = self._root
+        for segment in key.split(":"):
+            node = node.setdefault(segment, {})
+        node[self._LEAF] = True
+
+    def discard(self, key: str) -> None:
+        path = [self._root]
+        for segment in key.split(":"):
+            node = path[-1].get(segment)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].pop(self._LEAF, None)
+        # Prune now-empty branches bottom-up
+        segments = key.split(":")
+        for depth in range(len(segments), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][segments[depth - 1]]
+
+    def clear(self) -> None:
+        self._root = {}
+
+    def keys_with_prefix(self, prefix: str) -> List[str]:
+        *segments, partial = prefix.split(":")
+        node = self._root
+        for segment in segments:
+            node = node.get(segment)
+            if node is None:
+                return []
+        keys: List[str] = []
+        # The last segment may be partial ("safarbot:serp" matches "safarbot:serp_cache:...")
+        stack = [
+            (child, segments + [segment]) for segment, child in node.items()
+            if segment is not self._LEAF and segment.startswith(partial)
+        ]
+        while stack:
+            node, path = stack.pop()
+            for segment, child in node.items():
+                if segment is self._LEAF:
+                    keys.append(":".join(path))
+                else:
+                    stack.append((child, path + [segment]))
+        return keys
+
+
+class _MemoryEntry:
+    """Represents a cache entry with a monotonic expiration deadline"""
+    __slots__ = ("value", "expires_at", "size")
+
+    def __init__(self, value: Any, ttl: float, size: int = 0):
+        self.value = value
+        self.expires_at = time.monotonic() + ttl
+        self.size = size
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """Check if entry has expired"""
+        return (now if now is not None else time.monotonic()) > self.expires_at
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    Per-process cache: one LRU segment per namespace, bounded by entry count
+    and an approximate byte budget (see _sizeof) measured on every write,
+    with a min-heap of expiry deadlines for incremental cleanup.
+    """
+
+    name = "in-memory"
+
+    def __init__(self, namespace_limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self._segments: Dict[str, "OrderedDict[str, _MemoryEntry]"] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._limits: Dict[str, Dict[str, int]] = {ns: dict(limits) for ns, limits in NAMESPACE_LIMITS.items()}
+        for ns, limits in (namespace_limits or {}).items():
+            self._limits.setdefault(ns, dict(DEFAULT_NAMESPACE_LIMITS)).update(limits)
+        # Min-heap of (deadline, key). Entries replaced or deleted before their
+        # deadline leave stale heap items that are skipped when popped.
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._entry_count = 0
+        self._raw_key_count = 0
+        self._index = _KeyIndex()
+        self._lock = threading.RLock()
+
+    def _limits_for(self, namespace: str) -> Dict[str, int]:
+        return self._limits.get(namespace, DEFAULT_NAMESPACE_LIMITS)
+
+    def _stats_for(self, namespace: str) -> Dict[str, int]:
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = self._stats[namespace] = {
+                "bytes": 0, "hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "rejected": 0,
+            }
+        return stats
+
+    def _read(self, cache_key: str, count: bool = True) -> Optional[Any]:
+        """Look up a live entry and mark it most recently used. Caller holds the lock."""
+        namespace = namespace_of(cache_key)
+        stats = self._stats_for(namespace)
+        segment = self._segments.get(namespace)
+        entry = segment.get(cache_key) if segment else None
+        if entry is None:
+            stats["misses"] += count
+            return None
+        if entry.is_expired():
+            self._remove(cache_key)
+            stats["expirations"] += 1
+            stats["misses"] += count
+            return None
+        segment.move_to_end(cache_key)
+        stats["hits"] += count
+        return entry.value
+
+    def _write(self, cache_key: str, value: Any, ttl: float) -> bool:
+        """Insert an entry, then evict LRU entries over budget. Caller holds the lock."""
+        namespace = namespace_of(cache_key)
+        limits = self._limits_for(namespace)
+        stats = self._stats_for(namespace)
+        size = _sizeof(value) + len(cache_key)
+        if size > limits["max_bytes"]:
+            stats["rejected"] += 1
+            logger.warning(f"⚠️ Cache REJECT: {cache_key} ({size} bytes exceeds {namespace} budget)")
+            self._remove(cache_key)
+            return False
+
+        self._remove(cache_key)
+        segment = self._segments.setdefault(namespace, OrderedDict())
+        entry = _MemoryEntry(value, ttl, size)
+        segment[cache_key] = entry
+        stats["bytes"] += size
+        self._count(cache_key, 1)
+        heapq.heappush(self._expiry_heap, (entry.expires_at, cache_key))
+
+        while len(segment) > limits["max_entries"] or stats["bytes"] > limits["max_bytes"]:
+            evicted_key, evicted = segment.popitem(last=False)
+            stats["bytes"] -= evicted.size
+            stats["evictions"] += 1
+            self._count(evicted_key, -1)
+            logger.debug(f"♻️ Cache EVICT: {evicted_key}")
+
+        if len(self._expiry_heap) > 2 * self._entry_count + 1024:
+            self._rebuild_expiry_heap()
+        return True
+
+    def _count(self, cache_key: str, delta: int) -> None:
+        """Track a key entering (+1) or leaving (-1) the cache. Caller holds the lock."""
+        if delta > 0:
+            self._index.add(cache_key)
+        else:
+            self._index.discard(cache_key)
+        self._entry_count += delta
+        if not cache_key.startswith("safarbot:"):
+            self._raw_key_count += delta
+
+    def _rebuild_expiry_heap(self) -> None:
+        """Drop stale heap items left behind by overwrites and evictions."""
+        self._expiry_heap = [
+            (entry.expires_at, key) for segment in self._segments.values() for key, entry in segment.items()
+        ]
+        heapq.heapify(self._expiry_heap)
+
+    def _remove(self, cache_key: str) -> bool:
+        """Drop an entry and release its bytes. Caller holds the lock."""
+        namespace = namespace_of(cache_key)
+        segment = self._segments.get(namespace)
+        entry = segment.pop(cache_key, None) if segment else None
+        if entry is None:
+            return False
+        self._stats_for(namespace)["bytes"] -= entry.size
+        self._count(cache_key, -1)
+        return True
+
+    def _matching_keys(self, prefix: str) -> List[str]:
+        return self._index.keys_with_prefix(prefix)
+
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._read(key)
+
+    async def set(self, key: str, value: Any, ttl: int) -> bool:
+        with self._lock:
+            return self._write(key, value, ttl)
+
+    async def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    async def delete_pattern(self, prefix: str) -> int:
+        with self._lock:
+            keys = self._matching_keys(prefix)
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    async def scan_prefix(self, prefix: str) -> Dict[str, Any]:
+        with self._lock:
+            found = {}
+            for key in self._matching_keys(prefix):
+                value = self._read(key, count=False)
+                if value is not None:
+                    found[key] = value
+        return found
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        with self._lock:
+            return [self._read(key) for key in keys]
+
+    async def mset(self, items: Dict[str, Any], ttl: int) -> bool:
+        with self._lock:
+            return all([self._write(key, value, ttl) for key, value in items.items()])
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        with self._lock:
+            namespace = namespace_of(key)
+            entry = (self._segments.get(namespace) or {}).get(key)
+            if entry is not None and not entry.is_expired():
+                # Rewritten like a set(): size, LRU position and stats stay right; the deadline is kept
+                value = int(entry.value) + amount
+                self._write(key, value, entry.expires_at - time.monotonic())
+                return value
+            self._write(key, amount, ttl or 24 * 60 * 60)
+            return amount
+
+    async def clear(self) -> int:
+        with self._lock:
+            count = self._entry_count
+            self._segments.clear()
+            self._expiry_heap.clear()
+            self._index.clear()
+            self._entry_count = self._raw_key_count = 0
+            for stats in self._stats.values():
+                stats["bytes"] = 0
+        return count
+
+    async def cleanup_expired(self, max_entries: Optional[int] = None) -> int:
+        """Pop due deadlines off the expiry heap, examining at most ``max_entries``"""
+        removed = 0
+        examined = 0
+        now = time.monotonic()
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                if max_entries is not None and examined >= max_entries:
+                    break
+                deadline, key = heapq.heappop(heap)
+                examined += 1
+                namespace = namespace_of(key)
+                entry = (self._segments.get(namespace) or {}).get(key)
+                if entry is None or entry.expires_at != deadline:
+                    continue  # stale: entry was replaced, deleted or evicted
+                self._remove(key)
+                self._stats_for(namespace)["expirations"] += 1
+                removed += 1
+        return removed
+
+    async def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {}
+            for namespace, stats in self._stats.items():
+                limits = self._limits_for(namespace)
+                lookups = stats["hits"] + stats["misses"]
+                namespaces[namespace] = {
+                    **stats,
+                    "entries": len(self._segments.get(namespace) or {}),
+                    "max_entries": limits["max_entries"],
+                    "max_bytes": limits["max_bytes"],
+                    "hit_ratio": round(stats["hits"] / lookups, 4) if lookups else None,
+                }
+            return {
+                "total_keys": self._entry_count,
+                "safarbot_keys": self._entry_count - self._raw_key_count,
+                "memory_used_bytes": sum(stats["bytes"] for stats in self._stats.values()),
+                "hits": sum(stats["hits"] for stats in self._stats.values()),
+                "misses": sum(stats["misses"] for stats in self._stats.values()),
+                "evictions": sum(ns["evictions"] for ns in namespaces.values()),
+                "pending_expiries": len(self._expiry_heap),
+                "namespaces": namespaces,
+            }
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cross-process cache in a single SQLite file in WAL mode, so every uvicorn
+    worker on one host reads and writes the same entries. Values are pickled;
+    expiry uses wall-clock time since deadlines are shared between processes.
+
+    Per-namespace key and byte counts are kept by triggers on every insert
+    and delete, so stats() never scans the cache table. The triggers call
+    the ``namespace_of`` SQL function this class registers, so the file is
+    only writable through this backend.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.create_function("namespace_of", 1, namespace_of, deterministic=True)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            # INSERT OR REPLACE only fires the delete trigger for the replaced row with this on
+            self._conn.execute("PRAGMA recursive_triggers=ON")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache(expires_at)")
+            self._create_counters()
+            # Append-only log that other workers tail to evict their L1 copies
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_invalidations ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL, key TEXT NOT NULL,"
+                " is_prefix INTEGER NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._last_invalidation = self._conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM cache_invalidations"
+            ).fetchone()[0]
+        self._hits = 0
+        self._misses = 0
+
+    def _create_counters(self) -> None:
+        """Create the per-namespace counter table and its triggers, seeding it from existing rows once"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cache_namespaces'"
+            ).fetchone()
+            if not exists:
+                self._conn.execute(
+                    "CREATE TABLE cache_namespaces ("
+                    " namespace TEXT NOT NULL, raw INTEGER NOT NULL, keys INTEGER NOT NULL, bytes INTEGER NOT NULL,"
+                    " PRIMARY KEY (namespace, raw))"
+                )
+                self._conn.execute(
+                    "INSERT INTO cache_namespaces (namespace, raw, keys, bytes)"
+                    " SELECT namespace_of(key), substr(key, 1, 9) != 'safarbot:', COUNT(*), SUM(LENGTH(value))"
+                    " FROM cache GROUP BY 1, 2"
+                )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_count_insert AFTER INSERT ON cache BEGIN"
+                " INSERT INTO cache_namespaces (namespace, raw, keys, bytes)"
+                " VALUES (namespace_of(NEW.key), substr(NEW.key, 1, 9) != 'safarbot:', 1, LENGTH(NEW.value))"
+                " ON CONFLICT (namespace, raw) DO UPDATE SET keys = keys + 1, bytes = bytes + excluded.bytes;"
+                " END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS cache_count_delete AFTER DELETE ON cache BEGIN"
+                " UPDATE cache_namespaces SET keys = keys - 1, bytes = bytes - LENGTH(OLD.value)"
+                " WHERE namespace = namespace_of(OLD.key) AND raw = (substr(OLD.key, 1, 9) != 'safarbot:');"
+                " END"
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    async def _run(self, fn, *args):
+        """Run a blocking SQLite call off the event loop"""
+        def locked():
+            with self._lock:
+                return fn(*args)
+        return await asyncio.to_thread(locked)
+
+    def _get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        rows = self._conn.execute(
+            f"SELECT key, value FROM cache WHERE key IN ({placeholders}) AND expires_at > ?",
+            (*keys, time.time()),
+        ).fetchall()
+        found = {key: value for key, value in rows}
+        values = [_loads(found.get(key)) for key in keys]
+        self._hits += len(found)
+        self._misses += len(keys) - len(found)
+        return values
+
+    def _set_many(self, items: Iterable[Tuple[str, Any]], ttl: int) -> bool:
+        expires_at = time.time() + ttl
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            [(key, _dumps(value), expires_at) for key, value in items],
+        )
+        return True
+
+    def _delete_prefix(self, prefix: str) -> int:
+        if not prefix:
+            return self._conn.execute("DELETE FROM cache").rowcount
+        return self._conn.execute(
+            "DELETE FROM cache WHERE key >= ? AND key < ?", (prefix, _prefix_upper_bound(prefix))
+        ).rowcount
+
+    def _scan_prefix(self, prefix: str) -> Dict[str, Any]:
+        rows = self._conn.execute(
+            "SELECT key, value FROM cache WHERE key >= ? AND key < ? AND expires_at > ?",
+            (prefix, _prefix_upper_bound(prefix), time.time()),
+        ).fetchall()
+        return {key: _loads(value) for key, value in rows}
+
+    def _incr(self, key: str, amount: int, ttl: Optional[int]) -> int:
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            value = (int(_loads(row[0])) if row else 0) + amount
+            expires_at = row[1] if row else now + (ttl or 24 * 60 * 60)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, _dumps(value), expires_at),
+            )
+            self._conn.execute("COMMIT")
+            return value
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _publish(self, origin: str, items: List[Tuple[str, bool]]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT INTO cache_invalidations (origin, key, is_prefix, created_at) VALUES (?, ?, ?, ?)",
+            [(origin, key, int(is_prefix), now) for key, is_prefix in items],
+        )
+
+    def _poll(self) -> List[Tuple[str, str, bool]]:
+        rows = self._conn.execute(
+            "SELECT id, origin, key, is_prefix FROM cache_invalidations WHERE id > ? ORDER BY id",
+            (self._last_invalidation,),
+        ).fetchall()
+        if rows:
+            self._last_invalidation = rows[-1][0]
+        return [(origin, key, bool(is_prefix)) for _, origin, key, is_prefix in rows]
+
+    def _cleanup(self, max_entries: Optional[int]) -> int:
+        now = time.time()
+        self._conn.execute(
+            "DELETE FROM cache_invalidations WHERE created_at < ?", (now - INVALIDATION_RETENTION_SECONDS,)
+        )
+        if max_entries is None:
+            return self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,)).rowcount
+        return self._conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache WHERE expires_at <= ? LIMIT ?)",
+            (now, max_entries),
+        ).rowcount
+
+    def _stats(self) -> Dict[str, Any]:
+        """Totals from the trigger-maintained counters (expired rows count until swept)"""
+        rows = self._conn.execute(
+            "SELECT namespace, raw, keys, bytes FROM cache_namespaces WHERE keys > 0"
+        ).fetchall()
+        namespaces: Dict[str, Dict[str, int]] = {}
+        for namespace, _, keys, size in rows:
+            counts = namespaces.setdefault(namespace, {"entries": 0, "bytes": 0})
+            counts["entries"] += keys
+            counts["bytes"] += size
+        return {
+            "total_keys": sum(keys for _, _, keys, _ in rows),
+            "safarbot_keys": sum(keys for _, raw, keys, _ in rows if not raw),
+            "memory_used_bytes": sum(size for _, _, _, size in rows),
+            "hits": self._hits,
+            "misses": self._misses,
+            "path": self.path,
+            "namespaces": namespaces,
+        }
+
+    async def get(self, key: str) -> Optional[Any]:
+        return (await self._run(self._get_many, [key]))[0]
+
+    async def set(self, key: str, value: Any, ttl: int) -> bool:
+        return await self._run(self._set_many, [(key, value)], ttl)
+
+    async def delete(self, key: str) -> bool:
+        return await self._run(lambda: self._conn.execute("DELETE FROM cache WHERE key = ?", (key,)).rowcount > 0)
+
+    async def delete_pattern(self, prefix: str) -> int:
+        return await self._run(self._delete_prefix, prefix)
+
+    async def scan_prefix(self, prefix: str) -> Dict[str, Any]:
+        return await self._run(self._scan_prefix, prefix)
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        return await self._run(self._get_many, list(keys))
+
+    async def mset(self, items: Dict[str, Any], ttl: int) -> bool:
+        return await self._run(self._set_many, list(items.items()), ttl)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        return await self._run(self._incr, key, amount, ttl)
+
+    async def clear(self) -> int:
+        return await self._run(self._delete_prefix, "")
+
+    async def cleanup_expired(self, max_entries: Optional[int] = None) -> int:
+        return await self._run(self._cleanup, max_entries)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await self._run(self._stats)
+
+    async def publish_invalidation(self, origin: str, items: List[Tuple[str, bool]]) -> None:
+        await self._run(self._publish, origin, items)
+
+    async def poll_invalidations(self, timeout: float) -> List[Tuple[str, str, bool]]:
+        await asyncio.sleep(timeout)
+        return await self._run(self._poll)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Shared cache on Redis via ``redis.asyncio``. Multi-key operations are
+    pipelined; expiry is native so no sweeping is needed. All keys are stored
+    under ``key_prefix`` so ``clear()`` never touches foreign keys.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, key_prefix: str = "safarbot-cache:"):
+        import redis.asyncio as redis  # optional dependency
+
+        self._redis = redis.from_url(url)
+        self._prefix = key_prefix
+        self._channel = key_prefix + "invalidate"
+        self._pubsub = None
+        self._hits = 0
+        self._misses = 0
+
+    def _k(self, key: str) -> str:
+        return self._prefix + key
+
+    async def _scan(self, prefix: str) -> List[bytes]:
+        return [key async for key in self._redis.scan_iter(match=self._k(prefix) + "*", count=500)]
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = _loads(await self._redis.get(self._k(key)))
+        if value is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int) -> bool:
+        return bool(await self._redis.set(self._k(key), _dumps(value), ex=ttl))
+
+    async def delete(self, key: str) -> bool:
+        return bool(await self._redis.delete(self._k(key)))
+
+    async def delete_pattern(self, prefix: str) -> int:
+        keys = await self._scan(prefix)
+        deleted = 0
+        for start in range(0, len(keys), 500):
+            deleted += await self._redis.unlink(*keys[start:start + 500])
+        return deleted
+
+    async def scan_prefix(self, prefix: str) -> Dict[str, Any]:
+        keys = await self._scan(prefix)
+        if not keys:
+            return {}
+        values = await self._redis.mget(keys)
+        strip = len(self._prefix)
+        return {
+            key.decode()[strip:]: _loads(value) for key, value in zip(keys, values) if value is not None
+        }
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        if not keys:
+            return []
+        values = [_loads(raw) for raw in await self._redis.mget([self._k(key) for key in keys])]
+        hits = sum(1 for value in values if value is not None)
+        self._hits += hits
+        self._misses += len(values) - hits
+        return values
+
+    async def mset(self, items: Dict[str, Any], ttl: int) -> bool:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self._k(key), _dumps(value), ex=ttl)
+            results = await pipe.execute()
+        return all(results)
+
+    async def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incrby(self._k(key), amount)
+            pipe.expire(self._k(key), ttl or 24 * 60 * 60, nx=True)
+            value, _ = await pipe.execute()
+        return int(value)
+
+    async def clear(self) -> int:
+        return await self.delete_pattern("")
+
+    async def stats(self) -> Dict[str, Any]:
+        """Key counts from one SCAN capped at REDIS_STATS_SCAN_LIMIT keys.
+
+        Redis expires keys natively, so exact running counters would drift;
+        past the cap the counts are lower bounds and ``keys_capped`` is set.
+        """
+        info = await self._redis.info("memory")
+        safarbot = self._k("safarbot:").encode()
+        total = safarbot_keys = 0
+        async for key in self._redis.scan_iter(match=self._k("") + "*", count=500):
+            total += 1
+            safarbot_keys += key.startswith(safarbot)
+            if total >= REDIS_STATS_SCAN_LIMIT:
+                break
+        return {
+            "total_keys": total,
+            "safarbot_keys": safarbot_keys,
+            "keys_capped": total >= REDIS_STATS_SCAN_LIMIT,
+            "memory_used_bytes": info.get("used_memory", 0),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+    async def publish_invalidation(self, origin: str, items: List[Tuple[str, bool]]) -> None:
+        await self._redis.publish(self._channel, json.dumps({"origin": origin, "items": items}))
+
+    async def poll_invalidations(self, timeout: float) -> List[Tuple[str, str, bool]]:
+        if self._pubsub is None:
+            self._pubsub = self._redis.pubsub()
+            await self._pubsub.subscribe(self._channel)
+        received = []
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        while message is not None:
+            payload = json.loads(message["data"])
+            received.extend((payload["origin"], key, bool(is_prefix)) for key, is_prefix in payload["items"])
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=0)
+        return received
+
+    async def close(self) -> None:
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        await self._redis.aclose()
+
+
+def create_cache_backend(settings) -> CacheBackend:
+    """Build the backend selected by ``settings.cache_backend``, falling back to memory"""
+    choice = (getattr(settings, "cache_backend", None) or "memory").lower()
+    try:
+        if choice == "redis":
+            if not settings.redis_url:
+                raise ValueError("REDIS_URL is not configured")
+            return RedisCacheBackend(settings.redis_url)
+        if choice == "sqlite":
+            return SQLiteCacheBackend(settings.cache_sqlite_path)
+    except Exception as e:
+        logger.error(f"Cache backend '{choice}' unavailable, using in-memory cache: {str(e)}")
+    return MemoryCacheBackend(getattr(settings, "cache_namespace_limits", None))
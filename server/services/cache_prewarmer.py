@@ -0,0 +1,269 @@
+"""
+Cache Prewarmer - Refresh SERP and weather caches for popular destinations
+Counts itinerary requests per destination and, once a day during off-peak
+hours, refreshes the top destinations' place lists within a SerpApi budget
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from services.cache_service import cache_service
+from services.serp_cache_service import cached_places_tool, serp_refresh_scope
+from services.serp_quota import SerpPriority, serp_priority_scope, serp_quota
+from utils.location_utils import canonicalize_location
+
+logger = logging.getLogger(__name__)
+
+DEMAND_NAMESPACE = "destination_demand"
+PREWARM_CHECK_SECONDS = 15 * 60
+# Interest combinations warmed per destination (attraction cache keys include interests)
+INTEREST_SETS_PER_DESTINATION = 2
+# Same interest searches as OptimizedPrefetchWorkflow._prefetch_places
+RAW_INTERESTS_PER_SET = 3
+SKIPPED_RAW_INTERESTS = ("city", "sightseeing")
+
+
+def _parse_hours(hours: str) -> Tuple[int, int]:
+    """'20-23' -> (20, 23); invalid values disable the window"""
+    try:
+        start, end = (int(part) % 24 for part in hours.split("-", 1))
+        return start, end
+    except (AttributeError, ValueError):
+        logger.warning(f"Invalid PREWARM_HOURS_UTC {hours!r}; prewarming disabled")
+        return -1, -1
+
+
+class CachePrewarmer:
+    """
+    Destination demand is counted per day in the cache (shared by every worker
+    on a shared backend). A background loop checks every PREWARM_CHECK_SECONDS;
+    the first worker to claim the day's run inside the off-peak window refreshes
+    the top destinations through CachedPlacesSearchTool at PREFETCH priority.
+
+    Fresh entries cost nothing; entries past their soft TTL are reloaded and
+    missing ones fetched, one awaited search at a time, until the run's
+    SerpApi budget is spent or the quota governor refuses the prefetch lane.
+    Searches are paced at half the governor's rate so the token bucket stays
+    available to interactive users.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        top_k: int = 20,
+        serp_budget: int = 150,
+        window_days: int = 7,
+        hours_utc: str = "20-23"
+    ):
+        self.enabled = enabled
+        self.top_k = top_k
+        self.serp_budget = serp_budget
+        self.window_days = window_days
+        self.start_hour, self.end_hour = _parse_hours(hours_utc)
+        self.pause_seconds = 2 * 60.0 / settings.serp_rate_per_minute if settings.serp_rate_per_minute else 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._last_run: Optional[Dict[str, Any]] = None
+
+    def _demand_ttl(self) -> int:
+        return (self.window_days + 1) * 24 * 60 * 60
+
+    def in_off_peak(self, now: Optional[datetime] = None) -> bool:
+        if self.start_hour < 0:
+            return False
+        hour = (now or datetime.utcnow()).hour
+        if self.start_hour <= self.end_hour:
+            return self.start_hour <= hour <= self.end_hour
+        return hour >= self.start_hour or hour <= self.end_hour
+
+    async def record_destination(self, destination: str, interests: Optional[List[str]] = None) -> None:
+        """Count one itinerary request for ``destination`` (never raises)"""
+        if not destination or not destination.strip():
+            return
+        try:
+            canonical = canonicalize_location(destination)
+            day = f"{datetime.utcnow():%Y-%m-%d}"
+            interest_set = sorted({i.strip() for i in interests or [] if i and i.strip()}, key=str.casefold)
+            signature = hashlib.md5(json.dumps([i.casefold() for i in interest_set]).encode()).hexdigest()[:8]
+            ttl = self._demand_ttl()
+            await cache_service.incr(DEMAND_NAMESPACE, f"day:{day}:{canonical}", 1, ttl)
+            await cache_service.incr(DEMAND_NAMESPACE, f"mix:{day}:{canonical}:{signature}", 1, ttl)
+            await cache_service.mset(DEMAND_NAMESPACE, {
+                f"name:{canonical}": destination.strip(),
+                f"interests:{signature}": interest_set,
+            }, ttl=ttl)
+        except Exception as e:
+            logger.warning(f"Could not record destination demand for {destination}: {str(e)}")
+
+    async def top_destinations(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Most requested destinations over the window, with their most common interest sets"""
+        limit = self.top_k if limit is None else limit
+        cutoff = f"{datetime.utcnow() - timedelta(days=self.window_days - 1):%Y-%m-%d}"
+
+        requests: Counter = Counter()
+        for key, count in (await cache_service.scan(DEMAND_NAMESPACE, "day:")).items():
+            day, canonical = key[len("day:"):].split(":", 1)
+            if day >= cutoff:
+                requests[canonical] += int(count or 0)
+        top = [canonical for canonical, _ in requests.most_common(limit)]
+        if not top:
+            return []
+
+        mixes: Dict[str, Counter] = {canonical: Counter() for canonical in top}
+        for key, count in (await cache_service.scan(DEMAND_NAMESPACE, "mix:")).items():
+            day, rest = key[len("mix:"):].split(":", 1)
+            canonical, signature = rest.rsplit(":", 1)
+            if day >= cutoff and canonical in mixes:
+                mixes[canonical][signature] += int(count or 0)
+
+        names = await cache_service.mget(DEMAND_NAMESPACE, [f"name:{canonical}" for canonical in top])
+        destinations = []
+        for canonical, name in zip(top, names):
+            signatures = [signature for signature, _ in mixes[canonical].most_common(INTEREST_SETS_PER_DESTINATION)]
+            interest_sets = await cache_service.mget(DEMAND_NAMESPACE, [f"interests:{s}" for s in signatures])
+            destinations.append({
+                "destination": name or canonical,
+                "canonical": canonical,
+                "requests": requests[canonical],
+                "interest_sets": [interest_set for interest_set in interest_sets if interest_set is not None] or [[]],
+            })
+        return destinations
+
+    def _warm_calls(self, destination: str, interest_sets: List[List[str]]) -> List[Any]:
+        """Zero-argument coroutine factories for every cache entry of one destination"""
+        from services.weather_service import weather_service
+
+        calls = [
+            lambda: cached_places_tool.search_hotels_cached(destination),
+            lambda: cached_places_tool.search_restaurants_cached(destination),
+            lambda: cached_places_tool.search_cafes_cached(destination),
+        ]
+        raw_interests: Dict[str, None] = {}
+        for interests in interest_sets:
+            calls.append(lambda interests=interests: cached_places_tool.search_attractions_cached(destination, interests))
+            for interest in interests[:RAW_INTERESTS_PER_SET]:
+                if interest not in SKIPPED_RAW_INTERESTS:
+                    raw_interests.setdefault(interest)
+        for interest in raw_interests:
+            calls.append(lambda interest=interest: cached_places_tool.raw_serp_search_cached(f"{interest} places in {destination}"))
+        calls.append(lambda: weather_service.get_current_weather(destination))
+        return calls
+
+    async def run_once(self, budget: Optional[int] = None) -> Dict[str, Any]:
+        """Refresh caches for the top destinations now; returns a run report"""
+        budget = self.serp_budget if budget is None else budget
+        started = datetime.utcnow()
+        before = serp_quota.counts(SerpPriority.PREFETCH)
+        report: Dict[str, Any] = {"started_at": started.isoformat(), "destinations": [], "stopped": None}
+
+        def spent() -> Tuple[int, int, int]:
+            now = serp_quota.counts(SerpPriority.PREFETCH)
+            return (
+                now["allowed"] - before["allowed"],
+                now["rate_limited"] - before["rate_limited"],
+                now["budget_denied"] - before["budget_denied"],
+            )
+
+        def stop_reason() -> Optional[str]:
+            searches, rate_limited, budget_denied = spent()
+            if searches >= budget:
+                return "run budget spent"
+            if budget_denied:
+                return "prefetch budget share used up"
+            if rate_limited:
+                return "SERP rate limit reached"
+            return None
+
+        try:
+            destinations = await self.top_destinations()
+        except Exception as e:
+            logger.error(f"Prewarm could not read destination demand: {str(e)}")
+            destinations = []
+
+        # Stale entries are reloaded before warm() returns, so every search of
+        # the run is paced and counted against the budget right after it is made
+        with serp_priority_scope(SerpPriority.PREFETCH), serp_refresh_scope():
+            report["stopped"] = stop_reason()
+            for entry in destinations:
+                if report["stopped"]:
+                    break
+                for warm in self._warm_calls(entry["destination"], entry["interest_sets"]):
+                    before_call = spent()
+                    try:
+                        await warm()
+                    except Exception as e:
+                        logger.warning(f"Prewarm call failed for {entry['destination']}: {str(e)}")
+                    if spent() == before_call:
+                        continue
+                    report["stopped"] = stop_reason()
+                    if report["stopped"]:
+                        break
+                    await asyncio.sleep(self.pause_seconds)
+                if not report["stopped"]:
+                    report["destinations"].append(entry["destination"])
+
+        report["serp_searches"], rate_limited, budget_denied = spent()
+        report["refused"] = {"rate_limited": rate_limited, "budget_denied": budget_denied}
+        report["duration_seconds"] = round((datetime.utcnow() - started).total_seconds(), 1)
+        self._last_run = report
+        print(
+            f"🔥 CACHE PREWARM: {len(report['destinations'])}/{len(destinations)} destinations warmed, "
+            f"{report['serp_searches']} SerpApi searches" + (f" (stopped: {report['stopped']})" if report["stopped"] else "")
+        )
+        return report
+
+    async def _claim_run(self) -> bool:
+        """True for exactly one worker per day (on a shared backend)"""
+        day = f"{datetime.utcnow():%Y-%m-%d}"
+        return await cache_service.incr(DEMAND_NAMESPACE, f"run:{day}", 1, 2 * 24 * 60 * 60) == 1
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(PREWARM_CHECK_SECONDS)
+            try:
+                if self.in_off_peak() and await self._claim_run():
+                    await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Cache prewarm run failed: {str(e)}")
+
+    def start(self) -> None:
+        """Start the off-peak prewarm loop (no-op when disabled or without a SERP key)"""
+        if not self.enabled or not settings.serp_api_key:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "off_peak_hours_utc": f"{self.start_hour}-{self.end_hour}" if self.start_hour >= 0 else None,
+            "serp_budget": self.serp_budget,
+            "last_run": self._last_run,
+        }
+
+
+# Global prewarmer instance
+cache_prewarmer = CachePrewarmer(
+    enabled=settings.prewarm_enabled,
+    top_k=settings.prewarm_top_k,
+    serp_budget=settings.prewarm_serp_budget,
+    window_days=settings.prewarm_window_days,
+    hours_utc=settings.prewarm_hours_utc,
+)
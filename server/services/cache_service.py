@@ -1,48 +1,84 @@
 """
-In-Memory Cache Service - Local caching with TTL support
-Replaces Redis with simple in-memory storage for caching
+Cache Service - TTL caching over a pluggable storage backend
+In-memory by default; SQLite (shared by workers on one host) or Redis via CACHE_BACKEND
 """
 
 import json
 import hashlib
 import asyncio
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+import time
+from typing import Awaitable, Callable, Dict, Any, Optional, List, Tuple
 import logging
 import threading
+import uuid
+
+from config import settings
+from services.cache_backends import CacheBackend, MemoryCacheBackend, create_cache_backend, namespace_of
 
 logger = logging.getLogger(__name__)
 
+# Background sweeper: expire at most SWEEP_BATCH_SIZE entries per slice, then
+# yield to the event loop before the next slice.
+SWEEP_INTERVAL_SECONDS = 30
+SWEEP_BATCH_SIZE = 500
 
-class CacheEntry:
-    """Represents a cache entry with expiration time"""
-    def __init__(self, value: Any, ttl: int):
-        self.value = value
-        self.expires_at = datetime.now() + timedelta(seconds=ttl)
-    
-    def is_expired(self) -> bool:
-        """Check if entry has expired"""
-        return datetime.now() > self.expires_at
-    
-    def get_value(self) -> Optional[Any]:
-        """Get value if not expired"""
-        if self.is_expired():
-            return None
-        return self.value
+# Envelope marker for entries written by get_or_load(..., fresh_ttl=...)
+_FRESH_UNTIL = "__fresh_until__"
+
+# Two-tier policies. In front of a shared backend, namespaces with an l1_size
+# keep hot entries in a small per-process L1 for l1_ttl seconds; writes fan out
+# invalidations so other workers drop their copy. l2_ttl is the backend TTL used
+# when the caller passes none; cache_negatives keeps misses in L1 too.
+DEFAULT_TIER_POLICY = {"l1_size": 0, "l1_ttl": 0, "l2_ttl": None, "cache_negatives": False}
+TIER_POLICIES = {
+    "sessions": {"l1_size": 1000, "l1_ttl": 30, "l2_ttl": 86400, "cache_negatives": True},
+    "serp_cache": {"l1_size": 200, "l1_ttl": 60, "l2_ttl": None, "cache_negatives": False},
+    "weather": {"l1_size": 100, "l1_ttl": 60, "l2_ttl": None, "cache_negatives": False},
+    "places": {"l1_size": 2000, "l1_ttl": 60, "l2_ttl": None, "cache_negatives": False},
+}
+L1_MAX_BYTES = 8 * 1024 * 1024
+INVALIDATION_POLL_SECONDS = 1.0
+
+# L1 marker for "known missing in L2" (cache_negatives)
+_NEGATIVE = object()
 
 
 class CacheService:
     """
-    In-memory cache service for local caching with TTL support
+    Cache service with TTL support on top of a CacheBackend.
+
+    Key generation, request coalescing, stale-while-revalidate and the
+    per-process L1 tier live here; storage, eviction and expiry are the
+    backend's job.
     """
-    
-    def __init__(self):
-        self._cache: Dict[str, CacheEntry] = {}
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend or create_cache_backend(settings)
+        self.tier_policies: Dict[str, Dict[str, Any]] = {ns: dict(p) for ns, p in TIER_POLICIES.items()}
+        for ns, overrides in (getattr(settings, "cache_tier_policies", None) or {}).items():
+            self.tier_policies.setdefault(ns, dict(DEFAULT_TIER_POLICY)).update(overrides)
+        # An L1 only pays off in front of a shared store
+        self._l1: Optional[MemoryCacheBackend] = None
+        if not isinstance(self.backend, MemoryCacheBackend):
+            self._l1 = MemoryCacheBackend({
+                ns: {"max_entries": policy["l1_size"], "max_bytes": L1_MAX_BYTES}
+                for ns, policy in self.tier_policies.items() if policy["l1_size"]
+            })
+        self._origin = uuid.uuid4().hex
+        # Bumped on every local L1 change so a slow L2 read cannot refill L1
+        # with a value older than a write that finished meanwhile.
+        self._l1_generation = 0
+        self._l1_invalidations = 0
+        self._invalidation_task: Optional[asyncio.Task] = None
+        # In-flight loads keyed by full cache key, so concurrent misses for the
+        # same key share one upstream call (see get_or_load).
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._load_stats: Dict[str, Dict[str, int]] = {}
         self._lock = threading.RLock()  # Thread-safe lock
         self.default_ttl = 3600  # 1 hour default TTL
-        self._cleanup_task = None
-        logger.info("✅ In-memory cache service initialized")
-    
+        self._cleanup_task: Optional[asyncio.Task] = None
+        logger.info(f"✅ Cache service initialized ({self.backend.name} backend)")
+
     def _generate_cache_key(self, namespace: str, key: str, params: Optional[Dict[str, Any]] = None) -> str:
         """Generate a hierarchical cache key"""
         if params:
@@ -51,139 +87,325 @@ class CacheService:
             param_hash = hashlib.md5(sorted_params.encode()).hexdigest()[:8]
             return f"safarbot:{namespace}:{key}:{param_hash}"
         return f"safarbot:{namespace}:{key}"
-    
+
+    def _tier_policy(self, cache_key: str) -> Dict[str, Any]:
+        return self.tier_policies.get(namespace_of(cache_key), DEFAULT_TIER_POLICY)
+
+    def _l1_policy(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Tier policy for ``cache_key`` if it is kept in L1, else None"""
+        if self._l1 is None:
+            return None
+        policy = self._tier_policy(cache_key)
+        return policy if policy["l1_size"] else None
+
+    async def _fill_l1(self, cache_key: str, stored: Optional[Any], generation: int) -> None:
+        policy = self._l1_policy(cache_key)
+        if policy is None or generation != self._l1_generation:
+            return
+        if stored is None and not policy["cache_negatives"]:
+            return
+        await self._l1.set(cache_key, _NEGATIVE if stored is None else stored, policy["l1_ttl"])
+
+    async def _read(self, cache_key: str) -> Optional[Any]:
+        """Read through L1, then the backend, filling L1 on the way back"""
+        if self._l1_policy(cache_key) is not None:
+            stored = await self._l1.get(cache_key)
+            if stored is not None:
+                return None if stored is _NEGATIVE else stored
+        generation = self._l1_generation
+        stored = await self.backend.get(cache_key)
+        await self._fill_l1(cache_key, stored, generation)
+        return stored
+
+    async def _read_many(self, cache_keys: List[str]) -> List[Optional[Any]]:
+        values: List[Optional[Any]] = [None] * len(cache_keys)
+        missing = []
+        for index, cache_key in enumerate(cache_keys):
+            stored = await self._l1.get(cache_key) if self._l1_policy(cache_key) is not None else None
+            if stored is None:
+                missing.append(index)
+            elif stored is not _NEGATIVE:
+                values[index] = stored
+        if missing:
+            generation = self._l1_generation
+            fetched = await self.backend.mget([cache_keys[index] for index in missing])
+            for index, stored in zip(missing, fetched):
+                values[index] = stored
+                await self._fill_l1(cache_keys[index], stored, generation)
+        return values
+
+    async def _write(self, items: Dict[str, Any], ttl: int) -> bool:
+        """Write to the backend, then refresh local L1 copies and invalidate the others"""
+        if len(items) == 1:
+            stored = await self.backend.set(*next(iter(items.items())), ttl)
+        else:
+            stored = await self.backend.mset(items, ttl)
+        tiered = [key for key in items if self._l1_policy(key) is not None]
+        if tiered:
+            self._l1_generation += 1
+            for key in tiered:
+                if stored:
+                    await self._l1.set(key, items[key], min(self._l1_policy(key)["l1_ttl"], ttl))
+                else:
+                    await self._l1.delete(key)
+            await self._publish_invalidation([(key, False) for key in tiered])
+        return stored
+
+    async def _invalidate(self, key_or_prefix: str, is_prefix: bool = False) -> None:
+        """Drop the local L1 copy and fan the invalidation out to other workers"""
+        if self._l1 is None or (not is_prefix and self._l1_policy(key_or_prefix) is None):
+            return
+        self._l1_generation += 1
+        if is_prefix:
+            await self._l1.delete_pattern(key_or_prefix)
+        else:
+            await self._l1.delete(key_or_prefix)
+        await self._publish_invalidation([(key_or_prefix, is_prefix)])
+
+    async def _publish_invalidation(self, items: List[Tuple[str, bool]]) -> None:
+        try:
+            await self.backend.publish_invalidation(self._origin, items)
+        except Exception as e:
+            # Other workers fall back to their short L1 TTL
+            logger.warning(f"Cache invalidation fan-out failed: {str(e)}")
+
+    def _resolve_ttl(self, cache_key: str, ttl: Optional[int]) -> int:
+        return ttl or self._tier_policy(cache_key)["l2_ttl"] or self.default_ttl
+
+    def _count_load(self, namespace: str, counter: str) -> None:
+        with self._lock:
+            stats = self._load_stats.setdefault(namespace, {"loads": 0, "coalesced": 0, "stale_served": 0})
+            stats[counter] += 1
+
     async def get(self, namespace: str, key: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
         """Get cached data"""
         cache_key = self._generate_cache_key(namespace, key, params)
-        
-        with self._lock:
-            entry = self._cache.get(cache_key)
-            if entry:
-                value = entry.get_value()
-                if value is not None:
-                    logger.debug(f"💾 Cache HIT: {cache_key}")
-                    return value
-                else:
-                    # Expired, remove it
-                    del self._cache[cache_key]
-            
+        value, _ = self._unwrap(await self._read(cache_key))
+
+        if value is not None:
+            logger.debug(f"💾 Cache HIT: {cache_key}")
+        else:
             logger.debug(f"💸 Cache MISS: {cache_key}")
-            return None
-    
+        return value
+
+    async def get_entry(
+        self, namespace: str, key: str, params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Any], bool]:
+        """(value, fresh): like get, but tells entries past get_or_load's soft TTL apart"""
+        value, fresh_until = self._unwrap(await self._read(self._generate_cache_key(namespace, key, params)))
+        return value, value is not None and (fresh_until is None or time.time() < fresh_until)
+
     async def set(
-        self, 
-        namespace: str, 
-        key: str, 
-        value: Any, 
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
         ttl: Optional[int] = None,
-        params: Optional[Dict[str, Any]] = None
+        params: Optional[Dict[str, Any]] = None,
+        fresh_ttl: Optional[float] = None
     ) -> bool:
-        """Set cached data with TTL"""
+        """Set cached data with TTL.
+
+        ``fresh_ttl`` stores the value for get_or_load's stale-while-revalidate
+        (0 or less means already stale).
+        """
         cache_key = self._generate_cache_key(namespace, key, params)
-        ttl_seconds = ttl or self.default_ttl
-        
-        with self._lock:
-            self._cache[cache_key] = CacheEntry(value, ttl_seconds)
+        ttl_seconds = self._resolve_ttl(cache_key, ttl)
+        if fresh_ttl is not None:
+            value = {_FRESH_UNTIL: time.time() + fresh_ttl, "value": value}
+
+        stored = await self._write({cache_key: value}, ttl_seconds)
+        if stored:
             logger.debug(f"💾 Cache SET: {cache_key} (TTL: {ttl_seconds}s)")
-        
-        return True
-    
+
+        return stored
+
+    async def mget(self, namespace: str, keys: List[str]) -> List[Optional[Any]]:
+        """Get several keys of one namespace in a single backend round trip"""
+        values = await self._read_many([self._generate_cache_key(namespace, key) for key in keys])
+        return [self._unwrap(value)[0] for value in values]
+
+    async def scan(self, namespace: str, key_prefix: str = "") -> Dict[str, Any]:
+        """Return ``{key: value}`` for every live key of ``namespace`` starting with ``key_prefix``"""
+        prefix = self._generate_cache_key(namespace, key_prefix)
+        namespace_prefix = self._generate_cache_key(namespace, "")
+        return {
+            key[len(namespace_prefix):]: self._unwrap(value)[0]
+            for key, value in (await self.backend.scan_prefix(prefix)).items()
+        }
+
+    async def mset(self, namespace: str, items: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """Set several keys of one namespace in a single backend round trip"""
+        if not items:
+            return True
+        cache_items = {self._generate_cache_key(namespace, key): value for key, value in items.items()}
+        return await self._write(cache_items, self._resolve_ttl(next(iter(cache_items)), ttl))
+
+    async def incr(self, namespace: str, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        """Atomically increment a counter (shared across workers on shared backends)"""
+        cache_key = self._generate_cache_key(namespace, key)
+        value = await self.backend.incr(cache_key, amount, ttl)
+        await self._invalidate(cache_key)
+        return value
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+        fresh_ttl: Optional[int] = None,
+        refresh: bool = False
+    ) -> Any:
+        """Get cached data, or run ``loader`` once for all concurrent misses.
+
+        The load runs as its own task so a caller that disconnects does not
+        cancel it for the others waiting on the same key. ``None`` results
+        are returned but not cached; loader exceptions reach every waiter.
+
+        With ``fresh_ttl`` (soft TTL) set below ``ttl`` (hard TTL), an entry
+        older than ``fresh_ttl`` is still returned immediately while a single
+        background load refreshes it (stale-while-revalidate). ``refresh``
+        makes the caller wait for that load instead of getting the stale value.
+        """
+        cache_key = self._generate_cache_key(namespace, key, params)
+        stored = await self._read(cache_key)
+
+        if stored is not None:
+            value, fresh_until = self._unwrap(stored)
+            if fresh_until is None or time.time() < fresh_until:
+                logger.debug(f"💾 Cache HIT: {cache_key}")
+                return value
+            if refresh:
+                task = self._inflight.get(cache_key) or self._start_load(cache_key, namespace, key, loader, ttl, params, fresh_ttl)
+                return await asyncio.shield(task)
+            if cache_key not in self._inflight:
+                logger.debug(f"♻️ Cache STALE, refreshing in background: {cache_key}")
+                self._start_load(cache_key, namespace, key, loader, ttl, params, fresh_ttl)
+            self._count_load(namespace, "stale_served")
+            return value
+
+        task = self._inflight.get(cache_key)
+        if task is not None:
+            self._count_load(namespace, "coalesced")
+            logger.debug(f"🔗 Cache COALESCE: {cache_key}")
+            return await asyncio.shield(task)
+
+        logger.debug(f"💸 Cache MISS: {cache_key}")
+        task = self._start_load(cache_key, namespace, key, loader, ttl, params, fresh_ttl)
+        return await asyncio.shield(task)
+
+    def _start_load(
+        self,
+        cache_key: str,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int],
+        params: Optional[Dict[str, Any]],
+        fresh_ttl: Optional[int]
+    ) -> asyncio.Task:
+        async def load() -> Any:
+            result = await loader()
+            if result is not None:
+                await self.set(namespace, key, result, ttl, params, fresh_ttl=fresh_ttl or None)
+            return result
+
+        self._count_load(namespace, "loads")
+        task = asyncio.ensure_future(load())
+        self._inflight[cache_key] = task
+        task.add_done_callback(lambda t: self._finish_load(cache_key, t))
+        return task
+
+    def _finish_load(self, cache_key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        if not task.cancelled() and task.exception() is not None:
+            # Also marks the exception retrieved when no waiter is left (background refresh)
+            logger.warning(f"Cache load failed for {cache_key}: {task.exception()}")
+
+    @staticmethod
+    def _unwrap(stored: Any) -> Tuple[Any, Optional[float]]:
+        """Split a stale-while-revalidate envelope into (value, fresh_until)"""
+        if isinstance(stored, dict) and _FRESH_UNTIL in stored:
+            return stored["value"], stored[_FRESH_UNTIL]
+        return stored, None
+
     async def delete(self, namespace: str, key: str, params: Optional[Dict[str, Any]] = None) -> bool:
         """Delete cached data"""
         cache_key = self._generate_cache_key(namespace, key, params)
-        
-        with self._lock:
-            if cache_key in self._cache:
-                del self._cache[cache_key]
-                logger.debug(f"🗑️ Cache DELETE: {cache_key}")
-                return True
-        
+
+        deleted = await self.backend.delete(cache_key)
+        await self._invalidate(cache_key)
+        if deleted:
+            logger.debug(f"🗑️ Cache DELETE: {cache_key}")
+            return True
+
         return False
-    
+
     async def delete_pattern(self, pattern: str) -> int:
-        """Delete all keys matching a pattern"""
-        prefix = f"safarbot:{pattern}"
-        deleted_count = 0
-        
-        with self._lock:
-            keys_to_delete = [k for k in self._cache.keys() if k.startswith(prefix)]
-            for key in keys_to_delete:
-                del self._cache[key]
-                deleted_count += 1
-        
+        """Delete all keys under a prefix; a trailing ``*`` is accepted ("serp_cache:*")"""
+        prefix = f"safarbot:{pattern.rstrip('*')}"
+        deleted_count = await self.backend.delete_pattern(prefix)
+        await self._invalidate(prefix, is_prefix=True)
+
         if deleted_count > 0:
             logger.debug(f"🗑️ Cache PATTERN DELETE: {deleted_count} keys deleted")
-        
+
         return deleted_count
-    
+
     async def store_json(self, key: str, data: Any, ttl: Optional[int] = None) -> bool:
         """Store JSON data (convenience method)"""
         # Store directly without namespace/key structure
-        ttl_seconds = ttl or self.default_ttl
-        
-        with self._lock:
-            self._cache[key] = CacheEntry(data, ttl_seconds)
+        ttl_seconds = self._resolve_ttl(key, ttl)
+
+        stored = await self._write({key: data}, ttl_seconds)
+        if stored:
             logger.debug(f"💾 Cache STORE JSON: {key}")
-        
-        return True
-    
+
+        return stored
+
     async def get_json(self, key: str) -> Optional[Any]:
         """Get JSON data (convenience method)"""
-        with self._lock:
-            entry = self._cache.get(key)
-            if entry:
-                value = entry.get_value()
-                if value is not None:
-                    return value
-                else:
-                    # Expired, remove it
-                    del self._cache[key]
-        
-        return None
-    
+        return self._unwrap(await self._read(key))[0]
+
     # Session management methods
     async def set_user_session(self, user_id: str, session_data: Dict[str, Any], ttl: int = 86400) -> bool:
         """Set user session data (24 hours default)"""
         return await self.set("sessions", f"user:{user_id}", session_data, ttl)
-    
+
     async def get_user_session(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user session data"""
         return await self.get("sessions", f"user:{user_id}")
-    
+
     async def delete_user_session(self, user_id: str) -> bool:
         """Delete user session"""
         return await self.delete("sessions", f"user:{user_id}")
-    
+
     # Collaboration-specific methods
     async def set_collaboration_state(
-        self, 
-        itinerary_id: str, 
-        user_id: str, 
+        self,
+        itinerary_id: str,
+        user_id: str,
         state: Dict[str, Any]
     ) -> bool:
         """Set collaboration state for real-time editing"""
         key = f"collab:{itinerary_id}:user:{user_id}"
         return await self.set("collaboration", key, state, ttl=300)  # 5 minutes
-    
+
     async def get_collaboration_state(self, itinerary_id: str) -> Dict[str, Any]:
         """Get all collaboration states for an itinerary"""
         prefix = f"safarbot:collaboration:collab:{itinerary_id}:user:"
         states = {}
-        
-        with self._lock:
-            for key, entry in list(self._cache.items()):
-                if key.startswith(prefix):
-                    value = entry.get_value()
-                    if value is not None:
-                        # Extract user_id from key
-                        user_id = key.split(':')[-1]
-                        states[user_id] = value
-                    else:
-                        # Expired, remove it
-                        del self._cache[key]
-        
+
+        for key, value in (await self.backend.scan_prefix(prefix)).items():
+            # Extract user_id from key
+            user_id = key.split(':')[-1]
+            states[user_id] = self._unwrap(value)[0]
+
         return states
-    
+
     # Event publishing (stub - no pub/sub in in-memory)
     async def publish_event(self, channel: str, event_data: Dict[str, Any]) -> bool:
         """Publish real-time event (no-op in in-memory cache)"""
@@ -191,31 +413,53 @@ class CacheService:
         # This is a stub for compatibility
         logger.debug(f"📡 Event PUBLISH (stub): {channel}")
         return True
-    
+
     async def get_cache_stats(self) -> Dict[str, Any]:
-        """Get cache statistics"""
+        """Get cache statistics (from running counters, no full scan)"""
+        try:
+            stats = await self.backend.stats()
+        except Exception as e:
+            logger.error(f"Error reading cache backend stats: {str(e)}")
+            return {"status": "error", "type": self.backend.name, "error": str(e)}
+
         with self._lock:
-            # Clean expired entries first
-            expired_keys = [k for k, v in self._cache.items() if v.is_expired()]
-            for key in expired_keys:
-                del self._cache[key]
-            
-            total_keys = len(self._cache)
-            safarbot_keys = len([k for k in self._cache.keys() if k.startswith("safarbot:")])
-            
-            # Estimate memory usage (rough calculation)
-            memory_estimate = sum(len(str(v.value).encode()) for v in self._cache.values())
-            memory_str = self._format_bytes(memory_estimate)
-        
+            load_stats = {ns: dict(counters) for ns, counters in self._load_stats.items()}
+        namespaces = stats.pop("namespaces", {})
+        for namespace, counters in load_stats.items():
+            namespaces.setdefault(namespace, {}).update(counters)
+
+        l1_stats = None
+        if self._l1 is not None:
+            l1 = await self._l1.stats()
+            l1_lookups = l1["hits"] + l1["misses"]
+            l1_stats = {
+                "entries": l1["total_keys"],
+                "memory_used_bytes": l1["memory_used_bytes"],
+                "hits": l1["hits"],
+                "misses": l1["misses"],
+                "hit_ratio": round(l1["hits"] / l1_lookups, 4) if l1_lookups else "N/A",
+                "invalidations_received": self._l1_invalidations,
+                "listener_running": self._invalidation_task is not None and not self._invalidation_task.done(),
+            }
+
+        hits, misses = stats.pop("hits", 0), stats.pop("misses", 0)
+        lookups = hits + misses
+        memory_used = stats.pop("memory_used_bytes", 0)
         return {
             "status": "connected",
-            "type": "in-memory",
-            "total_keys": total_keys,
-            "safarbot_keys": safarbot_keys,
-            "memory_used": memory_str,
-            "cache_hit_ratio": "N/A (in-memory cache)"
+            "type": self.backend.name,
+            **stats,
+            "memory_used": self._format_bytes(memory_used),
+            "memory_used_bytes": memory_used,
+            "cache_hit_ratio": round(hits / lookups, 4) if lookups else "N/A",
+            "inflight_loads": len(self._inflight),
+            "coalesced_calls": sum(c["coalesced"] for c in load_stats.values()),
+            "stale_served": sum(c["stale_served"] for c in load_stats.values()),
+            "sweeper_running": self._cleanup_task is not None and not self._cleanup_task.done(),
+            "l1": l1_stats,
+            "namespaces": namespaces,
         }
-    
+
     def _format_bytes(self, bytes_value: int) -> str:
         """Format bytes to human-readable string"""
         for unit in ['B', 'KB', 'MB', 'GB']:
@@ -223,30 +467,104 @@ class CacheService:
                 return f"{bytes_value:.2f}{unit}"
             bytes_value /= 1024.0
         return f"{bytes_value:.2f}TB"
-    
+
     async def health_check(self) -> bool:
         """Check if cache is healthy"""
-        return True
-    
+        try:
+            await self.backend.get("safarbot:health")
+            return True
+        except Exception:
+            return False
+
     async def clear_all(self) -> int:
         """Clear all cache entries"""
-        with self._lock:
-            count = len(self._cache)
-            self._cache.clear()
-            logger.info(f"🗑️ Cache CLEARED: {count} entries removed")
+        count = await self.backend.clear()
+        if self._l1 is not None:
+            await self._l1.clear()
+            await self._publish_invalidation([("", True)])
+        logger.info(f"🗑️ Cache CLEARED: {count} entries removed")
         return count
-    
-    async def cleanup_expired(self) -> int:
-        """Remove expired entries"""
-        with self._lock:
-            expired_keys = [k for k, v in self._cache.items() if v.is_expired()]
-            for key in expired_keys:
-                del self._cache[key]
-        
-        if expired_keys:
-            logger.debug(f"🧹 Cache CLEANUP: {len(expired_keys)} expired entries removed")
-        
-        return len(expired_keys)
+
+    async def cleanup_expired(self, max_entries: Optional[int] = None) -> int:
+        """Remove expired entries.
+
+        With ``max_entries`` set, at most that many entries are examined so a
+        single call does a bounded slice of work.
+        """
+        removed = await self.backend.cleanup_expired(max_entries)
+        if self._l1 is not None:
+            await self._l1.cleanup_expired(max_entries)
+
+        if removed:
+            logger.debug(f"🧹 Cache CLEANUP: {removed} expired entries removed")
+
+        return removed
+
+    async def _sweep_loop(self, interval: float, batch_size: int) -> None:
+        while True:
+            try:
+                removed = await self.cleanup_expired(max_entries=batch_size)
+            except Exception as e:
+                logger.error(f"Cache sweeper error: {str(e)}")
+                removed = 0
+            # A full slice means more work is queued; yield briefly and continue.
+            await asyncio.sleep(0 if removed >= batch_size else interval)
+
+    def start_sweeper(
+        self, interval: float = SWEEP_INTERVAL_SECONDS, batch_size: int = SWEEP_BATCH_SIZE
+    ) -> None:
+        """Start the background expiry sweeper on the running event loop"""
+        if self._cleanup_task and not self._cleanup_task.done():
+            return
+        self._cleanup_task = asyncio.create_task(self._sweep_loop(interval, batch_size))
+        logger.info("🧹 Cache sweeper started")
+
+    async def stop_sweeper(self) -> None:
+        """Cancel the background expiry sweeper"""
+        task, self._cleanup_task = self._cleanup_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _invalidation_loop(self) -> None:
+        while True:
+            try:
+                messages = await self.backend.poll_invalidations(INVALIDATION_POLL_SECONDS)
+            except Exception as e:
+                logger.error(f"Cache invalidation listener error: {str(e)}")
+                await asyncio.sleep(INVALIDATION_POLL_SECONDS)
+                continue
+            for origin, key, is_prefix in messages:
+                if origin == self._origin:
+                    continue
+                self._l1_generation += 1
+                if is_prefix:
+                    await self._l1.delete_pattern(key)
+                else:
+                    await self._l1.delete(key)
+                self._l1_invalidations += 1
+
+    def start_invalidation_listener(self) -> None:
+        """Evict L1 entries written by other workers (no-op without an L1)"""
+        if self._l1 is None or (self._invalidation_task and not self._invalidation_task.done()):
+            return
+        self._invalidation_task = asyncio.create_task(self._invalidation_loop())
+        logger.info("📡 Cache L1 invalidation listener started")
+
+    async def close(self) -> None:
+        """Stop background work and release backend connections"""
+        await self.stop_sweeper()
+        task, self._invalidation_task = self._invalidation_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.backend.close()
 
 
 # Global cache service instance
@@ -263,4 +581,3 @@ async def get_cached_response(endpoint: str, params: Dict[str, Any]) -> Optional
 async def cache_response(endpoint: str, params: Dict[str, Any], response: Any, ttl: int = 3600) -> bool:
     """Backward compatible function for SERP cache"""
     return await cache_service.set("serp_cache", endpoint, response, ttl, params)
-
@@ -0,0 +1,255 @@
+"""
+Circuit Breaker - Fail fast and retry carefully around external providers
+Per-provider closed/open/half-open breakers with budgeted exponential backoff
+and optional hedged requests, reported on /health
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, Optional, Tuple, Type, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Latency samples kept per provider for the hedging deadline (p95)
+LATENCY_WINDOW = 200
+MIN_HEDGE_SAMPLES = 20
+
+
+class CircuitOpenError(Exception):
+    """The provider's breaker is open; the call was not attempted"""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} circuit open, retry in {retry_in:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Breaker for one provider.
+
+    CLOSED: calls go through; ``failure_threshold`` consecutive failures open it.
+    OPEN: calls fail immediately with CircuitOpenError for ``recovery_timeout``.
+    HALF_OPEN: up to ``half_open_max_calls`` trial calls; a success closes the
+    breaker, a failure opens it again.
+
+    Retries back off exponentially (with jitter) and are budgeted: each
+    success earns ``retry_budget_ratio`` of a retry, so a struggling provider
+    is not hit with a multiple of its normal traffic. With ``hedge`` enabled a
+    second attempt starts once the first has run past the observed p95
+    latency, and whichever finishes first wins. Only hedge idempotent, free
+    calls; paid APIs would be charged twice.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        retry_budget_ratio: float = 0.2,
+        retry_budget_max: float = 10.0,
+        hedge: bool = False,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+        ignore: Tuple[Type[BaseException], ...] = ()
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget_ratio = retry_budget_ratio
+        self.retry_budget_max = retry_budget_max
+        self.hedge = hedge
+        self.retry_on = retry_on
+        # Exceptions that say nothing about provider health (e.g. our own quota refusals)
+        self.ignore = ignore
+
+        self.state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._retry_tokens = retry_budget_max
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._counters = {
+            "calls": 0, "successes": 0, "failures": 0, "short_circuited": 0,
+            "retries": 0, "retries_denied": 0, "hedges": 0, "hedge_wins": 0,
+        }
+
+    # State machine
+
+    def _before_call(self) -> None:
+        if self.state == OPEN:
+            retry_in = self._opened_at + self.recovery_timeout - time.monotonic()
+            if retry_in > 0:
+                self._counters["short_circuited"] += 1
+                raise CircuitOpenError(self.name, retry_in)
+            self.state = HALF_OPEN
+            self._half_open_in_flight = 0
+            logger.info(f"🔌 {self.name} circuit half-open, sending a trial call")
+        if self.state == HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_max_calls:
+                self._counters["short_circuited"] += 1
+                raise CircuitOpenError(self.name, 0)
+            self._half_open_in_flight += 1
+
+    def _on_success(self, latency: float) -> None:
+        self._counters["successes"] += 1
+        self._latencies.append(latency)
+        self._consecutive_failures = 0
+        self._retry_tokens = min(self.retry_budget_max, self._retry_tokens + self.retry_budget_ratio)
+        if self.state != CLOSED:
+            logger.info(f"✅ {self.name} circuit closed")
+        self.state = CLOSED
+        self._half_open_in_flight = 0
+
+    def _on_failure(self, error: BaseException) -> None:
+        self._counters["failures"] += 1
+        self._consecutive_failures += 1
+        if self.state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(f"🔌 {self.name} circuit OPEN after {self._consecutive_failures} failures: {error}")
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            self._half_open_in_flight = 0
+
+    def _release_trial(self) -> None:
+        if self.state == HALF_OPEN and self._half_open_in_flight:
+            self._half_open_in_flight -= 1
+
+    def p95_latency(self) -> Optional[float]:
+        if len(self._latencies) < MIN_HEDGE_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    # Calls
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Track a call that cannot be wrapped in ``call()`` (no retries or hedging)"""
+        self._before_call()
+        self._counters["calls"] += 1
+        started = time.monotonic()
+        try:
+            yield
+        except self.ignore:
+            self._release_trial()
+            raise
+        except Exception as e:
+            self._on_failure(e)
+            raise
+        except BaseException:
+            # Cancelled or abandoned (e.g. a closed stream) says nothing about the provider
+            self._release_trial()
+            raise
+        self._on_success(time.monotonic() - started)
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.hedge:
+            return await fn()
+        deadline = self.p95_latency()
+        if deadline is None:
+            return await fn()
+
+        first = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({first}, timeout=deadline)
+        if done:
+            return first.result()
+
+        self._counters["hedges"] += 1
+        second = asyncio.ensure_future(fn())
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self._counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` (a zero-argument coroutine factory) under the breaker"""
+        attempt = 0
+        while True:
+            self._before_call()
+            self._counters["calls"] += 1
+            started = time.monotonic()
+            try:
+                result = await self._attempt(fn)
+            except self.ignore:
+                self._release_trial()
+                raise
+            except asyncio.CancelledError:
+                # Cancelled or abandoned says nothing about the provider, but must free a half-open trial
+                self._release_trial()
+                raise
+            except Exception as e:
+                self._on_failure(e)
+                if not isinstance(e, self.retry_on) or attempt >= self.max_retries or self.state == OPEN:
+                    raise
+                if self._retry_tokens < 1:
+                    self._counters["retries_denied"] += 1
+                    raise
+                self._retry_tokens -= 1
+                self._counters["retries"] += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                attempt += 1
+                logger.warning(f"↻ {self.name} call failed ({str(e) or type(e).__name__}), retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                continue
+            self._on_success(time.monotonic() - started)
+            return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        p95 = self.p95_latency()
+        snapshot: Dict[str, Any] = {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "p95_latency_ms": round(p95 * 1000) if p95 is not None else None,
+            "retry_budget": round(self._retry_tokens, 2),
+            "hedging": self.hedge,
+            **self._counters,
+        }
+        if self.state == OPEN:
+            snapshot["retry_in_seconds"] = max(0, round(self._opened_at + self.recovery_timeout - time.monotonic()))
+        return snapshot
+
+
+# One breaker per provider, shared by every call site of that provider
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **options: Any) -> CircuitBreaker:
+    """Return the breaker for ``name``, creating it with ``options`` on first use"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers[name] = CircuitBreaker(name, **options)
+    return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every provider breaker (for /health)"""
+    return {name: breaker.snapshot() for name, breaker in sorted(_breakers.items())}
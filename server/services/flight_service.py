@@ -4,6 +4,7 @@ import logging
 from typing import List, Dict, Any, Optional
 from datetime import date, datetime
 from config import settings
+from services.serp_client import serp_client
 
 logger = logging.getLogger(__name__)
 
@@ -49,8 +50,6 @@ class FlightService:
         Search flights using Google SERP API
         """
         try:
-            from serpapi import GoogleSearch
-            
             # Prepare search parameters
             search_params = {
                 "engine": "google_flights",
@@ -74,8 +73,7 @@ class FlightService:
             logger.info(f"Calling SerpApi with params: {search_params}")
             
             # Perform the search
-            search = GoogleSearch(search_params)
-            results = search.get_dict()
+            results = await serp_client.search(search_params)
             
             logger.info(f"SERP API response keys: {list(results.keys())}")
             
@@ -662,8 +660,6 @@ class FlightService:
         Get booking options using SerpApi Google Flights Booking Options API
         """
         try:
-            from serpapi import GoogleSearch
-            
             # Prepare search parameters for booking options
             search_params = {
                 "engine": "google_flights",
@@ -676,8 +672,7 @@ class FlightService:
             logger.info(f"Calling SerpApi with params: {search_params}")
             
             # Perform the search
-            search = GoogleSearch(search_params)
-            results = search.get_dict()
+            results = await serp_client.search(search_params)
             
             logger.info(f"SERP API response keys: {list(results.keys())}")
             
@@ -0,0 +1,234 @@
+"""
+Itinerary Index - Find earlier generated itineraries close to a new request
+Requests are embedded as normalized feature vectors and compared by cosine
+similarity (NumPy); the itineraries themselves stay in the LLM response cache
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers sharing the file are not serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "itinerary_index.npz"
+FEATURE_DIM = 256
+# How much each request field moves the similarity. Every field contributes a
+# unit-norm block times its weight, so one of three interests differing still
+# scores ~0.9 while a different pace, budget band or diet falls below 0.85.
+FEATURE_WEIGHTS = {
+    "interests": 1.0,
+    "dietary": 1.0,
+    "budget": 0.8,
+    "pace": 0.8,
+    "companion": 0.5,
+    "accommodation": 0.5,
+    "travelers": 0.4,
+}
+# Candidates checked per lookup (the best may have expired from the cache)
+MAX_CANDIDATES = 3
+
+
+Entries = Tuple[np.ndarray, List[Dict[str, Any]]]
+# Edits the index (vectors, metadata); returns the new pair, or None for no change
+IndexChange = Callable[[np.ndarray, List[Dict[str, Any]]], Optional[Entries]]
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Exclusive lock shared by every process using ``path``"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def feature_vector(inputs: Dict[str, Any]) -> np.ndarray:
+    """Unit-length signed feature-hashing embedding of normalized request inputs"""
+    vec = np.zeros(FEATURE_DIM, dtype=np.float32)
+    for field, weight in FEATURE_WEIGHTS.items():
+        value = inputs.get(field)
+        values = [v for v in value if v not in (None, "")] if isinstance(value, list) else [value]
+        values = [v for v in values if v not in (None, "")] or ["<none>"]
+        share = weight / np.sqrt(len(values))
+        for v in values:
+            digest = int(hashlib.md5(f"{field}:{v}".encode()).hexdigest(), 16)
+            vec[digest % FEATURE_DIM] += share if (digest >> 64) & 1 else -share
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class ItineraryIndex:
+    """
+    Vectors plus ``{"key", "destination", "days", "added"}`` metadata for
+    itineraries Gemini generated, persisted to one .npz file. Only requests
+    for the same canonical destination and a trip of the same length (or one
+    day longer, which can be cut short) are compared.
+
+    Each process keeps a copy, loaded lazily and reloaded when another worker
+    has rewritten the file. Writes re-read the file under a lock file and
+    apply the change to what is on disk, so workers sharing the directory
+    merge their entries instead of overwriting each other's. The oldest
+    entries are dropped beyond ``max_entries``.
+    """
+
+    def __init__(self, directory: str, threshold: float = 0.85, max_entries: int = 5000):
+        self.path = os.path.join(directory, INDEX_FILE)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._vectors = np.zeros((0, FEATURE_DIM), dtype=np.float32)
+        self._meta: List[Dict[str, Any]] = []
+        self._loaded = False
+        self._mtime = 0.0
+        self._lock = asyncio.Lock()
+        self._stats = {
+            "lookups": 0, "candidates": 0, "reused": 0, "rejected": 0,
+            "lookup_ms_total": 0.0, "llm_ms_saved": 0.0,
+        }
+
+    def _file_mtime(self) -> float:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return 0.0
+
+    def _read(self) -> Tuple[np.ndarray, List[Dict[str, Any]], float]:
+        """(vectors, metadata, mtime) from the index file; empty if missing or unreadable"""
+        mtime = self._file_mtime()
+        if mtime:
+            try:
+                with np.load(self.path, allow_pickle=False) as data:
+                    vectors, meta = data["vectors"], json.loads(str(data["meta"]))
+                if vectors.shape == (len(meta), FEATURE_DIM):
+                    return vectors.astype(np.float32), meta, mtime
+                logger.warning("Itinerary index has an unexpected shape; starting empty")
+            except Exception as e:
+                logger.warning(f"Could not load itinerary index {self.path}: {str(e)}")
+        return np.zeros((0, FEATURE_DIM), dtype=np.float32), [], mtime
+
+    def _save(self, vectors: np.ndarray, meta: List[Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, vectors=vectors, meta=np.array(json.dumps(meta)))
+        os.replace(tmp, self.path)
+
+    def _update_file(self, change: IndexChange) -> Tuple[np.ndarray, List[Dict[str, Any]], float]:
+        """Apply ``change`` to the index on disk under the lock file; returns the resulting index"""
+        with _file_lock(f"{self.path}.lock"):
+            vectors, meta, mtime = self._read()
+            changed = change(vectors, meta)
+            if changed is None:
+                return vectors, meta, mtime
+            self._save(*changed)
+            return (*changed, self._file_mtime())
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded and self._file_mtime() == self._mtime:
+            return
+        async with self._lock:
+            if not self._loaded or self._file_mtime() != self._mtime:
+                first = not self._loaded
+                self._vectors, self._meta, self._mtime = await asyncio.to_thread(self._read)
+                self._loaded = True
+                if first and self._meta:
+                    print(f"🧭 ITINERARY INDEX - Loaded {len(self._meta)} itineraries")
+
+    async def _update(self, change: IndexChange) -> None:
+        async with self._lock:
+            try:
+                self._vectors, self._meta, self._mtime = await asyncio.to_thread(self._update_file, change)
+                self._loaded = True
+            except Exception as e:
+                logger.warning(f"Could not save itinerary index: {str(e)}")
+                # Keep the entry for this process at least
+                changed = change(self._vectors, self._meta)
+                if changed is not None:
+                    self._vectors, self._meta = changed
+
+    async def add(self, key: str, inputs: Dict[str, Any]) -> None:
+        """Index a freshly generated itinerary stored in the cache under ``key``"""
+        vector = feature_vector(inputs)
+
+        def change(vectors: np.ndarray, meta: List[Dict[str, Any]]) -> Optional[Entries]:
+            if any(entry["key"] == key for entry in meta):
+                return None
+            return np.vstack([vectors, vector[None, :]])[-self.max_entries:], (meta + [{
+                "key": key, "destination": inputs["destination"], "days": inputs["days"], "added": time.time(),
+            }])[-self.max_entries:]
+
+        await self._update(change)
+
+    async def remove(self, key: str) -> None:
+        def change(vectors: np.ndarray, meta: List[Dict[str, Any]]) -> Optional[Entries]:
+            keep = [i for i, entry in enumerate(meta) if entry["key"] != key]
+            if len(keep) == len(meta):
+                return None
+            return vectors[keep], [meta[i] for i in keep]
+
+        await self._update(change)
+
+    async def nearest(self, inputs: Dict[str, Any]) -> List[Tuple[float, Dict[str, Any]]]:
+        """(similarity, metadata) of indexed itineraries above the threshold, best first"""
+        await self._ensure_loaded()
+        self._stats["lookups"] += 1
+        rows = [
+            i for i, meta in enumerate(self._meta)
+            if meta["destination"] == inputs["destination"] and inputs["days"] <= meta["days"] <= inputs["days"] + 1
+        ]
+        if not rows:
+            return []
+        scores = self._vectors[rows] @ feature_vector(inputs)
+        ranked = sorted(zip(scores.tolist(), rows), reverse=True)[:MAX_CANDIDATES]
+        matches = [(round(score, 4), self._meta[i]) for score, i in ranked if score >= self.threshold]
+        self._stats["candidates"] += len(matches)
+        return matches
+
+    def record_lookup(self, elapsed_ms: float, reused: bool, llm_ms_saved: float = 0.0) -> None:
+        self._stats["lookup_ms_total"] += elapsed_ms
+        if reused:
+            self._stats["reused"] += 1
+            self._stats["llm_ms_saved"] += llm_ms_saved
+
+    def record_rejected(self) -> None:
+        self._stats["rejected"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._stats["lookups"]
+        return {
+            "entries": len(self._meta),
+            "threshold": self.threshold,
+            "lookups": lookups,
+            "candidates": self._stats["candidates"],
+            "reused": self._stats["reused"],
+            "rejected": self._stats["rejected"],
+            "reuse_rate": round(self._stats["reused"] / lookups, 3) if lookups else 0.0,
+            "avg_lookup_ms": round(self._stats["lookup_ms_total"] / lookups, 2) if lookups else 0.0,
+            "llm_seconds_saved": round(self._stats["llm_ms_saved"] / 1000, 1),
+        }
+
+
+# Global index instance (per process)
+itinerary_index = ItineraryIndex(
+    settings.chroma_persist_directory,
+    threshold=settings.llm_similarity_threshold,
+    max_entries=settings.llm_index_max_entries,
+)
@@ -0,0 +1,191 @@
+"""
+Itinerary Jobs - Background itinerary generation
+Requests are queued and answered with a job id; a bounded pool of workers
+runs the generation while clients poll the job (stored in the cache) or get
+notified over their chat WebSocket
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from uuid import uuid4
+
+from config import settings
+from services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+JOBS_NAMESPACE = "itinerary_jobs"
+# Wait/run samples kept for the p50/p95 figures
+TIMING_WINDOW = 200
+
+JobRunner = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class JobQueueFullError(Exception):
+    """Too many itinerary jobs are waiting; the job was refused"""
+
+
+def _percentile(samples: Deque[float], fraction: float) -> int:
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000)
+
+
+class ItineraryJobQueue:
+    """
+    In-process FIFO of generations with ``workers`` consumers.
+
+    Job records (``job:<id>``) and results (``result:<id>``) live in the cache
+    for ``result_ttl`` seconds, so any worker process on a shared backend can
+    answer polls; the generation itself runs in the process that accepted it.
+    Status goes queued -> running -> completed | failed.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 50, result_ttl: int = 3600):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.running = 0
+        self._waits: Deque[float] = deque(maxlen=TIMING_WINDOW)
+        self._runs: Deque[float] = deque(maxlen=TIMING_WINDOW)
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "peak_queue_depth": 0}
+
+    async def _save(self, job: Dict[str, Any]) -> None:
+        await cache_service.set(JOBS_NAMESPACE, f"job:{job['job_id']}", job, ttl=self.result_ttl)
+
+    async def submit(self, run: JobRunner, user_id: Optional[str] = None, summary: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Queue ``run`` and return its job record; raises JobQueueFullError when the queue is full"""
+        if not self._tasks:
+            self.start()
+        if self.max_queue and self._queue.qsize() >= self.max_queue:
+            self._counters["rejected"] += 1
+            raise JobQueueFullError(f"Itinerary queue is full: {self._queue.qsize()} jobs waiting")
+
+        job = {
+            "job_id": str(uuid4()),
+            "status": "queued",
+            "user_id": user_id,
+            **(summary or {}),
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+        await self._save(job)
+        self._queue.put_nowait((job, run, time.monotonic()))
+        self._counters["submitted"] += 1
+        self._counters["peak_queue_depth"] = max(self._counters["peak_queue_depth"], self._queue.qsize())
+        print(f"📥 ITINERARY JOB {job['job_id']} queued ({self._queue.qsize()} waiting)")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await cache_service.get(JOBS_NAMESPACE, f"job:{job_id}")
+
+    async def get_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await cache_service.get(JOBS_NAMESPACE, f"result:{job_id}")
+
+    async def _notify(self, job: Dict[str, Any]) -> None:
+        """Tell the job's user over the chat WebSocket, if they are connected to this process"""
+        if not job.get("user_id"):
+            return
+        from services.chat_collaboration_service import chat_service
+
+        try:
+            await chat_service.manager.send_to_user(job["user_id"], {
+                "type": "itinerary_job",
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "error": job["error"],
+                "timestamp": datetime.utcnow().isoformat(),
+            })
+        except Exception as e:
+            logger.warning(f"Could not notify user {job['user_id']} about job {job['job_id']}: {str(e)}")
+
+    async def _run(self, job: Dict[str, Any], run: JobRunner, queued_at: float) -> None:
+        started = time.monotonic()
+        self._waits.append(started - queued_at)
+        job.update(status="running", started_at=datetime.utcnow().isoformat(), wait_ms=round((started - queued_at) * 1000))
+        await self._save(job)
+        await self._notify(job)
+
+        self.running += 1
+        try:
+            result = await run()
+            await cache_service.set(JOBS_NAMESPACE, f"result:{job['job_id']}", result, ttl=self.result_ttl)
+            job["status"] = "completed"
+            self._counters["completed"] += 1
+        except asyncio.CancelledError:
+            job.update(status="failed", error="Server shut down before the itinerary was generated")
+            self._counters["failed"] += 1
+            raise
+        except Exception as e:
+            logger.error(f"Itinerary job {job['job_id']} failed: {str(e)}")
+            job.update(status="failed", error=str(e))
+            self._counters["failed"] += 1
+        finally:
+            self.running -= 1
+            elapsed = time.monotonic() - started
+            self._runs.append(elapsed)
+            job.update(finished_at=datetime.utcnow().isoformat(), run_ms=round(elapsed * 1000))
+            await self._save(job)
+            await self._notify(job)
+            print(f"📤 ITINERARY JOB {job['job_id']} {job['status']} in {elapsed:.1f}s")
+
+    async def _worker(self) -> None:
+        while True:
+            job, run, queued_at = await self._queue.get()
+            try:
+                await self._run(job, run, queued_at)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Itinerary job worker error: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def start(self) -> None:
+        """Start the worker pool (must run inside the event loop)"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Jobs never started would otherwise stay "queued" until they expire
+        while self._queue is not None and not self._queue.empty():
+            job, _, _ = self._queue.get_nowait()
+            job.update(status="failed", error="Server shut down before the itinerary was generated")
+            await self._save(job)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "wait_p50_ms": _percentile(self._waits, 0.5),
+            "wait_p95_ms": _percentile(self._waits, 0.95),
+            "run_p50_ms": _percentile(self._runs, 0.5),
+            "run_p95_ms": _percentile(self._runs, 0.95),
+            **self._counters,
+        }
+
+
+# Global job queue instance (per process)
+itinerary_jobs = ItineraryJobQueue(
+    workers=settings.itinerary_job_workers,
+    max_queue=settings.itinerary_job_max_queue,
+    result_ttl=settings.itinerary_job_ttl_seconds,
+)
@@ -1,6 +1,7 @@
 import asyncio
 from datetime import date, timedelta, datetime
-from typing import List, Dict, Any, Optional
+from types import SimpleNamespace
+from typing import AsyncIterator, List, Dict, Any, Optional
 from uuid import uuid4
 import logging
 from fastapi import HTTPException
@@ -8,6 +9,8 @@ from starlette.requests import Request
 from models import ItineraryResponse, DailyPlan
 from workflows.optimized_prefetch_workflow import OptimizedPrefetchWorkflow
 from services.cache_service import cache_service
+from services.itinerary_jobs import itinerary_jobs
+from services.llm_limiter import LLMBusyError
 from services.place_details_service import PlaceDetailsService
 from utils.currency_utils import (
     convert_currency_payload,
@@ -18,6 +21,29 @@ from prompts.itinerary_prompts import format_accommodation_type
 
 logger = logging.getLogger(__name__)
 
+# Request headers a background job still needs: the user agent for AI-usage
+# logging and the host the client called, for image proxy URLs
+_DETACHED_HEADERS = ("host", "x-forwarded-host", "x-forwarded-proto", "user-agent")
+
+
+class _DetachedRequest:
+    """What a background job keeps of the request that queued it: the user,
+    client, endpoint and origin that AI-usage logging and image proxying read.
+    It never reports a disconnect, since the job outlives the HTTP call."""
+
+    def __init__(self, request: Request):
+        self.state = SimpleNamespace(
+            user_id=getattr(request.state, "user_id", None),
+            user_email=getattr(request.state, "user_email", None),
+        )
+        self.url = SimpleNamespace(scheme=request.url.scheme, netloc=request.url.netloc, path=request.url.path)
+        self.base_url = str(request.base_url)
+        self.client = SimpleNamespace(host=request.client.host) if request.client else None
+        self.headers = {name: request.headers[name] for name in _DETACHED_HEADERS if name in request.headers}
+
+    async def is_disconnected(self) -> bool:
+        return False
+
 class ItineraryService:
     def __init__(self):
         # Initialize structured workflow
@@ -126,7 +152,10 @@ class ItineraryService:
             logger.error(f"Error generating itinerary: {str(e)}")
 
             # Check if it's a Google API error
-            if "500 An internal error has occurred" in str(e):
+            if isinstance(e, LLMBusyError):
+                print("⏱️  ERROR TYPE: LLM generation queue full")
+                raise Exception("AI service is currently busy. Please try again later.")
+            elif "500 An internal error has occurred" in str(e):
                 print("🔧 ERROR TYPE: Google API Internal Error")
                 raise Exception("AI service is temporarily unavailable. Please try again in a few minutes.")
             elif "API key" in str(e).lower() or "authentication" in str(e).lower():
@@ -188,6 +217,123 @@ class ItineraryService:
 
         return convert_currency_payload(response)
 
+    async def stream_itinerary(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: Optional[float] = None,
+        budget_range: Optional[str] = None,
+        interests: List[str] = [],
+        travelers: int = 1,
+        travel_companion: Optional[str] = None,
+        trip_pace: Optional[str] = None,
+        departure_city: Optional[str] = None,
+        flight_class_preference: Optional[str] = None,
+        hotel_rating_preference: Optional[str] = None,
+        accommodation_type: Optional[str] = None,
+        email: Optional[str] = None,
+        dietary_preferences: List[str] = [],
+        halal_preferences: Optional[str] = None,
+        vegetarian_preferences: Optional[str] = None,
+        request: Optional[Request] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of generate_itinerary: yields workflow progress events,
+        each day as it is generated, and finally the complete payload (in INR).
+        """
+
+        if not self.workflow:
+            logger.warning("Itinerary workflow not configured, streaming fallback itinerary")
+            fallback = await self._generate_fallback_itinerary(
+                destination, start_date, end_date, budget, interests, travelers, accommodation_type
+            )
+            itinerary = fallback.model_dump() if hasattr(fallback, "model_dump") else fallback
+            yield {"event": "complete", "data": convert_currency_payload({"itinerary": itinerary})}
+            return
+
+        print(f"\n🌊 ITINERARY SERVICE - Streaming generation for {destination} ({start_date} to {end_date})")
+        async for event in self.workflow.stream_complete_itinerary(
+            destination=destination,
+            start_date=start_date,
+            end_date=end_date,
+            budget=budget,
+            budget_range=budget_range,
+            interests=interests,
+            travelers=travelers,
+            travel_companion=travel_companion,
+            trip_pace=trip_pace,
+            departure_city=departure_city,
+            flight_class_preference=flight_class_preference,
+            hotel_rating_preference=hotel_rating_preference,
+            accommodation_type=accommodation_type,
+            email=email,
+            dietary_preferences=dietary_preferences,
+            halal_preferences=halal_preferences,
+            vegetarian_preferences=vegetarian_preferences,
+            request=request
+        ):
+            if event["event"] == "day":
+                convert_currency_strings(event["data"]["day"])
+            elif event["event"] == "complete":
+                convert_currency_payload(event["data"])
+            yield event
+
+    async def submit_itinerary_job(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: Optional[float] = None,
+        budget_range: Optional[str] = None,
+        interests: List[str] = [],
+        travelers: int = 1,
+        travel_companion: Optional[str] = None,
+        trip_pace: Optional[str] = None,
+        departure_city: Optional[str] = None,
+        flight_class_preference: Optional[str] = None,
+        hotel_rating_preference: Optional[str] = None,
+        accommodation_type: Optional[str] = None,
+        email: Optional[str] = None,
+        dietary_preferences: List[str] = [],
+        halal_preferences: Optional[str] = None,
+        vegetarian_preferences: Optional[str] = None,
+        request: Optional[Request] = None
+    ) -> Dict[str, Any]:
+        """
+        Job mode of generate_itinerary: queues the generation and returns the job
+        record at once. The result (same payload as generate_itinerary) is
+        fetched from itinerary_jobs when the job has completed.
+        """
+        job_request = _DetachedRequest(request) if request else None
+
+        async def run() -> Dict[str, Any]:
+            return await self.generate_itinerary(
+                destination=destination,
+                start_date=start_date,
+                end_date=end_date,
+                budget=budget,
+                budget_range=budget_range,
+                interests=interests,
+                travelers=travelers,
+                travel_companion=travel_companion,
+                trip_pace=trip_pace,
+                departure_city=departure_city,
+                flight_class_preference=flight_class_preference,
+                hotel_rating_preference=hotel_rating_preference,
+                accommodation_type=accommodation_type,
+                email=email,
+                dietary_preferences=dietary_preferences,
+                halal_preferences=halal_preferences,
+                vegetarian_preferences=vegetarian_preferences,
+                request=job_request
+            )
+
+        user_id = job_request.state.user_id if job_request else None
+        return await itinerary_jobs.submit(run, user_id=user_id, summary={
+            "destination": destination, "start_date": start_date, "end_date": end_date,
+        })
+
     async def generate_itinerary_structure(
         self,
         destination: str,
@@ -307,6 +453,31 @@ class ItineraryService:
 
         raise ValueError("No itinerary details token or place_ids provided")
 
+    async def stream_itinerary_details(
+        self,
+        place_ids: List[str],
+        request: Optional[Request] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of get_itinerary_details for place IDs: yields each
+        place's details (in INR) as soon as it is fetched, then a summary.
+        Stops fetching when the client disconnects.
+        """
+
+        fetched = 0
+        async for place_id, details in self.place_details_service.iter_place_details(place_ids):
+            if request and await request.is_disconnected():
+                logger.info("Client disconnected during place details streaming")
+                return
+            if not details:
+                continue
+            detail = details.model_dump() if hasattr(details, "model_dump") else details
+            convert_currency_strings(detail)
+            fetched += 1
+            yield {"event": "place_detail", "data": {"place_id": place_id, "details": detail}}
+
+        yield {"event": "complete", "data": {"requested": len(dict.fromkeys(place_ids)), "fetched": fetched}}
+
     async def _ensure_client_connected(self, request: Optional[Request]) -> None:
         if request and await request.is_disconnected():
             logger.info("Client disconnected during itinerary generation")
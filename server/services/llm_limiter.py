@@ -0,0 +1,102 @@
+"""
+LLM Limiter - Bound concurrent Gemini generations
+Caps in-flight itinerary generations per process and queues the rest, with
+queue-depth and wait-time metrics reported on /health
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Queue wait samples kept for the p50/p95 figures
+WAIT_WINDOW = 200
+
+
+class LLMBusyError(Exception):
+    """Too many generations are queued; the request was refused"""
+
+
+class LLMLimiter:
+    """
+    Semaphore with a bounded wait queue.
+
+    At most ``max_concurrent`` generations run at once; further callers wait
+    in FIFO order. A caller is refused with LLMBusyError when ``max_queue``
+    callers are already waiting (0 = unbounded) or when it has waited longer
+    than ``queue_timeout`` seconds (0 = forever).
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 20, queue_timeout: float = 60.0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.in_flight = 0
+        self.queued = 0
+        self._waits: Deque[float] = deque(maxlen=WAIT_WINDOW)
+        self._counters = {"admitted": 0, "rejected": 0, "timed_out": 0, "peak_queue_depth": 0, "peak_in_flight": 0}
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one generation slot for the duration of the block"""
+        started = time.monotonic()
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+        else:
+            if self.max_queue and self.queued >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise LLMBusyError(f"AI service is busy: {self.queued} generations already queued")
+            self.queued += 1
+            self._counters["peak_queue_depth"] = max(self._counters["peak_queue_depth"], self.queued)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout or None)
+            except asyncio.TimeoutError:
+                self._counters["timed_out"] += 1
+                raise LLMBusyError(f"AI service is busy: no generation slot within {self.queue_timeout:.0f}s")
+            finally:
+                self.queued -= 1
+
+        waited = time.monotonic() - started
+        self._waits.append(waited)
+        if waited > 1:
+            logger.info(f"⏳ LLM generation waited {waited:.1f}s for a slot")
+        self.in_flight += 1
+        self._counters["admitted"] += 1
+        self._counters["peak_in_flight"] = max(self._counters["peak_in_flight"], self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def _wait_percentile(self, fraction: float) -> int:
+        if not self._waits:
+            return 0
+        ordered = sorted(self._waits)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "max_queue": self.max_queue,
+            "wait_p50_ms": self._wait_percentile(0.5),
+            "wait_p95_ms": self._wait_percentile(0.95),
+            **self._counters,
+        }
+
+
+# Global limiter instance (per process)
+llm_limiter = LLMLimiter(
+    max_concurrent=settings.llm_max_concurrency,
+    max_queue=settings.llm_max_queue,
+    queue_timeout=settings.llm_queue_timeout_seconds,
+)
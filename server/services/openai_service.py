@@ -8,10 +8,11 @@ import logging
 import os
 import time
 from typing import Dict, Any, Optional, List
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, BadRequestError
 from config import settings
 from fastapi import Request
 from services.ai_tracking_service import ai_tracking_service
+from services.circuit_breaker import get_breaker
 from mongo_models import AIProvider, AITaskType
 import json
 
@@ -24,6 +25,9 @@ class OpenAIService:
         self.client: Optional[AsyncOpenAI] = None
         self.model = "gpt-4-turbo-preview"  # Latest GPT-4 model
         self.vision_model = "gpt-4-vision-preview"  # For image analysis
+        # The SDK already retries transient errors, so the breaker only trips and fails fast;
+        # rejected prompts say nothing about OpenAI's health
+        self.breaker = get_breaker("openai", max_retries=0, ignore=(BadRequestError,))
         
     async def initialize(self):
         """Initialize OpenAI client"""
@@ -114,7 +118,7 @@ Provide detailed, personalized, and actionable travel advice. Be enthusiastic bu
             full_prompt = "\n".join([msg["content"] for msg in messages])
             
             # Make API call
-            response = await self.client.chat.completions.create(
+            response = await self.breaker.call(lambda: self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=temperature,
@@ -122,7 +126,7 @@ Provide detailed, personalized, and actionable travel advice. Be enthusiastic bu
                 top_p=0.9,
                 frequency_penalty=0.1,
                 presence_penalty=0.1
-            )
+            ))
             
             response_text = response.choices[0].message.content
             response_time_ms = (time.time() - start_time) * 1000
@@ -331,7 +335,7 @@ Make sure to:
                 return "Image analysis service is not available."
         
         try:
-            response = await self.client.chat.completions.create(
+            response = await self.breaker.call(lambda: self.client.chat.completions.create(
                 model=self.vision_model,
                 messages=[
                     {
@@ -346,7 +350,7 @@ Make sure to:
                     }
                 ],
                 max_tokens=1000
-            )
+            ))
             
             return response.choices[0].message.content
             
@@ -3,14 +3,18 @@ Service for fetching detailed place information including images, reviews, coord
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from models import PlaceDetails, PlaceImage, PlaceReview, PlaceLocation
 from tools.places_search_tool import PlacesSearchTool
 import asyncio
-import serpapi
+from services.place_store import DETAILS_FIELD, place_store
+from services.serp_client import serp_client
 
 logger = logging.getLogger(__name__)
 
+# SerpApi detail calls in flight at once for one batch
+DETAILS_CONCURRENCY = 5
+
 class PlaceDetailsService:
     """Service to provide detailed information about places"""
     
@@ -32,32 +36,88 @@ class PlaceDetailsService:
         print(f"\n🔍 PLACE DETAILS SERVICE - Fetching details for {len(place_ids)} places")
         print("-" * 60)
         
-        place_details = []
+        fetched: Dict[str, PlaceDetails] = {}
+        async for place_id, details in self.iter_place_details(place_ids):
+            if details:
+                fetched[place_id] = details
         
-        for place_id in place_ids:
-            try:
-                print(f"   📍 Processing place ID: {place_id}")
-                
-                # Determine place type from ID
-                place_type = self._extract_place_type(place_id)
-                print(f"      🏷️  Type: {place_type}")
-                
-                # Get detailed information based on type
-                details = await self._fetch_place_details(place_id, place_type)
-                
-                if details:
-                    place_details.append(details)
-                    print(f"      ✅ Details fetched successfully")
-                else:
-                    print(f"      ⚠️  No details found for {place_id}")
-                    
-            except Exception as e:
-                print(f"      ❌ Error fetching details for {place_id}: {str(e)}")
-                logger.error(f"Error fetching place details for {place_id}: {str(e)}")
+        # Keep the caller's order (duplicates collapsed)
+        place_details = [fetched[place_id] for place_id in dict.fromkeys(place_ids) if place_id in fetched]
         
         print(f"\n📊 TOTAL PLACE DETAILS FETCHED: {len(place_details)}")
         return place_details
     
+    async def iter_place_details(
+        self,
+        place_ids: List[str],
+        concurrency: int = DETAILS_CONCURRENCY
+    ) -> AsyncIterator[Tuple[str, Optional[PlaceDetails]]]:
+        """
+        Yield (place_id, details) as each place completes, in completion order
+        
+        All place records are read in one multi-get first; recently fetched
+        details are yielded straight away and the rest are fetched with at most
+        ``concurrency`` SerpApi calls in flight. A failing place yields None
+        without affecting the others. Stopping the iteration cancels the
+        fetches still pending.
+        
+        Args:
+            place_ids: List of place IDs to get details for
+            concurrency: Maximum concurrent detail fetches
+        """
+        unique_ids = list(dict.fromkeys(place_id for place_id in place_ids if place_id))
+        records = await place_store.get_many(unique_ids)
+        
+        pending_ids = []
+        for place_id in unique_ids:
+            record = records.get(place_id)
+            if record and not place_store.stale_fields(record, [DETAILS_FIELD]):
+                print(f"   💾 {place_id}: details served from place store")
+                try:
+                    details = self._convert_serp_to_place_details(record["fields"], place_id)
+                except Exception as e:
+                    logger.error(f"Error converting stored place details for {place_id}: {str(e)}")
+                    details = None
+                yield place_id, details
+            else:
+                pending_ids.append(place_id)
+        
+        if not pending_ids:
+            return
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch_one(place_id: str) -> Tuple[str, Optional[PlaceDetails]]:
+            async with semaphore:
+                return place_id, await self._get_one_place_details(place_id, records.get(place_id))
+        
+        tasks = [asyncio.ensure_future(fetch_one(place_id)) for place_id in pending_ids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    async def _get_one_place_details(self, place_id: str, record: Optional[Dict[str, Any]]) -> Optional[PlaceDetails]:
+        """Fetch one place; errors are logged and reported as None"""
+        try:
+            place_type = self._extract_place_type(place_id)
+            print(f"   📍 Processing place ID: {place_id} (type: {place_type})")
+            
+            details = await self._fetch_place_details(place_id, place_type, record)
+            
+            if details:
+                print(f"      ✅ Details fetched successfully for {place_id}")
+            else:
+                print(f"      ⚠️  No details found for {place_id}")
+            return details
+        
+        except Exception as e:
+            print(f"      ❌ Error fetching details for {place_id}: {str(e)}")
+            logger.error(f"Error fetching place details for {place_id}: {str(e)}")
+            return None
+    
     def _extract_place_type(self, place_id: str) -> str:
         """Extract place type from place ID"""
         if place_id.startswith('hotel_'):
@@ -71,8 +131,17 @@ class PlaceDetailsService:
         else:
             return 'unknown'
     
-    async def _fetch_place_details(self, place_id: str, place_type: str) -> Optional[PlaceDetails]:
-        """Fetch detailed information for a specific place using SERP API"""
+    async def _fetch_place_details(
+        self,
+        place_id: str,
+        place_type: str,
+        record: Optional[Dict[str, Any]] = None
+    ) -> Optional[PlaceDetails]:
+        """Fetch detailed information for a specific place using SERP API
+        
+        ``record`` is the place's place-store record, if any, used when the
+        SERP details call yields nothing.
+        """
         
         if not self.places_tool.api_key:
             print(f"      ⚠️  SERP API key not available - returning mock data for {place_id}")
@@ -96,7 +165,12 @@ class PlaceDetailsService:
             
             if place_data:
                 print(f"      ✅ Real SERP data retrieved for {place_id}")
+                await place_store.upsert_many([{**place_data, "place_id": place_id}], details=True)
                 return self._convert_serp_to_place_details(place_data, place_id)
+            elif record:
+                # Details unavailable: fall back to what searches already stored
+                print(f"      💾 Using search data from place store for {place_id}")
+                return self._convert_serp_to_place_details(record["fields"], place_id)
             else:
                 print(f"      ⚠️  No SERP data found - using mock data for {place_id}")
                 # Fallback to mock data
@@ -118,13 +192,11 @@ class PlaceDetailsService:
             # First try to get by place_id if it looks like a Google place_id
             if len(place_id) > 20 and not place_id.startswith(('hotel_', 'restaurant_', 'cafe_', 'attraction_')):
                 # This looks like a real Google place_id
-                search = serpapi.GoogleSearch({
+                results = await serp_client.search({
                     "engine": "google_maps",
                     "place_id": place_id,
                     "api_key": self.places_tool.api_key
                 })
-                
-                results = search.get_dict()
                 return results.get('place_results', {})
             
             else:
@@ -139,12 +211,15 @@ class PlaceDetailsService:
     def _convert_serp_to_place_details(self, serp_data: Dict[str, Any], place_id: str) -> PlaceDetails:
         """Convert SERP API response to PlaceDetails format"""
         
-        # Extract basic information
-        name = serp_data.get('title', 'Unknown Place')
+        # Extract basic information (search results stored in the place store use "name")
+        name = serp_data.get('title') or serp_data.get('name') or 'Unknown Place'
         description = serp_data.get('description', serp_data.get('about', {}).get('summary', ''))
         
         # Extract location information
-        location_data = serp_data.get('gps_coordinates', {})
+        location_data = serp_data.get('gps_coordinates') or {
+            'latitude': (serp_data.get('coordinates') or {}).get('lat') or 0.0,
+            'longitude': (serp_data.get('coordinates') or {}).get('lng') or 0.0,
+        }
         address = serp_data.get('address', '')
         
         location = PlaceLocation(
@@ -166,6 +241,9 @@ class PlaceDetailsService:
         # Extract reviews
         reviews = []
         review_data = serp_data.get('reviews', [])
+        if not isinstance(review_data, list):
+            # Search results only carry the review count
+            review_data = []
         for review in review_data[:5]:  # Limit to 5 reviews
             reviews.append(PlaceReview(
                 rating=float(review.get('rating', 0)),
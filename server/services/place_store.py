@@ -0,0 +1,197 @@
+"""
+Place Store - One cached record per Google place
+Search results keep only ordered place ids plus their query-specific fields;
+the shared place facts are stored once, keyed by place_id/data_id, and joined
+back in on read. Place details reuse the same records.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+PLACES_NAMESPACE = "places"
+# Records outlive every SERP list that can reference them (longest hard TTL is 72h)
+PLACE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Facts about the place itself, identical whichever query found it. Everything
+# else in a search result (category, description, price_range, ...) depends on
+# the query and stays with the list entry.
+SHARED_FIELDS = frozenset({
+    "place_id", "data_id", "title", "name", "rating", "reviews", "address",
+    "phone", "website", "hours", "operating_hours", "open_state", "gps_coordinates",
+    "coordinates", "thumbnail", "serpapi_thumbnail", "photos", "types", "extensions", "price",
+})
+
+# Per-field freshness in seconds; fields not listed change rarely
+DEFAULT_FIELD_MAX_AGE = 30 * 24 * 60 * 60
+FIELD_MAX_AGE = {
+    "rating": 24 * 60 * 60,
+    "reviews": 24 * 60 * 60,
+    "hours": 24 * 60 * 60,
+    "operating_hours": 24 * 60 * 60,
+    "open_state": 60 * 60,
+    "price": 7 * 24 * 60 * 60,
+    # Pseudo-field: when the full google_maps place details were last fetched
+    "details": 3 * 24 * 60 * 60,
+}
+DETAILS_FIELD = "details"
+
+# Share of a list's place records that may be evicted before the list is
+# treated as a miss; below it the surviving places are served as they are
+MAX_MISSING_SHARE = 0.25
+
+# Markers of a dehydrated SERP list
+_PLACES = "__places__"
+_ID = "__id__"
+_FIELDS = "__fields__"
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+class PlaceStore:
+    """
+    Place records are ``{"fields": {...}, "updated": {field: epoch seconds}}``.
+
+    A newer non-empty value always replaces the stored one; an empty value
+    never overwrites a known one, so a sparse search result cannot erase a
+    phone number that place details filled in.
+    """
+
+    def __init__(self, ttl: int = PLACE_TTL_SECONDS):
+        self.ttl = ttl
+        self._stats = {"upserts": 0, "deduplicated": 0, "hydrated": 0, "partial_hydrates": 0, "hydrate_misses": 0}
+
+    @staticmethod
+    def place_key(place: Dict[str, Any]) -> Optional[str]:
+        """Store key for a place: its Google place_id, else its data_id"""
+        for field in ("place_id", "data_id"):
+            value = place.get(field)
+            if isinstance(value, str) and value:
+                return value
+        return None
+
+    @staticmethod
+    def stale_fields(record: Optional[Dict[str, Any]], fields: Iterable[str]) -> List[str]:
+        """The ``fields`` of ``record`` that are missing or past their max age"""
+        now = time.time()
+        updated = (record or {}).get("updated", {})
+        return [
+            field for field in fields
+            if now - updated.get(field, 0) > FIELD_MAX_AGE.get(field, DEFAULT_FIELD_MAX_AGE)
+        ]
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Records for ``keys`` in one multi-get; missing keys are left out"""
+        unique = list(dict.fromkeys(key for key in keys if key))
+        if not unique:
+            return {}
+        records = await cache_service.mget(PLACES_NAMESPACE, unique)
+        return {key: record for key, record in zip(unique, records) if record is not None}
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return (await self.get_many([key])).get(key)
+
+    async def upsert_many(self, places: List[Dict[str, Any]], details: bool = False) -> int:
+        """Merge places into their records.
+
+        Search results contribute only SHARED_FIELDS; ``details`` marks full
+        place-details payloads, which are stored whole.
+        """
+        incoming: Dict[str, Dict[str, Any]] = {}
+        for place in places:
+            key = self.place_key(place) if isinstance(place, dict) else None
+            if key:
+                fields = incoming.setdefault(key, {})
+                fields.update(
+                    (field, value) for field, value in place.items()
+                    if not _is_empty(value) and (details or field in SHARED_FIELDS)
+                )
+        if not incoming:
+            return 0
+
+        existing = await self.get_many(list(incoming))
+        now = time.time()
+        records = {}
+        for key, fields in incoming.items():
+            record = existing.get(key) or {"fields": {}, "updated": {}}
+            if key in existing:
+                self._stats["deduplicated"] += 1
+            merged = {**record["fields"], **fields}
+            updated = {**record["updated"], **{field: now for field in fields}}
+            if details:
+                updated[DETAILS_FIELD] = now
+            records[key] = {"fields": merged, "updated": updated}
+
+        try:
+            await cache_service.mset(PLACES_NAMESPACE, records, ttl=self.ttl)
+        except Exception as e:
+            logger.warning(f"Place store write failed: {str(e)}")
+            return 0
+        self._stats["upserts"] += len(records)
+        return len(records)
+
+    async def dehydrate(self, value: Any) -> Any:
+        """Store the places of a SERP list and return the list as ids plus query-specific fields.
+
+        Non-list values and places without an id are returned unchanged.
+        """
+        if not isinstance(value, list):
+            return value
+        keyed = [place for place in value if isinstance(place, dict) and self.place_key(place)]
+        if keyed and not await self.upsert_many(keyed):
+            return value
+
+        entries = []
+        for place in value:
+            key = self.place_key(place) if isinstance(place, dict) else None
+            if not key:
+                entries.append(place)
+                continue
+            shared = sorted(field for field, item in place.items() if field in SHARED_FIELDS and not _is_empty(item))
+            entry = {field: item for field, item in place.items() if field not in shared}
+            entry[_ID], entry[_FIELDS] = key, shared
+            entries.append(entry)
+        return {_PLACES: entries}
+
+    async def hydrate(self, value: Any) -> Optional[Any]:
+        """Join a dehydrated list back to full places.
+
+        Places whose record has been evicted are left out; None if more than
+        MAX_MISSING_SHARE of them are gone.
+        """
+        if not isinstance(value, dict) or _PLACES not in value:
+            return value
+        entries = value[_PLACES]
+        keys = [entry[_ID] for entry in entries if isinstance(entry, dict) and _ID in entry]
+        records = await self.get_many(keys)
+        missing = sum(1 for key in keys if key not in records)
+        if missing > len(keys) * MAX_MISSING_SHARE:
+            self._stats["hydrate_misses"] += 1
+            return None
+
+        places = []
+        for entry in entries:
+            if not isinstance(entry, dict) or _ID not in entry:
+                places.append(dict(entry) if isinstance(entry, dict) else entry)
+                continue
+            record = records.get(entry[_ID])
+            if record is None:
+                continue
+            place = {field: record["fields"][field] for field in entry[_FIELDS] if field in record["fields"]}
+            place.update((field, item) for field, item in entry.items() if field not in (_ID, _FIELDS))
+            places.append(place)
+        self._stats["partial_hydrates" if missing else "hydrated"] += 1
+        return places
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats)
+
+
+# Global place store instance
+place_store = PlaceStore()
@@ -1,26 +1,81 @@
 """
 SERP Cache Service - In-memory caching
-Caches SERP API responses using in-memory storage
+Caches SERP API responses in memory, written through to a durable MongoDB store.
+Place lists are cached as place ids joined against the shared place store.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Any, Iterator, Optional, List
+from config import settings
 from services.cache_service import cache_service
+from services.place_store import place_store
+from services.serp_client import serp_client
+from services.serp_quota import SerpQuotaExceeded, serp_quota
+from services.serp_response_store import SerpResponseStore, serp_document_id
+from utils.location_utils import canonicalize_location
 
 logger = logging.getLogger(__name__)
 
+# (soft, hard) TTLs in seconds per SERP endpoint. Past the soft TTL the entry
+# is still served while one background call refreshes it; past the hard TTL
+# it is gone and the next caller waits for SerpApi.
+DEFAULT_TTL_POLICY = (60 * 60, 24 * 60 * 60)
+SERP_TTL_POLICIES = {
+    "search_hotels": (6 * 60 * 60, 48 * 60 * 60),
+    "search_restaurants": (6 * 60 * 60, 48 * 60 * 60),
+    "search_cafes": (6 * 60 * 60, 48 * 60 * 60),
+    "search_attractions": (12 * 60 * 60, 72 * 60 * 60),
+    "raw_search": DEFAULT_TTL_POLICY,
+}
+
+# How many pre-normalization keys to remember when estimating the hits that
+# only happened because of key canonicalization (a shadow of the cache that
+# would exist without it)
+RAW_KEYS_TRACKED = 10000
+
+# Whether SERP lookups in the current request/task wait for stale entries to
+# be reloaded instead of being served them. Set with serp_refresh_scope().
+serp_refresh: ContextVar[bool] = ContextVar("serp_refresh", default=False)
+
+
+@contextmanager
+def serp_refresh_scope() -> Iterator[None]:
+    """Make SERP lookups in this block (and tasks created in it) await stale-entry reloads"""
+    token = serp_refresh.set(True)
+    try:
+        yield
+    finally:
+        serp_refresh.reset(token)
+
 class SerpCacheService:
     """In-memory SERP cache service"""
     
     def __init__(self, cache_duration_minutes: int = 60):
         """Initialize the cache service"""
         self.cache_duration_seconds = cache_duration_minutes * 60
+        self.ttl_policies = dict(SERP_TTL_POLICIES)
+        self.store = SerpResponseStore(enabled=settings.serp_store_enabled)
+        self._store_restores = 0
+        self._warm_started = 0
+        self._warm_task: Optional[asyncio.Task] = None
+        self._lookups = 0
+        self._hits = 0
+        self._stale_hits = 0
+        self._normalized_hits = 0
+        # raw key -> monotonic time its shadow entry would expire
+        self._raw_keys_seen: "OrderedDict[str, float]" = OrderedDict()
         print(f"💾 SERP CACHE SERVICE - Initialized with in-memory cache (cache for {cache_duration_minutes} minutes)")
     
     async def get_cached_response(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
         """Get cached response if available and valid"""
         try:
-            cached_data = await cache_service.get("serp_cache", endpoint, params)
+            cached_data = await place_store.hydrate(await cache_service.get("serp_cache", endpoint, params))
             if cached_data is not None:
                 print(f"💾 CACHE HIT: {endpoint} (saved SERP API call)")
                 return cached_data
@@ -48,16 +103,136 @@ class SerpCacheService:
         except Exception as e:
             logger.error(f"Error caching response: {str(e)}")
     
+    async def get_or_fetch(
+        self,
+        endpoint: str,
+        params: Dict[str, Any],
+        fetch: Callable[[], Awaitable[Any]],
+        raw_params: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Return the cached response, or call ``fetch`` once for all concurrent misses.
+
+        Entries past their soft TTL are served stale while one background
+        ``fetch`` refreshes them (inside serp_refresh_scope the caller waits
+        for that ``fetch`` instead). ``params`` should be canonical (see
+        CachedPlacesSearchTool); ``raw_params`` are the caller's original
+        params, used only to measure what canonicalization saves.
+
+        Place lists are cached dehydrated (see place_store). A list that lost
+        a few place records is served without them; one that lost most is
+        rebuilt from the durable store, and only reloaded if that has none.
+        """
+        soft_ttl, hard_ttl = self.ttl_policies.get(endpoint, DEFAULT_TTL_POLICY)
+        self.store.record_hit(endpoint, params)
+        
+        cached, fresh = await cache_service.get_entry("serp_cache", endpoint, params)
+        self._record_lookup(endpoint, params, raw_params or params, "fresh" if fresh else "stale" if cached is not None else "miss", hard_ttl)
+        if fresh:
+            result = await place_store.hydrate(cached)
+            if result is not None:
+                return result
+        
+        async def load() -> Any:
+            durable = await self.store.get(endpoint, params)
+            if durable is not None and durable["fresh_until"] > datetime.utcnow():
+                self._store_restores += 1
+                print(f"🗄️ STORE HIT: {endpoint} (restored from MongoDB, saved SERP API call)")
+                return await place_store.dehydrate(durable["value"])
+            print(f"💸 CACHE MISS: {endpoint} (will call SERP API)")
+            try:
+                result = await fetch()
+            except Exception as e:
+                if durable is None:
+                    raise
+                logger.warning(f"SERP API call failed for {endpoint}, serving stored response: {str(e)}")
+                return await place_store.dehydrate(durable["value"])
+            if result:
+                await self.store.put(endpoint, params, result, soft_ttl, hard_ttl)
+            print(f"💾 CACHED: {endpoint} (future calls will be instant)")
+            return await place_store.dehydrate(result)
+        
+        result = await place_store.hydrate(await cache_service.get_or_load(
+            "serp_cache", endpoint, load, ttl=hard_ttl, params=params, fresh_ttl=soft_ttl,
+            refresh=serp_refresh.get()
+        ))
+        if result is None:
+            durable = await self.store.get(endpoint, params)
+            if durable is not None:
+                # Re-storing the places repairs the cached list for later readers too
+                result = await place_store.hydrate(await place_store.dehydrate(durable["value"]))
+            if result is not None:
+                self._store_restores += 1
+                print(f"🗄️ STORE HIT: {endpoint} (place records restored from MongoDB)")
+                return result
+            await cache_service.delete("serp_cache", endpoint, params)
+            result = await place_store.hydrate(await cache_service.get_or_load(
+                "serp_cache", endpoint, load, ttl=hard_ttl, params=params, fresh_ttl=soft_ttl
+            ))
+        return result
+    
+    def _record_lookup(
+        self, endpoint: str, params: Dict[str, Any], raw_params: Dict[str, Any], state: str, ttl: int
+    ) -> None:
+        """Count a lookup by its cache state ("fresh", "stale" or "miss").
+
+        A fresh hit is owed to canonicalization only if the raw params differ
+        from the canonical ones and a cache keyed by raw params would have
+        missed: no lookup with the same raw params within the entry's TTL.
+        """
+        canonical_key = serp_document_id(endpoint, params)
+        raw_key = serp_document_id(endpoint, raw_params)
+        now = time.monotonic()
+        raw_would_hit = raw_key == canonical_key or self._raw_keys_seen.get(raw_key, 0) > now
+        if raw_key != canonical_key and not raw_would_hit:
+            # A cache keyed by raw params would have stored this lookup's result
+            self._raw_keys_seen[raw_key] = now + ttl
+            self._raw_keys_seen.move_to_end(raw_key)
+            if len(self._raw_keys_seen) > RAW_KEYS_TRACKED:
+                self._raw_keys_seen.popitem(last=False)
+        
+        self._lookups += 1
+        if state == "fresh":
+            self._hits += 1
+            if not raw_would_hit:
+                self._normalized_hits += 1
+        elif state == "stale":
+            self._stale_hits += 1
+    
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         try:
             stats = await cache_service.get_cache_stats()
+            serp_stats = stats.get("namespaces", {}).get("serp_cache", {})
+            lookups = self._lookups
+            hit_ratio = self._hits / lookups if lookups else 0.0
+            raw_hit_ratio = (self._hits - self._normalized_hits) / lookups if lookups else 0.0
             return {
                 "type": "In-Memory Cache",
                 "status": stats.get("status", "active"),
                 "total_safarbot_keys": stats.get("safarbot_keys", 0),
                 "memory_used": stats.get("memory_used", "0B"),
-                "cache_duration_minutes": self.cache_duration_seconds // 60
+                "cache_duration_minutes": self.cache_duration_seconds // 60,
+                "serp_api_calls": serp_stats.get("loads", 0),
+                "coalesced_calls": serp_stats.get("coalesced", 0),
+                "stale_served": serp_stats.get("stale_served", 0),
+                "lookups": lookups,
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "normalized_hits": self._normalized_hits,
+                "hit_ratio": round(hit_ratio, 4),
+                "hit_ratio_without_normalization": round(raw_hit_ratio, 4),
+                "hit_ratio_gain": round(hit_ratio - raw_hit_ratio, 4),
+                "quota": await serp_quota.stats(),
+                "place_store": place_store.stats(),
+                "durable_store": {
+                    "enabled": self.store.enabled,
+                    "restored": self._store_restores,
+                    "warm_started": self._warm_started,
+                },
+                "ttl_policies": {
+                    endpoint: {"soft_seconds": soft, "hard_seconds": hard}
+                    for endpoint, (soft, hard) in self.ttl_policies.items()
+                },
             }
         except Exception as e:
             logger.error(f"Error getting cache stats: {str(e)}")
@@ -75,6 +250,50 @@ class SerpCacheService:
         except Exception as e:
             logger.error(f"Error clearing cache: {str(e)}")
 
+    async def warm_start(self, limit: Optional[int] = None) -> int:
+        """Preload the most-hit durable responses so a fresh process starts warm"""
+        limit = settings.serp_warm_start_keys if limit is None else limit
+        try:
+            if not await self.store.ensure_indexes():
+                return 0
+            documents = await self.store.most_hit(limit)
+        except Exception as e:
+            logger.error(f"SERP cache warm start failed: {str(e)}")
+            return 0
+        
+        now = datetime.utcnow()
+        loaded = 0
+        for doc in documents:
+            ttl = int((doc["expires_at"] - now).total_seconds())
+            if ttl <= 0:
+                continue
+            # Keep the stored soft deadline so old entries still refresh on first use
+            if await cache_service.set(
+                "serp_cache", doc["endpoint"], await place_store.dehydrate(doc["value"]), ttl=ttl, params=doc["params"],
+                fresh_ttl=(doc["fresh_until"] - now).total_seconds()
+            ):
+                loaded += 1
+        self._warm_started += loaded
+        print(f"🔥 SERP CACHE WARM START: {loaded} responses preloaded from MongoDB")
+        return loaded
+    
+    def start(self) -> None:
+        """Start the warm-start preload and hit-counter flush in the background"""
+        self.store.start()
+        if self.store.enabled and (self._warm_task is None or self._warm_task.done()):
+            self._warm_task = asyncio.create_task(self.warm_start())
+    
+    async def stop(self) -> None:
+        """Stop background work and flush buffered hit counts"""
+        task, self._warm_task = self._warm_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.store.stop()
+
 # Global cache instance
 serp_cache = SerpCacheService()
 
@@ -88,127 +307,153 @@ class CachedPlacesSearchTool:
         self.cache = serp_cache
         print("🚀 CACHED PLACES SEARCH TOOL - Initialized with in-memory caching")
     
+    # Cache keys hold only what changes the upstream query, in canonical form:
+    # "Goa, India" and "goa,  india" share one entry (a location without a
+    # country keeps none, rather than a guessed one), and max_results/rating_min
+    # are left out because PlacesSearchTool returns every raw result regardless.
+    @staticmethod
+    def _location_key(location: str) -> str:
+        return canonicalize_location(location)
+    
+    @staticmethod
+    def _text_key(text: Optional[str]) -> Optional[str]:
+        return " ".join(text.split()).casefold() if text else None
+    
+    def _uses_fallback(self) -> bool:
+        """Without a SERP key the tool returns sized fallback data; don't cache it"""
+        return not self.original_tool.api_key
+    
+    async def _get_or_fallback(
+        self,
+        endpoint: str,
+        cache_params: Dict[str, Any],
+        fetch: Callable[[], Awaitable[Any]],
+        raw_params: Dict[str, Any],
+        fallback: Callable[[], List[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """Cached (even stale or stored) results if any, else uncached fallback data on errors or quota refusals"""
+        try:
+            return await self.cache.get_or_fetch(endpoint, cache_params, fetch, raw_params)
+        except SerpQuotaExceeded as e:
+            print(f"⛽ SERP QUOTA: {e} - using fallback data for {endpoint}")
+        except Exception as e:
+            logger.error(f"Error in cached {endpoint}: {str(e)}")
+        return fallback()
+    
     async def search_hotels_cached(self, location: str, check_in: str = None, check_out: str = None,
                                   rating_min: float = 3.5, max_results: int = 5) -> List[Dict[str, Any]]:
         """Search for hotels with caching"""
+        if self._uses_fallback():
+            return await self.original_tool.search_hotels(location, check_in, check_out, rating_min, max_results)
         
         # Create cache parameters
         cache_params = {
-            "location": location,
+            "location": self._location_key(location),
             "check_in": check_in,
-            "check_out": check_out,
-            "rating_min": rating_min,
-            "max_results": max_results
+            "check_out": check_out
         }
+        raw_params = {**cache_params, "location": location, "rating_min": rating_min, "max_results": max_results}
         
-        # Check cache first
-        cached_result = await self.cache.get_cached_response("search_hotels", cache_params)
-        if cached_result is not None:
-            return cached_result
-        
-        # Call original API
-        print(f"🌐 SERP API CALL: hotels in {location}")
-        result = await self.original_tool.search_hotels(location, check_in, check_out, rating_min, max_results)
-        
-        # Cache the result
-        await self.cache.cache_response("search_hotels", cache_params, result)
+        async def fetch() -> List[Dict[str, Any]]:
+            print(f"🌐 SERP API CALL: hotels in {location}")
+            return await self.original_tool.search_hotels(
+                location, check_in, check_out, rating_min, max_results, fallback_on_error=False
+            )
         
-        return result
+        return await self._get_or_fallback(
+            "search_hotels", cache_params, fetch, raw_params,
+            lambda: self.original_tool._get_fallback_hotels(location, max_results)
+        )
     
     async def search_restaurants_cached(self, location: str, cuisine_type: str = None,
                                        rating_min: float = 4.0, max_results: int = 8) -> List[Dict[str, Any]]:
         """Search for restaurants with caching"""
+        if self._uses_fallback():
+            return await self.original_tool.search_restaurants(location, cuisine_type, rating_min, max_results)
         
         cache_params = {
-            "location": location,
-            "cuisine_type": cuisine_type,
-            "rating_min": rating_min,
-            "max_results": max_results
+            "location": self._location_key(location),
+            "cuisine_type": self._text_key(cuisine_type)
+        }
+        raw_params = {
+            "location": location, "cuisine_type": cuisine_type, "rating_min": rating_min, "max_results": max_results
         }
         
-        cached_result = await self.cache.get_cached_response("search_restaurants", cache_params)
-        if cached_result is not None:
-            return cached_result
-        
-        print(f"🌐 SERP API CALL: restaurants in {location}")
-        result = await self.original_tool.search_restaurants(location, cuisine_type, rating_min, max_results)
+        async def fetch() -> List[Dict[str, Any]]:
+            print(f"🌐 SERP API CALL: restaurants in {location}")
+            return await self.original_tool.search_restaurants(
+                location, cuisine_type, rating_min, max_results, fallback_on_error=False
+            )
         
-        await self.cache.cache_response("search_restaurants", cache_params, result)
-        return result
+        return await self._get_or_fallback(
+            "search_restaurants", cache_params, fetch, raw_params,
+            lambda: self.original_tool._get_fallback_restaurants(location, cuisine_type, max_results)
+        )
     
     async def search_cafes_cached(self, location: str, max_results: int = 5) -> List[Dict[str, Any]]:
         """Search for cafes with caching"""
+        if self._uses_fallback():
+            return await self.original_tool.search_cafes(location, max_results=max_results)
         
         cache_params = {
-            "location": location,
-            "max_results": max_results
+            "location": self._location_key(location)
         }
+        raw_params = {"location": location, "max_results": max_results}
         
-        cached_result = await self.cache.get_cached_response("search_cafes", cache_params)
-        if cached_result is not None:
-            return cached_result
-        
-        print(f"🌐 SERP API CALL: cafes in {location}")
-        result = await self.original_tool.search_cafes(location, max_results)
+        async def fetch() -> List[Dict[str, Any]]:
+            print(f"🌐 SERP API CALL: cafes in {location}")
+            return await self.original_tool.search_cafes(location, max_results=max_results, fallback_on_error=False)
         
-        await self.cache.cache_response("search_cafes", cache_params, result)
-        return result
+        return await self._get_or_fallback(
+            "search_cafes", cache_params, fetch, raw_params,
+            lambda: self.original_tool._get_fallback_cafes(location, max_results)
+        )
     
     async def search_attractions_cached(self, location: str, interests: List[str] = None,
                                        max_results: int = 10) -> List[Dict[str, Any]]:
         """Search for attractions with caching"""
+        if self._uses_fallback():
+            return await self.original_tool.search_attractions(location, interests, max_results)
         
         cache_params = {
-            "location": location,
-            "interests": interests or [],
-            "max_results": max_results
+            "location": self._location_key(location),
+            "interests": sorted({self._text_key(interest) for interest in interests or [] if interest and interest.strip()})
         }
+        raw_params = {"location": location, "interests": interests or [], "max_results": max_results}
         
-        cached_result = await self.cache.get_cached_response("search_attractions", cache_params)
-        if cached_result is not None:
-            return cached_result
-        
-        print(f"🌐 SERP API CALL: attractions in {location}")
-        result = await self.original_tool.search_attractions(location, interests, max_results)
+        async def fetch() -> List[Dict[str, Any]]:
+            print(f"🌐 SERP API CALL: attractions in {location}")
+            return await self.original_tool.search_attractions(
+                location, interests, max_results, fallback_on_error=False
+            )
         
-        await self.cache.cache_response("search_attractions", cache_params, result)
-        return result
+        return await self._get_or_fallback(
+            "search_attractions", cache_params, fetch, raw_params,
+            lambda: self.original_tool._get_fallback_attractions(location, interests, max_results)
+        )
     
     async def raw_serp_search_cached(self, query: str) -> List[Dict[str, Any]]:
         """Perform raw SERP search with caching"""
         
-        cache_params = {"query": query}
-        
-        cached_result = await self.cache.get_cached_response("raw_search", cache_params)
-        if cached_result is not None:
-            return cached_result
-        
-        print(f"🌐 SERP API CALL: raw search '{query}'")
-        
-        # Import here to avoid circular dependency
-        import serpapi
-        from config import settings
-        
         if not getattr(settings, 'serp_api_key', None):
             return []
         
-        try:
-            search = serpapi.GoogleSearch({
+        cache_params = {"query": self._text_key(query)}
+        
+        async def fetch() -> List[Dict[str, Any]]:
+            print(f"🌐 SERP API CALL: raw search '{query}'")
+            results = await serp_client.search({
                 "q": query,
                 "api_key": settings.serp_api_key,
                 "engine": "google_maps",
                 "type": "search",
-                "num": 15
+                "num": 15,
+                "hl": "en"  # Language parameter
             })
-            
-            results = search.get_dict()
-            local_results = results.get("local_results", [])
-            
-            # Cache the result
-            await self.cache.cache_response("raw_search", cache_params, local_results)
-            
-            return local_results
-            
+            return results.get("local_results", [])
+        
+        try:
+            return await self.cache.get_or_fetch("raw_search", cache_params, fetch, {"query": query})
         except Exception as e:
             logger.error(f"Error in cached raw SERP search: {str(e)}")
             return []
@@ -0,0 +1,106 @@
+"""
+SerpApi Client - Shared non-blocking client for SerpApi
+One long-lived, pooled httpx.AsyncClient (HTTP/2 keep-alive when available)
+used by every SERP call site instead of the blocking serpapi.GoogleSearch
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+from config import settings
+from services.circuit_breaker import get_breaker
+from services.serp_quota import SerpQuotaExceeded, serp_quota
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401 - enables httpx's HTTP/2 support
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+SERPAPI_ENDPOINT = "https://serpapi.com/search.json"
+SERP_TIMEOUT = httpx.Timeout(20.0, connect=5.0)
+SERP_POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+SERP_MAX_RETRIES = 2
+SERP_RETRY_BACKOFF_SECONDS = 0.5
+# Transient statuses worth retrying (and counted against the breaker); other
+# errors come back as SerpApi's {"error": ...} body
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class SerpApiError(Exception):
+    """SerpApi could not be reached or kept failing after retries"""
+
+
+class SerpApiClient:
+    """Async SerpApi client; ``search()`` returns the same dict as GoogleSearch.get_dict()"""
+
+    def __init__(self, endpoint: str = SERPAPI_ENDPOINT):
+        self.endpoint = endpoint
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests_sent = 0
+        # Never hedged: every SerpApi request is a paid search
+        self.breaker = get_breaker(
+            "serpapi",
+            max_retries=SERP_MAX_RETRIES,
+            backoff_base=SERP_RETRY_BACKOFF_SECONDS,
+            retry_on=(httpx.TransportError, SerpApiError),
+            ignore=(SerpQuotaExceeded,),
+        )
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=SERP_TIMEOUT,
+                limits=SERP_POOL_LIMITS,
+                headers={"Accept": "application/json"},
+            )
+        return self._client
+
+    async def search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one SerpApi search through the provider circuit breaker.
+
+        Every attempt (retries included) is admitted by the quota governor
+        at the caller's serp_priority just before it is sent; a refusal raises
+        SerpQuotaExceeded without any request. Timeouts and transient statuses
+        are retried with budgeted backoff; an open breaker raises
+        CircuitOpenError immediately, without spending quota.
+        """
+        query = {"output": "json", **params}
+        if not query.get("api_key"):
+            query["api_key"] = settings.serp_api_key
+        engine = query.get("engine", "google")
+
+        async def request() -> Dict[str, Any]:
+            await serp_quota.acquire()
+            self.requests_sent += 1
+            response = await self._get_client().get(self.endpoint, params=query)
+            if response.status_code in RETRY_STATUSES:
+                raise SerpApiError(f"SerpApi {engine} returned HTTP {response.status_code}")
+            try:
+                return response.json()
+            except ValueError:
+                raise SerpApiError(f"SerpApi {engine} returned non-JSON response (HTTP {response.status_code})")
+
+        return await self.breaker.call(request)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "requests_sent": self.requests_sent,
+            "breaker": self.breaker.snapshot(),
+        }
+
+    async def close(self) -> None:
+        """Close pooled connections (called on application shutdown)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+# Global SerpApi client instance
+serp_client = SerpApiClient()
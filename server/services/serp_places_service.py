@@ -27,9 +27,9 @@ PHOTO STRUCTURE:
 import asyncio
 import logging
 from typing import List, Dict, Any, Optional
-import serpapi
 from datetime import datetime
 from config import settings
+from services.serp_client import serp_client
 
 logger = logging.getLogger(__name__)
 
@@ -59,13 +59,11 @@ class SerpPlacesService:
         try:
             print(f"      🌐 Calling Google Maps API via SERP")
             
-            search = serpapi.GoogleSearch({
+            results = await serp_client.search({
                 "engine": "google_maps",
                 "place_id": place_id,
                 "api_key": self.api_key
             })
-            
-            results = search.get_dict()
             place_data = results.get('place_results', {})
             
             if place_data:
@@ -132,8 +130,7 @@ class SerpPlacesService:
             if place_type:
                 search_params["type"] = place_type
             
-            search = serpapi.GoogleSearch(search_params)
-            results = search.get_dict()
+            results = await serp_client.search(search_params)
             
             local_results = results.get('local_results', [])
             
@@ -181,13 +178,11 @@ class SerpPlacesService:
             return []
         
         try:
-            search = serpapi.GoogleSearch({
+            results = await serp_client.search({
                 "engine": "google_maps_photos",
                 "place_id": place_id,
                 "api_key": self.api_key
             })
-            
-            results = search.get_dict()
             photos = results.get('photos', [])
             
             if photos:
@@ -214,13 +209,11 @@ class SerpPlacesService:
             return []
         
         try:
-            search = serpapi.GoogleSearch({
+            results = await serp_client.search({
                 "engine": "google_maps_reviews",
                 "place_id": place_id,
                 "api_key": self.api_key
             })
-            
-            results = search.get_dict()
             reviews = results.get('reviews', [])
             
             if reviews:
@@ -0,0 +1,176 @@
+"""
+SERP Quota Governor - Central budget for paid SerpApi searches
+Token bucket for bursts, shared daily/monthly budgets, and priority lanes so
+interactive itineraries keep working when background work has used its share
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from enum import IntEnum
+from typing import Any, Dict, Iterator, Optional
+
+from config import settings
+from services.cache_service import cache_service
+
+logger = logging.getLogger(__name__)
+
+
+class SerpPriority(IntEnum):
+    """Who is asking for a search; higher values win when the budget is tight"""
+    PREFETCH = 0      # cache warming / prefetching
+    ADDITIONAL = 1    # "you might also like" suggestions
+    INTERACTIVE = 2   # a user waiting on an itinerary
+
+
+# Share of each daily/monthly budget a lane may consume. The remainder is kept
+# for higher lanes, so warming stops first and itineraries stop last.
+BUDGET_SHARE = {
+    SerpPriority.PREFETCH: 0.6,
+    SerpPriority.ADDITIONAL: 0.85,
+    SerpPriority.INTERACTIVE: 1.0,
+}
+# How long a lane may wait for a token-bucket token before giving up
+TOKEN_WAIT_SECONDS = {
+    SerpPriority.PREFETCH: 0.0,
+    SerpPriority.ADDITIONAL: 2.0,
+    SerpPriority.INTERACTIVE: 5.0,
+}
+
+# Priority of SERP calls made in the current request/task. Set with serp_priority_scope().
+serp_priority: ContextVar[SerpPriority] = ContextVar("serp_priority", default=SerpPriority.INTERACTIVE)
+
+
+@contextmanager
+def serp_priority_scope(priority: SerpPriority) -> Iterator[None]:
+    """Run SERP calls in this block (and tasks created in it) at ``priority``"""
+    token = serp_priority.set(priority)
+    try:
+        yield
+    finally:
+        serp_priority.reset(token)
+
+
+class SerpQuotaExceeded(Exception):
+    """A SERP search was refused to stay within rate or budget limits"""
+
+
+class SerpQuotaGovernor:
+    """
+    Admits or refuses SerpApi searches before they are sent.
+
+    The token bucket is per process and smooths bursts; the daily and monthly
+    counters live in the cache so every worker on a shared backend draws from
+    the same budget. A budget of 0 means unlimited.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int,
+        daily_budget: int = 0,
+        monthly_budget: int = 0
+    ):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.daily_budget = daily_budget
+        self.monthly_budget = monthly_budget
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._counters: Dict[str, Dict[str, int]] = {
+            priority.name.lower(): {"allowed": 0, "rate_limited": 0, "budget_denied": 0}
+            for priority in SerpPriority
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_per_second)
+        self._refilled_at = now
+
+    async def _take_token(self, max_wait: float) -> bool:
+        # Refill and take happen without an await in between, so no lock is
+        # needed; a waiter that loses the race for a token simply waits again.
+        deadline = time.monotonic() + max_wait
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            wait = (1 - self._tokens) / self.rate_per_second if self.rate_per_second else max_wait + 1
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+    @staticmethod
+    def _budget_keys() -> Dict[str, str]:
+        now = datetime.utcnow()
+        return {"daily": f"day:{now:%Y-%m-%d}", "monthly": f"month:{now:%Y-%m}"}
+
+    async def _charge_budget(self, priority: SerpPriority) -> Optional[str]:
+        """Count one search against the budgets; return the exhausted period, if any"""
+        keys = self._budget_keys()
+        budgets = (
+            ("daily", self.daily_budget, 2 * 24 * 60 * 60),
+            ("monthly", self.monthly_budget, 32 * 24 * 60 * 60),
+        )
+        charged = []
+        for period, budget, ttl in budgets:
+            if not budget:
+                continue
+            used = await cache_service.incr("serp_quota", keys[period], 1, ttl)
+            charged.append((period, ttl))
+            if used > budget * BUDGET_SHARE[priority]:
+                # Give the unit back so the refusal does not eat into other lanes
+                for refund_period, refund_ttl in charged:
+                    await cache_service.incr("serp_quota", keys[refund_period], -1, refund_ttl)
+                return period
+        return None
+
+    async def acquire(self, priority: Optional[SerpPriority] = None) -> None:
+        """Admit one search at ``priority`` (default: the current serp_priority) or raise SerpQuotaExceeded"""
+        priority = serp_priority.get() if priority is None else priority
+        counters = self._counters[priority.name.lower()]
+
+        if not await self._take_token(TOKEN_WAIT_SECONDS[priority]):
+            counters["rate_limited"] += 1
+            raise SerpQuotaExceeded(f"SERP rate limit reached for {priority.name.lower()} searches")
+
+        exhausted = await self._charge_budget(priority)
+        if exhausted:
+            counters["budget_denied"] += 1
+            logger.warning(f"⛽ SERP {exhausted} budget share used up; refusing {priority.name.lower()} search")
+            raise SerpQuotaExceeded(f"SERP {exhausted} budget exhausted for {priority.name.lower()} searches")
+
+        counters["allowed"] += 1
+
+    def counts(self, priority: SerpPriority) -> Dict[str, int]:
+        """Searches allowed, refused by the rate limit and refused by the lane's
+        budget share so far in this process for one lane"""
+        return dict(self._counters[priority.name.lower()])
+
+    async def stats(self) -> Dict[str, Any]:
+        keys = self._budget_keys()
+        used = await cache_service.mget("serp_quota", [keys["daily"], keys["monthly"]])
+        self._refill()
+        return {
+            "rate_per_minute": round(self.rate_per_second * 60, 2),
+            "burst": self.burst,
+            "tokens_available": round(self._tokens, 2),
+            "daily_budget": self.daily_budget or None,
+            "daily_used": int(used[0] or 0),
+            "monthly_budget": self.monthly_budget or None,
+            "monthly_used": int(used[1] or 0),
+            "lanes": {name: dict(counts) for name, counts in self._counters.items()},
+        }
+
+
+# Global quota governor instance
+serp_quota = SerpQuotaGovernor(
+    rate_per_minute=settings.serp_rate_per_minute,
+    burst=settings.serp_burst,
+    daily_budget=settings.serp_daily_budget,
+    monthly_budget=settings.serp_monthly_budget,
+)
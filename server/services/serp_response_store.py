@@ -0,0 +1,210 @@
+"""
+SERP Response Store - Durable SERP responses in MongoDB
+Survives deploys so a fresh process does not re-buy results it already paid for
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import DESCENDING, UpdateOne
+
+from database import Database, get_collection, SERP_RESPONSES_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+# Hit counters are buffered in memory and written in one bulk update
+HIT_FLUSH_INTERVAL_SECONDS = 60
+# Index creation is retried this often until it succeeds (MongoDB down at boot)
+INDEX_RETRY_SECONDS = 60
+# At most one "store unavailable" warning per interval; the rest go to debug
+WARNING_INTERVAL_SECONDS = 300
+
+
+def serp_document_id(endpoint: str, params: Dict[str, Any]) -> str:
+    """Stable id for an endpoint + params pair (params order does not matter)"""
+    normalized = json.dumps({"endpoint": endpoint, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class SerpResponseStore:
+    """
+    One document per SERP request: zlib-compressed JSON payload, the params
+    needed to rebuild the cache key, soft/hard deadlines and a hit counter.
+    MongoDB removes documents past ``expires_at`` through a TTL index, which
+    is created on the first use of the collection (and retried until MongoDB
+    is reachable).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._indexes_ready = False
+        self._index_attempted_at = 0.0
+        self._index_lock = asyncio.Lock()
+        self._last_warning_at = 0.0
+        self._suppressed_warnings = 0
+        self._pending_hits: Dict[str, int] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _warn(self, message: str) -> None:
+        """Log a store failure, at most once per WARNING_INTERVAL_SECONDS"""
+        now = time.monotonic()
+        if now - self._last_warning_at < WARNING_INTERVAL_SECONDS:
+            self._suppressed_warnings += 1
+            logger.debug(message)
+            return
+        if self._suppressed_warnings:
+            message += f" ({self._suppressed_warnings} similar failures since the last warning)"
+        self._last_warning_at, self._suppressed_warnings = now, 0
+        logger.warning(message)
+
+    def _collection(self):
+        if not self.enabled:
+            return None
+        if Database.client is None:
+            self._warn("SERP store unavailable: database not connected")
+            return None
+        return get_collection(SERP_RESPONSES_COLLECTION)
+
+    async def _ready_collection(self):
+        """The collection, creating its indexes first if that has not succeeded yet"""
+        collection = self._collection()
+        if collection is not None and not self._indexes_ready:
+            if time.monotonic() - self._index_attempted_at >= INDEX_RETRY_SECONDS:
+                try:
+                    await self.ensure_indexes()
+                except Exception as e:
+                    self._warn(f"SERP store index creation failed: {str(e)}")
+        return collection
+
+    async def ensure_indexes(self) -> bool:
+        """Create the TTL and hit-ranking indexes (idempotent, once per process)"""
+        collection = self._collection()
+        if collection is None:
+            return False
+        async with self._index_lock:
+            if not self._indexes_ready:
+                self._index_attempted_at = time.monotonic()
+                await collection.create_index("expires_at", expireAfterSeconds=0)
+                await collection.create_index([("hits", DESCENDING)])
+                self._indexes_ready = True
+        return True
+
+    async def get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return ``{"value", "fresh_until", "expires_at"}`` for a live document, or None"""
+        collection = await self._ready_collection()
+        if collection is None:
+            return None
+        try:
+            doc = await collection.find_one({
+                "_id": serp_document_id(endpoint, params),
+                "expires_at": {"$gt": datetime.utcnow()},
+            })
+        except Exception as e:
+            self._warn(f"SERP store read failed for {endpoint}: {str(e)}")
+            return None
+        if doc is None:
+            return None
+        return {
+            "value": json.loads(zlib.decompress(doc["payload"])),
+            "fresh_until": doc["fresh_until"],
+            "expires_at": doc["expires_at"],
+        }
+
+    async def put(
+        self, endpoint: str, params: Dict[str, Any], value: Any, fresh_ttl: int, ttl: int
+    ) -> bool:
+        """Write a response through to MongoDB, keeping its hit count"""
+        collection = await self._ready_collection()
+        if collection is None:
+            return False
+        now = datetime.utcnow()
+        payload = zlib.compress(json.dumps(value, default=str).encode(), 6)
+        try:
+            await collection.update_one(
+                {"_id": serp_document_id(endpoint, params)},
+                {
+                    "$set": {
+                        "endpoint": endpoint,
+                        "params": params,
+                        "payload": payload,
+                        "size": len(payload),
+                        "updated_at": now,
+                        "fresh_until": now + timedelta(seconds=fresh_ttl),
+                        "expires_at": now + timedelta(seconds=ttl),
+                    },
+                    "$setOnInsert": {"created_at": now, "hits": 0},
+                },
+                upsert=True,
+            )
+            return True
+        except Exception as e:
+            self._warn(f"SERP store write failed for {endpoint}: {str(e)}")
+            return False
+
+    def record_hit(self, endpoint: str, params: Dict[str, Any]) -> None:
+        """Count a lookup for warm-start ranking (flushed in the background)"""
+        if self.enabled:
+            doc_id = serp_document_id(endpoint, params)
+            self._pending_hits[doc_id] = self._pending_hits.get(doc_id, 0) + 1
+
+    async def flush_hits(self) -> int:
+        """Write buffered hit counts in one bulk update"""
+        pending, self._pending_hits = self._pending_hits, {}
+        if not pending:
+            return 0
+        collection = await self._ready_collection()
+        if collection is None:
+            return 0
+        try:
+            await collection.bulk_write(
+                [UpdateOne({"_id": doc_id}, {"$inc": {"hits": hits}}) for doc_id, hits in pending.items()],
+                ordered=False,
+            )
+        except Exception as e:
+            self._warn(f"SERP store hit flush failed: {str(e)}")
+            return 0
+        return len(pending)
+
+    async def most_hit(self, limit: int) -> List[Dict[str, Any]]:
+        """Live documents ordered by hit count, highest first"""
+        collection = await self._ready_collection()
+        if collection is None or limit <= 0:
+            return []
+        cursor = collection.find({"expires_at": {"$gt": datetime.utcnow()}}).sort("hits", DESCENDING).limit(limit)
+        documents = []
+        async for doc in cursor:
+            documents.append({
+                "endpoint": doc["endpoint"],
+                "params": doc["params"],
+                "value": json.loads(zlib.decompress(doc["payload"])),
+                "fresh_until": doc["fresh_until"],
+                "expires_at": doc["expires_at"],
+            })
+        return documents
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(HIT_FLUSH_INTERVAL_SECONDS)
+            await self.flush_hits()
+
+    def start(self) -> None:
+        """Start the background hit-counter flush"""
+        if self.enabled and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write any buffered hits"""
+        task, self._flush_task = self._flush_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush_hits()
@@ -0,0 +1,147 @@
+"""
+Tracing - Stage timings for the itinerary pipeline
+Spans recorded inside a trace scope are summed per stage for the response
+metadata; every span also lands in per-stage latency histograms (p50/p95)
+served on /health/stages
+"""
+
+import functools
+import inspect
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is unbounded
+BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+# Samples per stage kept for the p50/p95 figures
+SAMPLE_WINDOW = 500
+
+
+class Trace:
+    """Span durations of one request, summed per stage"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, stage: str, elapsed_ms: float) -> None:
+        entry = self.stages.setdefault(stage, {"ms": 0.0, "calls": 0})
+        entry["ms"] += elapsed_ms
+        entry["calls"] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """{"total_ms", "stages": {stage: {"ms", "calls"}}}; concurrent spans of a stage add up"""
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "stages": {
+                stage: {"ms": round(entry["ms"], 1), "calls": entry["calls"]}
+                for stage, entry in self.stages.items()
+            },
+        }
+
+
+class StageHistograms:
+    """Cumulative bucket counts plus a recent sample window per stage"""
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def observe(self, stage: str, elapsed_ms: float) -> None:
+        hist = self._stages.get(stage)
+        if hist is None:
+            hist = self._stages[stage] = {
+                "buckets": [0] * (len(BUCKETS_MS) + 1), "count": 0, "sum_ms": 0.0,
+                "samples": deque(maxlen=SAMPLE_WINDOW),
+            }
+        index = next((i for i, bound in enumerate(BUCKETS_MS) if elapsed_ms <= bound), len(BUCKETS_MS))
+        hist["buckets"][index] += 1
+        hist["count"] += 1
+        hist["sum_ms"] += elapsed_ms
+        hist["samples"].append(elapsed_ms)
+
+    @staticmethod
+    def _percentile(samples: Deque[float], fraction: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 1)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {}
+        for stage, hist in sorted(self._stages.items()):
+            stats[stage] = {
+                "count": hist["count"],
+                "avg_ms": round(hist["sum_ms"] / hist["count"], 1),
+                "p50_ms": self._percentile(hist["samples"], 0.5),
+                "p95_ms": self._percentile(hist["samples"], 0.95),
+                "buckets_ms": {
+                    **{f"le_{bound}": count for bound, count in zip(BUCKETS_MS, hist["buckets"])},
+                    "inf": hist["buckets"][-1],
+                },
+            }
+        return stats
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+stage_histograms = StageHistograms()
+
+
+@contextmanager
+def trace_scope() -> Iterator[Trace]:
+    """Collect the spans of this block (and tasks created in it) into a new Trace"""
+    trace = Trace()
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+
+
+def start_trace() -> Trace:
+    """Start a Trace for the rest of the current context (for async generators,
+    which cannot reset a context variable across yields)"""
+    trace = Trace()
+    current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the block as ``stage``; failed spans are timed too"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stage_histograms.observe(stage, elapsed_ms)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add(stage, elapsed_ms)
+
+
+def traced(stage: str) -> Callable:
+    """Decorator: every call of the (sync or async) function is a ``stage`` span"""
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+async def traced_call(stage: str, awaitable: Any) -> Any:
+    """Await ``awaitable`` as a ``stage`` span (for coroutines gathered together)"""
+    with span(stage):
+        return await awaitable
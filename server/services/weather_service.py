@@ -2,26 +2,92 @@
 Weather service for fetching weather data from OpenWeatherMap API
 """
 
-import requests
+import httpx
 import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from urllib.parse import unquote
 from config import settings
 from utils.location_utils import parse_location_for_weather
+from services.cache_service import cache_service
+from services.circuit_breaker import CircuitOpenError, get_breaker
 
 logger = logging.getLogger(__name__)
 
+# Current conditions are served from cache for WEATHER_FRESH_TTL seconds, then
+# served stale (and refreshed in the background) until WEATHER_HARD_TTL.
+WEATHER_FRESH_TTL = 10 * 60
+WEATHER_HARD_TTL = 3 * 60 * 60
+WEATHER_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+
 class WeatherService:
     """Service for fetching weather data from OpenWeatherMap API"""
     
     def __init__(self):
         self.api_key = settings.open_weather_api_key
         self.base_url = "https://api.openweathermap.org/data/2.5"
+        self._client: Optional[httpx.AsyncClient] = None
+        # Weather reads are free and idempotent, so slow calls are hedged
+        self.breaker = get_breaker("openweathermap", hedge=True, retry_on=(httpx.TransportError, httpx.HTTPStatusError))
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=WEATHER_TIMEOUT)
+        return self._client
+    
+    async def _get_json(self, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET an OpenWeatherMap endpoint through the provider circuit breaker"""
+        async def request() -> httpx.Response:
+            response = await self._get_client().get(url, params=params)
+            if response.status_code >= 500:
+                response.raise_for_status()  # provider trouble: retried and counted by the breaker
+            return response
+        
+        response = await self.breaker.call(request)
+        response.raise_for_status()  # 4xx (e.g. unknown city) is not a provider failure
+        return response.json()
+    
+    async def close(self) -> None:
+        """Close pooled connections (called on application shutdown)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
         
     async def get_current_weather(self, city: str, country_code: Optional[str] = None) -> Dict[str, Any]:
         """
-        Get current weather for a city
+        Get current weather for a city (cached, stale-while-revalidate)
+        
+        Args:
+            city: City name (can be full formatted address like "Vasco Da Gama, Goa, India")
+            country_code: Optional country code (e.g., 'US', 'GB')
+            
+        Returns:
+            Dict containing current weather data
+        """
+        if not self.api_key:
+            logger.warning("OpenWeatherMap API key not configured")
+            return {"error": "OpenWeatherMap API key not configured"}
+        
+        failure: Dict[str, Any] = {}
+        
+        async def load() -> Optional[Dict[str, Any]]:
+            data = await self._fetch_current_weather(city, country_code)
+            if "error" in data:
+                failure.update(data)
+                return None  # errors are returned to the caller but never cached
+            return data
+        
+        params = {"city": " ".join(unquote(city).replace('+', ' ').lower().split()), "country_code": country_code}
+        data = await cache_service.get_or_load(
+            "weather", "current", load, ttl=WEATHER_HARD_TTL, params=params, fresh_ttl=WEATHER_FRESH_TTL
+        )
+        if data is None:
+            return failure or {"error": "Failed to fetch weather data"}
+        return data
+    
+    async def _fetch_current_weather(self, city: str, country_code: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Fetch current weather for a city from OpenWeatherMap
         
         Args:
             city: City name (can be full formatted address like "Vasco Da Gama, Goa, India")
@@ -53,10 +119,7 @@ class WeatherService:
                 "units": "metric"  # Use metric units (Celsius)
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = await self._get_json(url, params)
             
             return {
                 "location": {
@@ -82,7 +145,10 @@ class WeatherService:
                 "timestamp": datetime.now().isoformat()
             }
             
-        except requests.exceptions.RequestException as e:
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping current weather request: {e}")
+            return {"error": "Weather service temporarily unavailable"}
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching current weather: {e}")
             return {"error": f"Failed to fetch weather data: {str(e)}"}
         except KeyError as e:
@@ -128,10 +194,7 @@ class WeatherService:
                 "cnt": days * 8  # 8 forecasts per day (every 3 hours)
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = await self._get_json(url, params)
             
             # Process forecast data
             forecasts = []
@@ -164,7 +227,10 @@ class WeatherService:
                 "timestamp": datetime.now().isoformat()
             }
             
-        except requests.exceptions.RequestException as e:
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping weather forecast request: {e}")
+            return {"error": "Weather service temporarily unavailable"}
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching weather forecast: {e}")
             return {"error": f"Failed to fetch forecast data: {str(e)}"}
         except KeyError as e:
@@ -198,10 +264,7 @@ class WeatherService:
                 "units": "metric"
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = await self._get_json(url, params)
             
             return {
                 "location": {
@@ -227,7 +290,10 @@ class WeatherService:
                 "timestamp": datetime.now().isoformat()
             }
             
-        except requests.exceptions.RequestException as e:
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping weather by coordinates request: {e}")
+            return {"error": "Weather service temporarily unavailable"}
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching weather by coordinates: {e}")
             return {"error": f"Failed to fetch weather data: {str(e)}"}
         except KeyError as e:
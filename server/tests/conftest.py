@@ -0,0 +1,9 @@
+"""
+Shared pytest setup: tests import the server packages (services, routers, ...)
+the same way main.py does, so the server directory goes on the import path
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
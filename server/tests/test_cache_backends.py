@@ -0,0 +1,120 @@
+"""
+Memory cache backend: per-namespace LRU segments, byte budgets and counters
+"""
+
+import asyncio
+
+from services.cache_backends import MemoryCacheBackend, _sizeof
+
+
+def test_lru_evicts_least_recently_used_entry():
+    backend = MemoryCacheBackend({"ns": {"max_entries": 2, "max_bytes": 1024 * 1024}})
+
+    async def scenario():
+        await backend.set("safarbot:ns:a", "A", 60)
+        await backend.set("safarbot:ns:b", "B", 60)
+        await backend.get("safarbot:ns:a")  # a is now most recently used
+        await backend.set("safarbot:ns:c", "C", 60)
+        return await backend.mget(["safarbot:ns:a", "safarbot:ns:b", "safarbot:ns:c"])
+
+    assert asyncio.run(scenario()) == ["A", None, "C"]
+
+
+def test_namespaces_are_bounded_independently():
+    backend = MemoryCacheBackend({"small": {"max_entries": 1, "max_bytes": 1024 * 1024}})
+
+    async def scenario():
+        await backend.set("safarbot:other:keep", "value", 60)
+        await backend.set("safarbot:small:one", 1, 60)
+        await backend.set("safarbot:small:two", 2, 60)
+        return await backend.get("safarbot:other:keep"), await backend.get("safarbot:small:one")
+
+    assert asyncio.run(scenario()) == ("value", None)
+
+
+def test_oversized_value_is_rejected():
+    backend = MemoryCacheBackend({"ns": {"max_entries": 10, "max_bytes": 64}})
+
+    async def scenario():
+        stored = await backend.set("safarbot:ns:big", "x" * 1000, 60)
+        return stored, await backend.get("safarbot:ns:big"), (await backend.stats())["namespaces"]["ns"]
+
+    stored, value, stats = asyncio.run(scenario())
+    assert not stored and value is None
+    assert stats["rejected"] == 1 and stats["bytes"] == 0
+
+
+def test_incr_keeps_byte_count_and_lru_position():
+    backend = MemoryCacheBackend({"ns": {"max_entries": 2, "max_bytes": 1024 * 1024}})
+    counter = "safarbot:ns:counter"
+
+    async def scenario():
+        await backend.incr(counter, 1)
+        await backend.set("safarbot:ns:other", "x", 60)
+        await backend.incr(counter, 2 ** 40)  # counter becomes most recently used
+        await backend.set("safarbot:ns:new", "y", 60)
+        stats = (await backend.stats())["namespaces"]["ns"]
+        return await backend.get(counter), await backend.get("safarbot:ns:other"), stats
+
+    value, other, stats = asyncio.run(scenario())
+    assert value == 2 ** 40 + 1
+    assert other is None
+    expected = _sizeof(value) + len(counter) + _sizeof("y") + len("safarbot:ns:new")
+    assert stats["bytes"] == expected
+
+
+def test_incr_keeps_the_original_deadline():
+    backend = MemoryCacheBackend()
+    key = "safarbot:ns:counter"
+
+    async def scenario():
+        await backend.incr(key, 1, ttl=60)
+        deadline = backend._segments["ns"][key].expires_at
+        await backend.incr(key, 1, ttl=3600)
+        return deadline, backend._segments["ns"][key].expires_at
+
+    before, after = asyncio.run(scenario())
+    assert abs(after - before) < 1
+
+
+def test_sqlite_stats_follow_writes_without_scanning(tmp_path):
+    from services.cache_backends import SQLiteCacheBackend
+
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"))
+
+    async def scenario():
+        await backend.set("safarbot:serp_cache:a", [1, 2, 3], 60)
+        await backend.set("safarbot:serp_cache:a", [1, 2], 60)  # replaced, counted once
+        await backend.mset({"safarbot:places:p1": {"title": "x"}, "safarbot:places:p2": {}}, 60)
+        await backend.incr("safarbot:serp_quota:day", 1)
+        await backend.incr("safarbot:serp_quota:day", 1)
+        await backend.set("itinerary:details:token", "raw", 60)
+        await backend.delete("safarbot:places:p2")
+        return await backend.stats()
+
+    stats = asyncio.run(scenario())
+    backend._conn.close()
+    assert stats["total_keys"] == 4
+    assert stats["safarbot_keys"] == 3
+    assert {ns: counts["entries"] for ns, counts in stats["namespaces"].items()} == {
+        "serp_cache": 1, "places": 1, "serp_quota": 1, "itinerary:details": 1,
+    }
+    assert stats["memory_used_bytes"] == sum(counts["bytes"] for counts in stats["namespaces"].values())
+
+
+def test_sqlite_counters_are_seeded_from_an_existing_file(tmp_path):
+    import sqlite3
+
+    from services.cache_backends import SQLiteCacheBackend, _dumps
+
+    path = str(tmp_path / "cache.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+    conn.execute("INSERT INTO cache VALUES (?, ?, ?)", ("safarbot:weather:goa", _dumps({"t": 30}), 1e12))
+    conn.commit()
+    conn.close()
+
+    backend = SQLiteCacheBackend(path)
+    stats = asyncio.run(backend.stats())
+    backend._conn.close()
+    assert stats["total_keys"] == 1 and stats["namespaces"]["weather"]["entries"] == 1
@@ -0,0 +1,95 @@
+"""
+CacheService.get_or_load: single-flight misses, stale-while-revalidate and
+forced refreshes
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services import cache_service as cache_service_module
+from services.cache_backends import MemoryCacheBackend
+from services.cache_service import CacheService
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Wall clock the cache reads soft-TTL deadlines from; advance ``now`` to age entries"""
+    fake = SimpleNamespace(now=time.time())
+    monkeypatch.setattr(cache_service_module, "time", SimpleNamespace(time=lambda: fake.now))
+    return fake
+
+
+def counting_loader(results):
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return results[len(calls) - 1]
+
+    return loader, calls
+
+
+def test_concurrent_misses_share_one_load():
+    cache = CacheService(MemoryCacheBackend())
+    loader, calls = counting_loader(["v1"])
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load("serp", "q", loader, ttl=60) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["v1"] * 5
+    assert len(calls) == 1
+
+
+def test_loader_error_reaches_every_waiter_and_is_not_cached():
+    cache = CacheService(MemoryCacheBackend())
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(cache.get_or_load("serp", "q", failing, ttl=60) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("serp", "q", failing, ttl=60)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(clock):
+    cache = CacheService(MemoryCacheBackend())
+    loader, calls = counting_loader(["v1", "v2"])
+
+    async def scenario():
+        assert await cache.get_or_load("serp", "q", loader, ttl=600, fresh_ttl=60) == "v1"
+        clock.now += 120
+        stale = await asyncio.gather(*(cache.get_or_load("serp", "q", loader, ttl=600, fresh_ttl=60) for _ in range(3)))
+        await asyncio.sleep(0.05)
+        return stale, await cache.get_or_load("serp", "q", loader, ttl=600, fresh_ttl=60)
+
+    stale, refreshed = asyncio.run(scenario())
+    assert stale == ["v1"] * 3
+    assert refreshed == "v2"
+    assert len(calls) == 2
+
+
+def test_refresh_waits_for_the_new_value(clock):
+    cache = CacheService(MemoryCacheBackend())
+    loader, calls = counting_loader(["v1", "v2"])
+
+    async def scenario():
+        await cache.get_or_load("serp", "q", loader, ttl=600, fresh_ttl=60)
+        clock.now += 120
+        return await cache.get_or_load("serp", "q", loader, ttl=600, fresh_ttl=60, refresh=True)
+
+    assert asyncio.run(scenario()) == "v2"
+    assert len(calls) == 2
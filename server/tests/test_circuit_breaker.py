@@ -0,0 +1,167 @@
+"""
+Circuit breaker state machine: open/half-open transitions, ignored errors
+and trial slots
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Boom(Exception):
+    pass
+
+
+async def fail():
+    raise Boom()
+
+
+async def succeed():
+    return "ok"
+
+
+def make_breaker(**options):
+    defaults = {"failure_threshold": 2, "recovery_timeout": 0.05, "max_retries": 0}
+    return CircuitBreaker("test", **{**defaults, **options})
+
+
+def test_opens_after_threshold_and_short_circuits():
+    breaker = make_breaker()
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(Boom):
+                await breaker.call(fail)
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(succeed)
+
+    asyncio.run(scenario())
+    assert breaker.snapshot()["short_circuited"] == 1
+
+
+def test_half_open_trial_success_closes():
+    breaker = make_breaker(failure_threshold=1)
+
+    async def scenario():
+        with pytest.raises(Boom):
+            await breaker.call(fail)
+        await asyncio.sleep(0.06)
+        return await breaker.call(succeed)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_half_open_trial_failure_reopens():
+    breaker = make_breaker(failure_threshold=1)
+
+    async def scenario():
+        with pytest.raises(Boom):
+            await breaker.call(fail)
+        await asyncio.sleep(0.06)
+        with pytest.raises(Boom):
+            await breaker.call(fail)
+
+    asyncio.run(scenario())
+    assert breaker.state == OPEN
+
+
+def test_ignored_errors_do_not_count_as_failures():
+    breaker = make_breaker(failure_threshold=1, ignore=(Boom,))
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(Boom):
+                await breaker.call(fail)
+
+    asyncio.run(scenario())
+    assert breaker.state == CLOSED
+
+
+def test_ignored_error_in_guard_frees_the_trial_slot():
+    # The streaming itinerary path raises its own disconnect error inside guard()
+    breaker = make_breaker(failure_threshold=1, ignore=(Boom,))
+    breaker._on_failure(RuntimeError("provider down"))
+    time.sleep(0.06)
+
+    with pytest.raises(Boom):
+        with breaker.guard():
+            raise Boom()
+    assert breaker.snapshot()["failures"] == 1
+
+    with breaker.guard():
+        pass
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_half_open_trial_frees_the_trial_slot():
+    breaker = make_breaker(failure_threshold=1)
+
+    async def scenario():
+        with pytest.raises(Boom):
+            await breaker.call(fail)
+        await asyncio.sleep(0.06)
+
+        hanging = asyncio.Event()
+
+        async def hang():
+            hanging.set()
+            await asyncio.sleep(10)
+
+        trial = asyncio.create_task(breaker.call(hang))
+        await hanging.wait()
+        assert breaker.state == HALF_OPEN
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        # The next call is admitted as the new trial instead of "retry in 0s"
+        return await breaker.call(succeed)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_guard_frees_the_trial_slot():
+    breaker = make_breaker(failure_threshold=1)
+
+    async def scenario():
+        with pytest.raises(Boom):
+            await breaker.call(fail)
+        await asyncio.sleep(0.06)
+
+        async def guarded():
+            with breaker.guard():
+                await asyncio.sleep(10)
+
+        trial = asyncio.create_task(guarded())
+        await asyncio.sleep(0)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        return await breaker.call(succeed)
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_retries_are_budgeted():
+    breaker = make_breaker(failure_threshold=100, max_retries=3, backoff_base=0, retry_budget_max=1)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        raise Boom()
+
+    async def scenario():
+        with pytest.raises(Boom):
+            await breaker.call(flaky)
+        with pytest.raises(Boom):
+            await breaker.call(flaky)
+
+    asyncio.run(scenario())
+    # One retry token: the first call retries once, then neither call may retry again
+    assert len(calls) == 3
+    assert breaker.snapshot()["retries_denied"] == 2
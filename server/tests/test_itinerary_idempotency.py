@@ -0,0 +1,80 @@
+"""
+/generate-itinerary-complete idempotency: duplicates share one generation,
+incomplete results are not replayed, and a reused key needs the same body
+"""
+
+import importlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.cache_backends import MemoryCacheBackend
+from services.cache_service import CacheService
+
+# routers/__init__ re-exports the APIRouter under the module's name
+itinerary_router = importlib.import_module("routers.itinerary")
+
+BODY = {"destination": "Jaipur", "start_date": "2026-11-01", "end_date": "2026-11-03"}
+
+
+@pytest.fixture
+def generations(monkeypatch):
+    """Counts generations; set ``complete`` to control the metadata flag of the next ones"""
+    calls = {"count": 0, "complete": True}
+
+    async def generate_itinerary(**kwargs):
+        calls["count"] += 1
+        return {
+            "itinerary": {"destination": kwargs["destination"], "daily_plans": []},
+            "place_details": {},
+            "additional_places": {},
+            "metadata": {"complete": calls["complete"], "generation": calls["count"]},
+        }
+
+    async def record_destination(destination, interests):
+        pass
+
+    monkeypatch.setattr(itinerary_router, "cache_service", CacheService(MemoryCacheBackend()))
+    monkeypatch.setattr(itinerary_router.itinerary_service, "generate_itinerary", generate_itinerary)
+    monkeypatch.setattr(itinerary_router.cache_prewarmer, "record_destination", record_destination)
+    monkeypatch.setattr(itinerary_router.settings, "idempotency_grace_seconds", 300)
+    return calls
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(itinerary_router.router, prefix="/itinerary")
+    return TestClient(app)
+
+
+def test_repeat_request_is_answered_from_the_first_generation(client, generations):
+    first = client.post("/itinerary/generate-itinerary-complete", json=BODY)
+    second = client.post("/itinerary/generate-itinerary-complete", json=BODY)
+
+    assert first.status_code == second.status_code == 200
+    assert second.json()["metadata"]["generation"] == 1
+    assert generations["count"] == 1
+
+
+def test_incomplete_result_is_not_replayed(client, generations):
+    generations["complete"] = False
+
+    client.post("/itinerary/generate-itinerary-complete", json=BODY)
+    second = client.post("/itinerary/generate-itinerary-complete", json=BODY)
+
+    assert second.status_code == 200
+    assert second.json()["metadata"]["generation"] == 2
+    assert generations["count"] == 2
+
+
+def test_idempotency_key_reused_with_a_different_body_is_refused(client, generations):
+    headers = {"Idempotency-Key": "trip-1"}
+
+    assert client.post("/itinerary/generate-itinerary-complete", json=BODY, headers=headers).status_code == 200
+    changed = {**BODY, "end_date": "2026-11-05"}
+    response = client.post("/itinerary/generate-itinerary-complete", json=changed, headers=headers)
+
+    assert response.status_code == 422
+    assert generations["count"] == 1
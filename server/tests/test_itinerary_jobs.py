@@ -0,0 +1,117 @@
+"""
+Background itinerary jobs: queue bounds, stored results and failures, and
+the request a job keeps once the HTTP call has returned
+"""
+
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from services import itinerary_jobs as itinerary_jobs_module
+from services.cache_backends import MemoryCacheBackend
+from services.cache_service import CacheService
+from services.itinerary_jobs import ItineraryJobQueue, JobQueueFullError
+from services.itinerary_service import _DetachedRequest
+from utils.image_utils import get_backend_url_from_request
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(itinerary_jobs_module, "cache_service", CacheService(MemoryCacheBackend()))
+
+
+async def wait_until_finished(queue, job_id):
+    for _ in range(100):
+        job = await queue.get(job_id)
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_completed_job_stores_its_result():
+    queue = ItineraryJobQueue(workers=1)
+
+    async def run():
+        return {"itinerary": {"destination": "Goa"}}
+
+    async def scenario():
+        job = await queue.submit(run, user_id=None, summary={"destination": "Goa"})
+        assert job["status"] == "queued"
+        finished = await wait_until_finished(queue, job["job_id"])
+        result = await queue.get_result(job["job_id"])
+        await queue.stop()
+        return finished, result
+
+    finished, result = asyncio.run(scenario())
+    assert finished["status"] == "completed"
+    assert finished["destination"] == "Goa"
+    assert result == {"itinerary": {"destination": "Goa"}}
+    assert queue.stats()["completed"] == 1
+
+
+def test_failed_job_records_the_error_and_no_result():
+    queue = ItineraryJobQueue(workers=1)
+
+    async def run():
+        raise RuntimeError("AI service is currently busy")
+
+    async def scenario():
+        job = await queue.submit(run)
+        finished = await wait_until_finished(queue, job["job_id"])
+        result = await queue.get_result(job["job_id"])
+        await queue.stop()
+        return finished, result
+
+    finished, result = asyncio.run(scenario())
+    assert finished["status"] == "failed"
+    assert finished["error"] == "AI service is currently busy"
+    assert result is None
+
+
+def test_full_queue_rejects_and_stop_fails_waiting_jobs():
+    queue = ItineraryJobQueue(workers=1, max_queue=1)
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def blocked():
+            await gate.wait()
+            return {}
+
+        running = await queue.submit(blocked)
+        # Let the worker pick up the first job so the second one waits in the queue
+        await asyncio.sleep(0.01)
+        waiting = await queue.submit(blocked)
+        with pytest.raises(JobQueueFullError):
+            await queue.submit(blocked)
+        await queue.stop()
+        return await queue.get(running["job_id"]), await queue.get(waiting["job_id"])
+
+    running, waiting = asyncio.run(scenario())
+    assert running["status"] == "failed"
+    assert waiting["status"] == "failed"
+    assert queue.stats()["rejected"] == 1
+
+
+def test_detached_request_keeps_the_origin_for_image_proxying():
+    request = Request({
+        "type": "http",
+        "method": "POST",
+        "scheme": "https",
+        "server": ("10.0.0.5", 8000),
+        "path": "/itinerary/jobs",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"api.safarbot.com"), (b"user-agent", b"pytest"), (b"authorization", b"Bearer x")],
+        "client": ("203.0.113.9", 50000),
+    })
+
+    detached = _DetachedRequest(request)
+
+    assert get_backend_url_from_request(detached) == "https://api.safarbot.com"
+    assert detached.url.path == "/itinerary/jobs"
+    assert detached.client.host == "203.0.113.9"
+    assert detached.headers == {"host": "api.safarbot.com", "user-agent": "pytest"}
+    assert asyncio.run(detached.is_disconnected()) is False
@@ -0,0 +1,16 @@
+"""
+Cache-key canonicalization of free-text locations
+"""
+
+from utils.location_utils import canonicalize_location
+
+
+def test_spelling_case_and_whitespace_are_ignored():
+    assert canonicalize_location("Goa, India") == canonicalize_location(" goa ,  INDIA ") == "goa|IN"
+    assert canonicalize_location("New York, NY, USA") == "new york|ny|US"
+
+
+def test_unknown_country_is_not_guessed():
+    assert canonicalize_location("Goa") == "goa"
+    assert canonicalize_location("Paris") != canonicalize_location("Paris, France")
+    assert canonicalize_location("Springfield, Illinois") == "springfield|illinois"
@@ -0,0 +1,67 @@
+"""
+SERP quota governor: token bucket, per-lane budget shares and the reason a
+search was refused
+"""
+
+import asyncio
+
+import pytest
+
+from services import serp_quota as serp_quota_module
+from services.cache_backends import MemoryCacheBackend
+from services.cache_service import CacheService
+from services.serp_quota import SerpPriority, SerpQuotaExceeded, SerpQuotaGovernor
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    # Budgets are counted in the cache; give every test an empty one
+    monkeypatch.setattr(serp_quota_module, "cache_service", CacheService(MemoryCacheBackend()))
+
+
+def test_token_bucket_refuses_prefetch_without_waiting():
+    governor = SerpQuotaGovernor(rate_per_minute=1, burst=2)
+
+    async def scenario():
+        await governor.acquire(SerpPriority.PREFETCH)
+        await governor.acquire(SerpPriority.PREFETCH)
+        with pytest.raises(SerpQuotaExceeded):
+            await governor.acquire(SerpPriority.PREFETCH)
+
+    asyncio.run(scenario())
+    assert governor.counts(SerpPriority.PREFETCH) == {"allowed": 2, "rate_limited": 1, "budget_denied": 0}
+
+
+def test_interactive_waits_for_a_token():
+    governor = SerpQuotaGovernor(rate_per_minute=600, burst=1)
+
+    async def scenario():
+        await governor.acquire(SerpPriority.INTERACTIVE)
+        # Bucket is empty; a token refills in 0.1s, well inside the interactive wait
+        await governor.acquire(SerpPriority.INTERACTIVE)
+
+    asyncio.run(scenario())
+    assert governor.counts(SerpPriority.INTERACTIVE)["allowed"] == 2
+
+
+def test_budget_shares_keep_headroom_for_higher_lanes():
+    governor = SerpQuotaGovernor(rate_per_minute=6000, burst=100, daily_budget=10)
+
+    async def scenario():
+        # Prefetch may use 60% of the daily budget
+        for _ in range(6):
+            await governor.acquire(SerpPriority.PREFETCH)
+        with pytest.raises(SerpQuotaExceeded):
+            await governor.acquire(SerpPriority.PREFETCH)
+        # ...while interactive searches can still use the rest
+        for _ in range(4):
+            await governor.acquire(SerpPriority.INTERACTIVE)
+        with pytest.raises(SerpQuotaExceeded):
+            await governor.acquire(SerpPriority.INTERACTIVE)
+        return await governor.stats()
+
+    stats = asyncio.run(scenario())
+    # Refused searches are refunded, so only admitted ones count
+    assert stats["daily_used"] == 10
+    assert stats["lanes"]["prefetch"] == {"allowed": 6, "rate_limited": 0, "budget_denied": 1}
+    assert stats["lanes"]["interactive"] == {"allowed": 4, "rate_limited": 0, "budget_denied": 1}
@@ -4,8 +4,8 @@ Places search tool using Google Maps/SERP API for finding hotels, restaurants, a
 
 import logging
 from typing import Dict, List, Optional, Any
-from serpapi import GoogleSearch
 from config import settings
+from services.serp_client import serp_client
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +22,8 @@ class PlacesSearchTool:
             print("      ✅ SERP API key configured - Will use real Google Maps data")
     
     async def search_hotels(self, location: str, check_in: str = None, check_out: str = None, 
-                           rating_min: float = 3.5, max_results: int = 5) -> List[Dict[str, Any]]:
+                           rating_min: float = 3.5, max_results: int = 5,
+                           fallback_on_error: bool = True) -> List[Dict[str, Any]]:
         """
         Search for hotels in a specific location with pagination to fetch ALL available results
         
@@ -32,6 +33,7 @@ class PlacesSearchTool:
             check_out: Check-out date (YYYY-MM-DD format)
             rating_min: Minimum rating filter
             max_results: Maximum number of results to return
+            fallback_on_error: Return fallback data on errors (False re-raises, e.g. for callers that cache)
             
         Returns:
             List of ALL raw SERP API data for hotels (unfiltered, unprocessed)
@@ -48,7 +50,7 @@ class PlacesSearchTool:
             
             # Note: Google Maps engine doesn't support pagination with 'start' parameter
             # We can only get up to 20 results per request, but we can try different queries
-            search = GoogleSearch({
+            results = await serp_client.search({
                 "q": query,
                 "api_key": self.api_key,
                 "engine": "google_maps",
@@ -56,8 +58,6 @@ class PlacesSearchTool:
                 "hl": "en"
             })
             
-            results = search.get_dict()
-            
             # Debug: Check what SERP API returned
             print(f"         🔍 SERP API response keys: {list(results.keys())}")
             local_results = results.get("local_results", [])
@@ -78,10 +78,13 @@ class PlacesSearchTool:
             
         except Exception as e:
             logger.error(f"Error searching hotels: {str(e)}")
+            if not fallback_on_error:
+                raise
             return self._get_fallback_hotels(location, max_results)
     
     async def search_restaurants(self, location: str, cuisine_type: str = None, 
-                               rating_min: float = 4.0, max_results: int = 8) -> List[Dict[str, Any]]:
+                               rating_min: float = 4.0, max_results: int = 8,
+                               fallback_on_error: bool = True) -> List[Dict[str, Any]]:
         """
         Search for restaurants with pagination to fetch ALL available results
         
@@ -90,6 +93,7 @@ class PlacesSearchTool:
             cuisine_type: Type of cuisine (optional)
             rating_min: Minimum rating filter
             max_results: Maximum number of results to return
+            fallback_on_error: Return fallback data on errors (False re-raises, e.g. for callers that cache)
             
         Returns:
             List of ALL raw SERP API data for restaurants (unfiltered, unprocessed)
@@ -102,7 +106,7 @@ class PlacesSearchTool:
             if cuisine_type:
                 query += f" {cuisine_type} cuisine"
             
-            search = GoogleSearch({
+            results = await serp_client.search({
                 "q": query,
                 "api_key": self.api_key,
                 "engine": "google_maps",
@@ -110,8 +114,6 @@ class PlacesSearchTool:
                 "hl": "en"
             })
             
-            results = search.get_dict()
-            
             # Debug: Check what SERP API returned
             print(f"         🔍 SERP API response keys: {list(results.keys())}")
             local_results = results.get("local_results", [])
@@ -132,10 +134,12 @@ class PlacesSearchTool:
             
         except Exception as e:
             logger.error(f"Error searching restaurants: {str(e)}")
+            if not fallback_on_error:
+                raise
             return self._get_fallback_restaurants(location, cuisine_type, max_results)
     
     async def search_cafes(self, location: str, rating_min: float = 4.0, 
-                          max_results: int = 5) -> List[Dict[str, Any]]:
+                          max_results: int = 5, fallback_on_error: bool = True) -> List[Dict[str, Any]]:
         """
         Search for cafes with pagination to fetch ALL available results
         
@@ -143,6 +147,7 @@ class PlacesSearchTool:
             location: Location to search for cafes
             rating_min: Minimum rating filter
             max_results: Maximum number of results to return
+            fallback_on_error: Return fallback data on errors (False re-raises, e.g. for callers that cache)
             
         Returns:
             List of ALL raw SERP API data for cafes (unfiltered, unprocessed)
@@ -151,7 +156,7 @@ class PlacesSearchTool:
             return self._get_fallback_cafes(location, max_results)
         
         try:
-            search = GoogleSearch({
+            results = await serp_client.search({
                 "q": f"cafes coffee shops in {location}",
                 "api_key": self.api_key,
                 "engine": "google_maps",
@@ -159,8 +164,6 @@ class PlacesSearchTool:
                 "hl": "en"
             })
             
-            results = search.get_dict()
-            
             # Debug: Check what SERP API returned
             print(f"         🔍 SERP API response keys: {list(results.keys())}")
             local_results = results.get("local_results", [])
@@ -181,10 +184,12 @@ class PlacesSearchTool:
             
         except Exception as e:
             logger.error(f"Error searching cafes: {str(e)}")
+            if not fallback_on_error:
+                raise
             return self._get_fallback_cafes(location, max_results)
     
     async def search_attractions(self, location: str, interests: List[str] = None, 
-                               max_results: int = 10) -> List[Dict[str, Any]]:
+                               max_results: int = 10, fallback_on_error: bool = True) -> List[Dict[str, Any]]:
         """
         Search for tourist attractions with pagination to fetch ALL available results
         
@@ -192,6 +197,7 @@ class PlacesSearchTool:
             location: Location to search for attractions
             interests: List of interest categories
             max_results: Maximum number of results to return
+            fallback_on_error: Return fallback data on errors (False re-raises, e.g. for callers that cache)
             
         Returns:
             List of ALL raw SERP API data for attractions (unfiltered, unprocessed)
@@ -207,7 +213,7 @@ class PlacesSearchTool:
             else:
                 query = f"tourist attractions things to do in {location}"
             
-            search = GoogleSearch({
+            results = await serp_client.search({
                 "q": query,
                 "api_key": self.api_key,
                 "engine": "google_maps",
@@ -215,8 +221,6 @@ class PlacesSearchTool:
                 "hl": "en"
             })
             
-            results = search.get_dict()
-            
             # Debug: Check what SERP API returned
             print(f"         🔍 SERP API response keys: {list(results.keys())}")
             local_results = results.get("local_results", [])
@@ -237,6 +241,8 @@ class PlacesSearchTool:
             
         except Exception as e:
             logger.error(f"Error searching attractions: {str(e)}")
+            if not fallback_on_error:
+                raise
             return self._get_fallback_attractions(location, interests, max_results)
     
     def _is_hotel(self, place: Dict[str, Any]) -> bool:
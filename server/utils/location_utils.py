@@ -2,6 +2,8 @@
 Utility functions for parsing and extracting location information
 """
 
+from typing import Optional
+
 def extract_city_name(formatted_address: str) -> str:
     """
     Extracts city name from a formatted address string
@@ -30,6 +32,7 @@ def extract_country_code(formatted_address: str) -> str:
     - "Vasco Da Gama, Goa, India" -> "IN"
     - "New York, NY, USA" -> "US"
     - "London, England, UK" -> "GB"
+    - "goa, india" -> "IN" (case-insensitive)
     """
     if not formatted_address:
         return ""
@@ -37,58 +40,60 @@ def extract_country_code(formatted_address: str) -> str:
     parts = [part.strip() for part in formatted_address.split(',')]
     last_part = parts[-1] if parts else ""
     
-    # Map common country names to ISO country codes
-    country_map = {
-        'India': 'IN',
-        'USA': 'US',
-        'United States': 'US',
-        'UK': 'GB',
-        'United Kingdom': 'GB',
-        'England': 'GB',
-        'Canada': 'CA',
-        'Australia': 'AU',
-        'Germany': 'DE',
-        'France': 'FR',
-        'Italy': 'IT',
-        'Spain': 'ES',
-        'Japan': 'JP',
-        'China': 'CN',
-        'Brazil': 'BR',
-        'Mexico': 'MX',
-        'Russia': 'RU',
-        'South Korea': 'KR',
-        'Thailand': 'TH',
-        'Indonesia': 'ID',
-        'Malaysia': 'MY',
-        'Singapore': 'SG',
-        'Philippines': 'PH',
-        'Vietnam': 'VN',
-        'Turkey': 'TR',
-        'Egypt': 'EG',
-        'United Arab Emirates': 'AE',
-        'UAE': 'AE',
-        'South Africa': 'ZA',
-        'Nigeria': 'NG',
-        'Kenya': 'KE',
-        'Morocco': 'MA',
-        'Argentina': 'AR',
-        'Chile': 'CL',
-        'Peru': 'PE',
-        'Colombia': 'CO',
-        'Venezuela': 'VE',
-        'Ecuador': 'EC',
-        'Bolivia': 'BO',
-        'Paraguay': 'PY',
-        'Uruguay': 'UY',
-        'Guyana': 'GY',
-        'Suriname': 'SR',
-        'French Guiana': 'GF',
-        'Falkland Islands': 'FK',
-        'South Georgia': 'GS',
-        'Antarctica': 'AQ'
-    }
-    
-    return country_map.get(last_part, "")
+    return _COUNTRY_CODES.get(" ".join(last_part.split()).casefold(), "")
+
+
+# Map common country names to ISO country codes
+_COUNTRY_MAP = {
+    'India': 'IN',
+    'USA': 'US',
+    'United States': 'US',
+    'UK': 'GB',
+    'United Kingdom': 'GB',
+    'England': 'GB',
+    'Canada': 'CA',
+    'Australia': 'AU',
+    'Germany': 'DE',
+    'France': 'FR',
+    'Italy': 'IT',
+    'Spain': 'ES',
+    'Japan': 'JP',
+    'China': 'CN',
+    'Brazil': 'BR',
+    'Mexico': 'MX',
+    'Russia': 'RU',
+    'South Korea': 'KR',
+    'Thailand': 'TH',
+    'Indonesia': 'ID',
+    'Malaysia': 'MY',
+    'Singapore': 'SG',
+    'Philippines': 'PH',
+    'Vietnam': 'VN',
+    'Turkey': 'TR',
+    'Egypt': 'EG',
+    'United Arab Emirates': 'AE',
+    'UAE': 'AE',
+    'South Africa': 'ZA',
+    'Nigeria': 'NG',
+    'Kenya': 'KE',
+    'Morocco': 'MA',
+    'Argentina': 'AR',
+    'Chile': 'CL',
+    'Peru': 'PE',
+    'Colombia': 'CO',
+    'Venezuela': 'VE',
+    'Ecuador': 'EC',
+    'Bolivia': 'BO',
+    'Paraguay': 'PY',
+    'Uruguay': 'UY',
+    'Guyana': 'GY',
+    'Suriname': 'SR',
+    'French Guiana': 'GF',
+    'Falkland Islands': 'FK',
+    'South Georgia': 'GS',
+    'Antarctica': 'AQ'
+}
+_COUNTRY_CODES = {name.casefold(): code for name, code in _COUNTRY_MAP.items()}
 
 
 def parse_location_for_weather(formatted_address: str) -> tuple[str, str]:
@@ -103,4 +108,34 @@ def parse_location_for_weather(formatted_address: str) -> tuple[str, str]:
     return city, country_code
 
 
-
+def canonicalize_location(location: str) -> str:
+    """
+    Canonical form of a free-text location for cache keys
+    
+    Case, surrounding/repeated whitespace and the spelling of the country are
+    ignored. A location without a recognized country keeps no country code:
+    guessing one would make searches for different places share an entry.
+    
+    Examples:
+    - "Goa", "goa " -> "goa"
+    - "Goa, India", "goa, india" -> "goa|IN"
+    - "Vasco Da Gama, Goa, India" -> "vasco da gama|goa|IN"
+    - "New York, NY, USA" -> "new york|ny|US"
+    """
+    if not location:
+        return ""
+    
+    def normalize(part: str) -> str:
+        return " ".join(part.split()).casefold()
+    
+    city = normalize(extract_city_name(location))
+    regions = [normalize(part) for part in location.split(',')[1:]]
+    regions = [part for part in regions if part]
+    if not city and not regions:
+        return ""
+    
+    country_code = extract_country_code(location) if regions else ""
+    if country_code:
+        regions = regions[:-1]
+    
+    return "|".join(part for part in [city, *regions, country_code] if part)
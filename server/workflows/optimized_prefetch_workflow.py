@@ -7,13 +7,16 @@ Optimized Pre-fetch Workflow
 """
 
 import asyncio
+import copy
+import hashlib
 import json
 import logging
+import math
 import os
 import re
 import time
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 
 from fastapi import HTTPException
 from google import genai
@@ -22,14 +25,38 @@ from starlette.requests import Request
 from config import settings
 from mongo_models import AIProvider, AITaskType
 from services.ai_tracking_service import ai_tracking_service
+from services.cache_service import cache_service
+from services.circuit_breaker import CircuitOpenError, get_breaker
+from services.itinerary_index import itinerary_index
+from services.llm_limiter import LLMBusyError, llm_limiter
 from services.serp_cache_service import cached_places_tool
+from services.tracing import span, start_trace, trace_scope, traced, traced_call
+from utils.location_utils import canonicalize_location
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever _itinerary_prompt or the expected response shape changes; keys the LLM response cache
+ITINERARY_PROMPT_VERSION = "2"
+LLM_CACHE_NAMESPACE = "llm_itinerary"
+# Share of a similar itinerary's places that must be among this request's prefetched places to reuse it
+REUSE_MIN_PLACE_OVERLAP = 0.6
+# Map-reduce generation: per-day calls in flight per request, and the categories dealt into day pools
+MAP_REDUCE_CONCURRENCY = 4
+DAY_POOL_CATEGORIES = ("attractions", "restaurants", "cafes", "interest_based")
+# Splits a skeleton day's area ("Baga & Calangute", "Old Town / Fontainhas") into names
+AREA_SEPARATORS = re.compile(r"[,/&;()]|\band\b")
+# Prompt compaction: places are listed under short ids (H1, R3, ...) best-ranked first
+SHORT_ID_PREFIXES = {"hotels": "H", "restaurants": "R", "cafes": "C", "attractions": "A", "interest_based": "I"}
+DEFAULT_RANK_RATING = 3.5
+INTEREST_MATCH_BOOST = 0.5
+# Upper bounds (USD) of the budget bands used in LLM cache keys
+BUDGET_BANDS = (500, 1000, 2000, 5000, 10000, 25000)
+
 EMPTY_PLACES = {"hotels": [], "restaurants": [], "cafes": [], "attractions": [], "interest_based": []}
 CATEGORIES = ("hotels", "restaurants", "cafes", "attractions", "interest_based")
 
 
+@traced("json_repair")
 def _clean_json(text: str) -> str:
     """Extract valid JSON from LLM response."""
     if not text:
@@ -58,6 +85,27 @@ def _fix_json(text: str) -> str:
     return re.sub(r",\s*,", ",", text).strip()
 
 
+def _budget_band(budget: Optional[float], budget_range: Optional[str]) -> str:
+    """Coarse budget label: the requested range, else the band the amount falls in."""
+    if budget_range and budget_range.strip():
+        return budget_range.strip().casefold()
+    if not budget:
+        return "flexible"
+    for upper in BUDGET_BANDS:
+        if budget <= upper:
+            return f"<={upper}"
+    return f">{BUDGET_BANDS[-1]}"
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough Gemini token count (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _inputs_key(inputs: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
 def _parse_price(value: Any) -> float:
     """Extract average numeric value from price strings like '$25-40'."""
     if value is None:
@@ -70,6 +118,78 @@ def _parse_price(value: Any) -> float:
     return sum(float(a) for a in amounts) / len(amounts) if amounts else 0.0
 
 
+class _IncompleteItinerary(Exception):
+    """A map-reduce generation left days empty; carries the entry so it is served but not cached."""
+
+    def __init__(self, entry: Dict[str, Any], missing_days: List[int]):
+        super().__init__(f"itinerary is missing days {missing_days}")
+        self.entry = entry
+
+
+class _JsonArrayStream:
+    """Pull complete objects out of named JSON arrays while the text is still arriving."""
+
+    def __init__(self, keys: Iterable[str]):
+        self.text = ""
+        self._arrays = {
+            key: {"pattern": re.compile(rf'"{re.escape(key)}"\s*:\s*\['), "pos": None, "depth": 0,
+                  "in_str": False, "escape": False, "start": None, "done": False}
+            for key in keys
+        }
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Append ``chunk``; returns (key, object) for every array element completed by it."""
+        self.text += chunk
+        found = []
+        for key, st in self._arrays.items():
+            if st["done"]:
+                continue
+            if st["pos"] is None:
+                m = st["pattern"].search(self.text)
+                if not m:
+                    continue
+                st["pos"] = m.end()
+            text, i = self.text, st["pos"]
+            while i < len(text):
+                c = text[i]
+                if st["in_str"]:
+                    if st["escape"]:
+                        st["escape"] = False
+                    elif c == "\\":
+                        st["escape"] = True
+                    elif c == '"':
+                        st["in_str"] = False
+                elif c == '"':
+                    st["in_str"] = True
+                elif c in "{[":
+                    if st["depth"] == 0:
+                        st["start"] = i
+                    st["depth"] += 1
+                elif c in "}]":
+                    if st["depth"] == 0:
+                        st["done"] = True
+                        break
+                    st["depth"] -= 1
+                    if st["depth"] == 0 and st["start"] is not None:
+                        item = self._parse(text[st["start"] : i + 1])
+                        if isinstance(item, dict):
+                            found.append((key, item))
+                        st["start"] = None
+                i += 1
+            st["pos"] = i
+        return found
+
+    @staticmethod
+    def _parse(text: str) -> Optional[Any]:
+        for candidate in (text, _fix_json(text)):
+            try:
+                return json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+        logger.debug("Skipping unparseable streamed element: %.200s", text)
+        return None
+
+
 class OptimizedPrefetchWorkflow:
     """Pre-fetches SERP data, generates itinerary via LLM, maps place IDs to metadata."""
 
@@ -87,6 +207,9 @@ class OptimizedPrefetchWorkflow:
         if not getattr(settings, "google_api_key", None):
             raise ValueError("Google API key is required")
         self.client = genai.Client(api_key=settings.google_api_key)
+        # google-genai retries on its own; the breaker fails fast while Gemini is down
+        # A client disconnect (HTTPException 499) checked between streamed chunks is not a Gemini failure
+        self.llm_breaker = get_breaker("gemini", max_retries=0, ignore=(HTTPException,))
         self.places_tool = cached_places_tool
         self.base_summary_limit, self.max_summary_limit = 5, 10
         logger.info("Optimized prefetch workflow initialized")
@@ -119,19 +242,179 @@ class OptimizedPrefetchWorkflow:
         logger.info("Starting itinerary generation for %s (%s to %s)", destination, start_date, end_date)
 
         try:
+            with trace_scope() as trace:
+                weather_task = self._start_weather_task(destination)
+                dynamic_limits, summary_limit = self._dynamic_limits(start_date, end_date)
+                all_places = await self._prefetch_places(destination, interests, dynamic_limits, request)
+                itinerary_data, weather_data, complete = await self._generate_itinerary(
+                    destination, start_date, end_date, budget, budget_range, interests, travelers,
+                    travel_companion, trip_pace, departure_city, flight_class_preference,
+                    hotel_rating_preference, accommodation_type, email, dietary_preferences,
+                    halal_preferences, vegetarian_preferences, all_places, weather_task, summary_limit, request
+                )
+                response = await self._build_response(itinerary_data, all_places, weather_data, request)
+            response["metadata"]["complete"] = complete
+            response["metadata"]["timings"] = trace.summary()
+            logger.info("Itinerary stage timings for %s: %s", destination, response["metadata"]["timings"])
+            return response
+        except Exception as e:
+            logger.error("Itinerary workflow error: %s", e)
+            raise
+
+    async def stream_complete_itinerary(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: Optional[float] = None,
+        budget_range: Optional[str] = None,
+        interests: Optional[List[str]] = None,
+        travelers: int = 1,
+        travel_companion: Optional[str] = None,
+        trip_pace: Optional[str] = None,
+        departure_city: Optional[str] = None,
+        flight_class_preference: Optional[str] = None,
+        hotel_rating_preference: Optional[str] = None,
+        accommodation_type: Optional[str] = None,
+        email: Optional[str] = None,
+        dietary_preferences: Optional[List[str]] = None,
+        halal_preferences: Optional[str] = None,
+        vegetarian_preferences: Optional[str] = None,
+        request: Optional[Request] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming generate_complete_itinerary: yields {"event", "data"} dicts.
+
+        Events: started, places, weather, one "day" per daily plan as soon as it
+        parses from the model stream, then "complete" with the full response
+        (or "error").
+        """
+        interests = interests or []
+        dietary_preferences = dietary_preferences or []
+        trace = start_trace()
+        yield {"event": "started", "data": {"destination": destination, "start_date": start_date, "end_date": end_date}}
+
+        try:
+            await self._check_request(request)
             weather_task = self._start_weather_task(destination)
             dynamic_limits, summary_limit = self._dynamic_limits(start_date, end_date)
             all_places = await self._prefetch_places(destination, interests, dynamic_limits, request)
-            itinerary_data, weather_data = await self._generate_itinerary(
+            yield {"event": "places", "data": {
+                "counts": {cat: len(places) for cat, places in all_places.items()},
+                "total_places_prefetched": sum(len(places) for places in all_places.values()),
+            }}
+
+            gen = await self._prepare_generation(
                 destination, start_date, end_date, budget, budget_range, interests, travelers,
                 travel_companion, trip_pace, departure_city, flight_class_preference,
                 hotel_rating_preference, accommodation_type, email, dietary_preferences,
                 halal_preferences, vegetarian_preferences, all_places, weather_task, summary_limit, request
             )
-            return await self._build_response(itinerary_data, all_places, weather_data, request)
+            prompt, weather_data, total_days, inputs = gen["prompt"], gen["weather_data"], gen["total_days"], gen["inputs"]
+            weather_ok = weather_data is not None and "error" not in weather_data
+            yield {"event": "weather", "data": {"weather": weather_data if weather_ok else None, "weather_included": weather_ok}}
+
+            place_map = self._place_map(all_places)
+            cache_key = _inputs_key(inputs) if inputs else None
+            cached = await cache_service.get(LLM_CACHE_NAMESPACE, cache_key) if cache_key else None
+            if not cached and inputs:
+                cached = await self._reuse_similar(inputs, all_places, start_date, total_days)
+                if cached:
+                    await cache_service.set(LLM_CACHE_NAMESPACE, cache_key, copy.deepcopy(cached), ttl=settings.llm_cache_ttl_seconds)
+            complete = True
+            if cached:
+                self._log_cache_lookup(True, cached)
+                data = self._itinerary_from_entry(cached, start_date)
+                # One span for the whole replay rather than one per day
+                with span("place_metadata"):
+                    events = [
+                        self._day_event(copy.deepcopy(day), index, total_days, place_map)
+                        for index, day in enumerate(data.get("daily_plans", []))
+                    ]
+                for event in events:
+                    yield event
+            else:
+                if cache_key:
+                    self._log_cache_lookup(False)
+                stream = _JsonArrayStream(("accommodation_suggestions", "daily_plans"))
+                short_to_real = {short: pid for pid, short in gen["short_ids"].items()}
+                partial: Dict[str, List[Dict[str, Any]]] = {"accommodation_suggestions": [], "daily_plans": []}
+                chunks: List[str] = []
+                usage = None
+                start_time = time.time()
+                try:
+                    async with llm_limiter.slot():
+                        with self.llm_breaker.guard(), span("llm"):
+                            async for chunk in await self.client.aio.models.generate_content_stream(
+                                model="gemini-2.5-flash", contents=prompt
+                            ):
+                                await self._check_request(request)
+                                usage = getattr(chunk, "usage_metadata", None) or usage
+                                text = chunk.text or ""
+                                chunks.append(text)
+                                for key, item in stream.feed(text):
+                                    if key == "daily_plans":
+                                        self._expand_short_ids(item, gen["short_ids"])
+                                    elif item.get("place_id") in short_to_real:
+                                        item["place_id"] = short_to_real[item["place_id"]]
+                                    partial[key].append(item)
+                                    if key != "daily_plans":
+                                        continue
+                                    # Duplicate fixing is order-dependent, so replaying it over the
+                                    # days so far gives each day the ids it will have in the final response.
+                                    # Untraced: this preview work is already inside the "llm" span.
+                                    fixed = self._dedupe_place_ids(copy.deepcopy(partial), all_places)
+                                    yield self._day_event(fixed["daily_plans"][-1], len(partial["daily_plans"]) - 1, total_days, place_map)
+
+                    text = "".join(chunks).strip()
+                    elapsed = (time.time() - start_time) * 1000
+                    prompt_tok = getattr(usage, "prompt_token_count", 0) if usage else len(prompt) // 4
+                    completion_tok = getattr(usage, "candidates_token_count", 0) if usage else len(text) // 4
+                    text = _clean_json(text)
+                    try:
+                        data = self._expand_short_ids(self._parse_itinerary_text(text), gen["short_ids"])
+                    except json.JSONDecodeError:
+                        if not partial["daily_plans"]:
+                            raise
+                        # Keep the days that already reached the client
+                        data = {**self._fallback_itinerary(destination, total_days, budget), **partial}
+                        complete = False
+                    data = self._fix_duplicate_place_ids(data, all_places)
+                    await self._log_ai_usage(request, True, prompt_tok, completion_tok, prompt, text[:1000],
+                        destination, start_date, end_date, total_days, budget, interests, travelers, data, elapsed,
+                        compaction=gen["compaction"])
+                    if cache_key and complete:
+                        entry = self._cache_entry(data, start_date, prompt_tok, completion_tok, all_places, elapsed)
+                        await cache_service.set(LLM_CACHE_NAMESPACE, cache_key, copy.deepcopy(entry), ttl=settings.llm_cache_ttl_seconds)
+                        await itinerary_index.add(cache_key, inputs)
+                except (HTTPException, LLMBusyError):
+                    raise
+                except Exception as e:
+                    elapsed = (time.time() - start_time) * 1000
+                    logger.error("LLM streaming generation error: %s", e)
+                    await self._log_ai_usage(request, False, len(prompt) // 4, 0, prompt, "", destination,
+                        start_date, end_date, total_days, None, [], 0, None, elapsed, str(e))
+                    data = {**self._fallback_itinerary(destination, total_days, budget), **partial}
+                    data = self._fix_duplicate_place_ids(data, all_places)
+                    complete = False
+
+            response = await self._build_response(data, all_places, weather_data, request)
+            response["metadata"]["complete"] = complete
+            response["metadata"]["streamed"] = True
+            response["metadata"]["timings"] = trace.summary()
+            yield {"event": "complete", "data": response}
+        except HTTPException as e:
+            # Client went away; nobody is listening for an error event
+            logger.info("Itinerary stream stopped: %s", e.detail)
         except Exception as e:
-            logger.error("Itinerary workflow error: %s", e)
-            raise
+            logger.error("Itinerary stream error: %s", e)
+            yield {"event": "error", "data": {"message": str(e)}}
+
+    def _day_event(
+        self, day: Dict[str, Any], index: int, total_days: int, place_map: Dict[str, Dict]
+    ) -> Dict[str, Any]:
+        view = {"daily_plans": [day]}
+        self._merge_place_metadata(view, place_map)
+        return {"event": "day", "data": {"index": index, "total_days": total_days, "day": day}}
 
     def _start_weather_task(self, destination: str) -> Optional[asyncio.Task]:
         try:
@@ -158,6 +441,7 @@ class OptimizedPrefetchWorkflow:
         summary = min(self.base_summary_limit + mult, self.max_summary_limit)
         return limits, summary
 
+    @traced("prefetch")
     async def _prefetch_places(
         self,
         destination: str,
@@ -167,14 +451,16 @@ class OptimizedPrefetchWorkflow:
     ) -> Dict[str, List[Dict[str, Any]]]:
         await self._check_request(request)
         tasks = [
-            self.places_tool.search_hotels_cached(destination, max_results=limits["hotels"]),
-            self.places_tool.search_restaurants_cached(destination, max_results=limits["restaurants"]),
-            self.places_tool.search_cafes_cached(destination, max_results=limits["cafes"]),
-            self.places_tool.search_attractions_cached(destination, interests, max_results=limits["attractions"]),
+            traced_call("prefetch.hotels", self.places_tool.search_hotels_cached(destination, max_results=limits["hotels"])),
+            traced_call("prefetch.restaurants", self.places_tool.search_restaurants_cached(destination, max_results=limits["restaurants"])),
+            traced_call("prefetch.cafes", self.places_tool.search_cafes_cached(destination, max_results=limits["cafes"])),
+            traced_call("prefetch.attractions", self.places_tool.search_attractions_cached(destination, interests, max_results=limits["attractions"])),
         ]
         for interest in interests[:3]:
             if interest not in ("city", "sightseeing"):
-                tasks.append(self.places_tool.raw_serp_search_cached(f"{interest} places in {destination}"))
+                tasks.append(traced_call(
+                    "prefetch.interest_based", self.places_tool.raw_serp_search_cached(f"{interest} places in {destination}")
+                ))
 
         results = await asyncio.gather(*tasks, return_exceptions=True)
         data = dict(EMPTY_PLACES)
@@ -186,8 +472,13 @@ class OptimizedPrefetchWorkflow:
             if not isinstance(r, Exception) and r:
                 data["interest_based"].extend(r)
 
+        # A place found by several queries (a hotel that is also an attraction)
+        # is offered once, under the first category that found it
+        seen_ids: Set[str] = set()
         for cat in CATEGORIES:
-            data[cat] = self._filter_places(data[cat], cat, limits.get(cat, 99))
+            unseen = [p for p in data[cat] if not p.get("place_id") or p["place_id"] not in seen_ids]
+            data[cat] = self._filter_places(unseen, cat, limits.get(cat, 99))
+            seen_ids.update(p["place_id"] for p in data[cat] if p.get("place_id"))
 
         pid = 1
         for cat, places in data.items():
@@ -229,20 +520,108 @@ class OptimizedPrefetchWorkflow:
                 break
         return out if out else places[:max_n]
 
-    def _places_summary(self, data: Dict[str, List], limit: Optional[int] = None) -> str:
+    def _places_summary(
+        self, data: Dict[str, List], limit: Optional[int] = None, short_ids: Optional[Dict[str, str]] = None
+    ) -> str:
         limit = limit or self.base_summary_limit
         lines = []
         for cat, places in data.items():
             if not places:
                 continue
             lines.append(f"\n{cat.upper()}:")
-            for p in places[:limit]:
-                pid = p.get("place_id", "unknown")
-                name = p.get("title") or p.get("name") or "Unknown"
-                r = p.get("rating")
-                lines.append(f"  - {pid}: {name}" + (f" (★{r})" if r else ""))
+            lines.extend(self._summary_line(p, short_ids) for p in places[:limit])
         return "\n".join(lines)
 
+    @staticmethod
+    def _summary_line(p: Dict[str, Any], short_ids: Optional[Dict[str, str]] = None) -> str:
+        pid = p.get("place_id", "unknown")
+        name = p.get("title") or p.get("name") or "Unknown"
+        r = p.get("rating")
+        if short_ids is None:
+            return f"  - {pid}: {name}" + (f" (★{r})" if r else "")
+        return f"{short_ids.get(pid, pid)}: {name}" + (f" ★{r}" if r else "")
+
+    @staticmethod
+    def _rank_score(p: Dict[str, Any], interests: List[str]) -> float:
+        """rating × log(review count) × interest match"""
+        try:
+            rating = float(p.get("rating") or DEFAULT_RANK_RATING)
+            reviews = float(p.get("reviews") or 0)
+        except (TypeError, ValueError):
+            rating, reviews = DEFAULT_RANK_RATING, 0.0
+        text = " ".join(
+            str(v) for v in (p.get("title"), p.get("name"), p.get("type"), *(p.get("types") or [])) if v
+        ).casefold()
+        matches = sum(1 for i in interests if i and i.strip().casefold() in text)
+        return rating * math.log10(reviews + 10) * (1 + INTEREST_MATCH_BOOST * matches)
+
+    def _compact_places(
+        self, all_places: Dict[str, List[Dict]], interests: List[str], limit: Optional[int]
+    ) -> Tuple[str, Dict[str, List[Dict]], Dict[str, str], Dict[str, Any]]:
+        """Rank places, give them short ids and fit the prompt's place list into the token budget.
+
+        Returns (summary, offered places per category, place_id -> short id, compaction stats).
+        Categories take turns adding their next best place, so a tight budget
+        trims every category rather than dropping the last ones.
+        """
+        limit = limit or self.base_summary_limit
+        ranked = {
+            cat: sorted(places, key=lambda p: self._rank_score(p, interests), reverse=True)
+            for cat, places in all_places.items()
+        }
+        # Every prefetched place gets a short id (day prompts draw on places beyond the summary)
+        short_ids: Dict[str, str] = {}
+        for cat, places in ranked.items():
+            prefix = SHORT_ID_PREFIXES.get(cat, cat[:1].upper())
+            for n, p in enumerate(places, 1):
+                if p.get("place_id"):
+                    short_ids[p["place_id"]] = f"{prefix}{n}"
+
+        budget = settings.prompt_places_token_budget
+        offered: Dict[str, List[Dict]] = {cat: [] for cat in ranked}
+        used_tokens, full = 0, False
+        for i in range(limit):
+            for cat, places in ranked.items():
+                if i >= len(places) or full:
+                    continue
+                cost = _estimate_tokens(self._summary_line(places[i], short_ids)) + (0 if i else _estimate_tokens(cat) + 1)
+                if budget and used_tokens + cost > budget:
+                    full = True
+                    continue
+                offered[cat].append(places[i])
+                used_tokens += cost
+        offered = {cat: places for cat, places in offered.items() if places}
+
+        summary = self._places_summary(offered, limit, short_ids)
+        uncompacted = _estimate_tokens(self._places_summary(all_places, limit))
+        compacted = _estimate_tokens(summary)
+        stats = {
+            "places_offered": sum(len(p) for p in offered.values()),
+            "places_available": sum(len(p) for p in all_places.values()),
+            "summary_tokens": compacted,
+            "uncompacted_summary_tokens": uncompacted,
+            "token_budget": budget,
+            "reduction_pct": round(100 * (1 - compacted / uncompacted), 1) if uncompacted else 0.0,
+        }
+        return summary, offered, short_ids, stats
+
+    @staticmethod
+    def _expand_short_ids(data: Any, short_ids: Dict[str, str]) -> Any:
+        """Replace the short ids the model answered with by the real place_ids (in place)."""
+        if not isinstance(data, dict) or not short_ids:
+            return data
+        real = {short: pid for pid, short in short_ids.items()}
+        items = list(data.get("accommodation_suggestions") or [])
+        plans = data.get("daily_plans") or ([data] if "activities" in data else [])
+        for day in plans:
+            items += (day.get("activities") or []) + (day.get("meals") or [])
+        for item in items:
+            if isinstance(item, dict) and item.get("place_id") in real:
+                item["place_id"] = real[item["place_id"]]
+        if isinstance(data.get("place_ids_used"), list):
+            data["place_ids_used"] = [real.get(pid, pid) for pid in data["place_ids_used"]]
+        return data
+
     def _format_weather(self, w: Optional[Dict], dest: str) -> str:
         if not w or "error" in w:
             return "Weather data unavailable - plan for various conditions"
@@ -257,6 +636,7 @@ class OptimizedPrefetchWorkflow:
             s += f". Recommendations: {'; '.join(recs)}"
         return s
 
+    @traced("weather")
     async def _get_weather_info(
         self, task: Optional[asyncio.Task], destination: str, request: Optional[Request]
     ) -> Tuple[Optional[Dict], str]:
@@ -275,6 +655,64 @@ class OptimizedPrefetchWorkflow:
                 logger.warning("Weather fetch failed: %s", e)
         return w, self._format_weather(w, destination)
 
+    @staticmethod
+    def _trip_brief(
+        destination: str, start_date: str, end_date: str, weather_info: str, budget_str: str, **ctx
+    ) -> str:
+        """Traveler and trip lines shared by every itinerary prompt."""
+        dietary = ", ".join(ctx.get("dietary_preferences") or []) or "No restrictions"
+        return f"""DESTINATION: {destination} | DATES: {start_date} to {end_date} | TRAVELERS: {ctx.get('travel_companion') or f"{ctx.get('travelers', 1)} people"}
+BUDGET: {budget_str} | PACE: {ctx.get('trip_pace') or 'Balanced'} | INTERESTS: {', '.join(ctx.get('interests') or [])}
+ACCOMMODATION: {ctx.get('hotel_rating_preference') or ctx.get('accommodation_type') or 'Standard'} | DIETARY: {dietary}
+WEATHER: {weather_info}"""
+
+    def _skeleton_prompt(self, destination: str, total_days: int, brief: str, places_summary: str) -> str:
+        return f"""You are an expert travel planner. Outline a {total_days}-day trip to {destination}; each day is detailed separately.
+
+{brief}
+
+AVAILABLE PLACES:
+{places_summary}
+
+RULES: 1) Give every day a theme and one main area/neighbourhood; group nearby sights to limit travel. 2) 2-4 accommodations, using ONLY the HOTELS place_ids above. 3) EXACTLY 10-12 travel tips. 4) Return ONLY valid JSON, no markdown.
+
+JSON structure: {{"accommodation_suggestions":[{{"place_id","name","type","location","price_range"}}],"days":[{{"day","date","theme","area"}}],"travel_tips":[]}}
+
+Generate the outline now:"""
+
+    def _day_prompt(
+        self,
+        destination: str,
+        total_days: int,
+        brief: str,
+        outline: Dict[str, Any],
+        pool: Dict[str, List[Dict]],
+        hotel_id: Optional[str],
+        short_ids: Dict[str, str],
+    ) -> str:
+        d = outline["day"]
+        hotel = f"hotel place_id {hotel_id}" if hotel_id else "the hotel"
+        if d == 1:
+            bookend = f"Start with check-in at {hotel} (type accommodation) and include dinner."
+        elif d == total_days:
+            bookend = f"Check out of {hotel} and end with dinner before departure."
+        else:
+            bookend = "Start and end the day at the hotel."
+        summary = self._places_summary(pool, max((len(p) for p in pool.values()), default=0), short_ids)
+        return f"""You are an expert travel planner. Detail day {d} of a {total_days}-day trip to {destination}.
+
+{brief}
+DAY {d} ({outline['date']}): theme "{outline.get('theme') or 'Explore'}", area "{outline.get('area') or destination}"
+
+AVAILABLE PLACES FOR THIS DAY (use ONLY these place_ids, each at most once):
+{summary}
+
+RULES: 1) 2-4 activities, 3-4 meals. 2) {bookend} 3) Return ONLY valid JSON, no markdown.
+
+JSON structure: {{"day":{d},"date":"{outline['date']}","theme":"...","activities":[{{"time","place_id","title","duration","estimated_cost","type"}}],"meals":[{{"time","meal_type","place_id","name","cuisine","price_range"}}],"transportation":[{{"from","to","method","duration","cost"}}]}}
+
+Generate day {d} now:"""
+
     def _itinerary_prompt(
         self,
         destination: str,
@@ -286,13 +724,9 @@ class OptimizedPrefetchWorkflow:
         budget_str: str,
         **ctx,
     ) -> str:
-        dietary = ", ".join(ctx.get("dietary_preferences") or []) or "No restrictions"
         return f"""You are an expert travel planner. Create a {total_days}-day itinerary for {destination}.
 
-DESTINATION: {destination} | DATES: {start_date} to {end_date} | TRAVELERS: {ctx.get('travel_companion') or f"{ctx.get('travelers', 1)} people"}
-BUDGET: {budget_str} | PACE: {ctx.get('trip_pace') or 'Balanced'} | INTERESTS: {', '.join(ctx.get('interests') or [])}
-ACCOMMODATION: {ctx.get('hotel_rating_preference') or ctx.get('accommodation_type') or 'Standard'} | DIETARY: {dietary}
-WEATHER: {weather_info}
+{self._trip_brief(destination, start_date, end_date, weather_info, budget_str, **ctx)}
 
 AVAILABLE PLACES (use ONLY these place_ids):
 {places_summary}
@@ -303,7 +737,7 @@ JSON structure: {{"destination":"...","total_days":N,"budget_estimate":0,"accomm
 
 Generate the itinerary now:"""
 
-    async def _generate_itinerary(
+    async def _prepare_generation(
         self,
         destination: str,
         start_date: str,
@@ -326,61 +760,416 @@ Generate the itinerary now:"""
         weather_task: Optional[asyncio.Task],
         summary_limit: Optional[int],
         request: Optional[Request],
-    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    ) -> Dict[str, Any]:
+        """Wait for weather and build the prompt.
+
+        Returns prompt, weather_data, total_days, inputs (the normalized LLM
+        cache inputs, None when the cache is disabled), brief (the trip lines
+        for the map-reduce prompts), short_ids (place_id -> id used in prompts)
+        and compaction (place-list token stats).
+        """
         await self._check_request(request)
         start = datetime.strptime(start_date, "%Y-%m-%d")
         end = datetime.strptime(end_date, "%Y-%m-%d")
         total_days = (end - start).days + 1
         weather_data, weather_info = await self._get_weather_info(weather_task, destination, request)
 
-        ctx = locals()
         budget_str = budget_range or (f"${budget} USD" if budget else "Flexible")
+        ctx = dict(
+            interests=interests, travelers=travelers, travel_companion=travel_companion, trip_pace=trip_pace,
+            hotel_rating_preference=hotel_rating_preference, accommodation_type=accommodation_type,
+            dietary_preferences=dietary_preferences,
+        )
+        summary, offered, short_ids, compaction = self._compact_places(all_places, interests, summary_limit)
         prompt = self._itinerary_prompt(
-            destination, start_date, end_date, total_days,
-            self._places_summary(all_places, summary_limit), weather_info, budget_str, **ctx
+            destination, start_date, end_date, total_days, summary, weather_info, budget_str, **ctx
         )
+        inputs = self._generation_inputs(
+            destination, total_days, budget, budget_range, interests, travelers, travel_companion, trip_pace,
+            hotel_rating_preference, accommodation_type, dietary_preferences, offered,
+        ) if settings.llm_cache_ttl_seconds > 0 else None
+        return {
+            "prompt": prompt,
+            "weather_data": weather_data,
+            "total_days": total_days,
+            "inputs": inputs,
+            "brief": self._trip_brief(destination, start_date, end_date, weather_info, budget_str, **ctx),
+            "summary": summary,
+            "short_ids": short_ids,
+            "compaction": compaction,
+        }
 
-        start_time = time.time()
+    def _generation_inputs(
+        self,
+        destination: str,
+        total_days: int,
+        budget: Optional[float],
+        budget_range: Optional[str],
+        interests: List[str],
+        travelers: int,
+        travel_companion: Optional[str],
+        trip_pace: Optional[str],
+        hotel_rating_preference: Optional[str],
+        accommodation_type: Optional[str],
+        dietary_preferences: List[str],
+        offered: Dict[str, List[Dict]],
+    ) -> Dict[str, Any]:
+        """Normalized prompt inputs, hashed into the LLM cache key. Dates and weather
+        are left out: trips of the same length share an itinerary, re-dated on reuse."""
+        inputs = {
+            "version": ITINERARY_PROMPT_VERSION,
+            "destination": canonicalize_location(destination),
+            "days": total_days,
+            "budget": _budget_band(budget, budget_range),
+            "interests": sorted({i.strip().casefold() for i in interests if i and i.strip()}),
+            "travelers": travelers,
+            "companion": (travel_companion or "").strip().casefold(),
+            "pace": (trip_pace or "").strip().casefold(),
+            "accommodation": (hotel_rating_preference or accommodation_type or "").strip().casefold(),
+            "dietary": sorted({d.strip().casefold() for d in dietary_preferences if d and d.strip()}),
+            # The place list exactly as the prompt offers it
+            "places": {
+                cat: [f"{p.get('place_id')}:{p.get('title') or p.get('name')}" for p in places]
+                for cat, places in sorted(offered.items())
+            },
+        }
+        return inputs
+
+    def _cache_entry(
+        self,
+        data: Dict[str, Any],
+        start_date: str,
+        prompt_tok: int,
+        completion_tok: int,
+        all_places: Dict[str, List[Dict]],
+        elapsed_ms: float,
+    ) -> Dict[str, Any]:
+        used = self._extract_used_place_ids(data)
+        return {
+            "itinerary": data, "start_date": start_date,
+            "prompt_tokens": prompt_tok, "completion_tokens": completion_tok, "elapsed_ms": round(elapsed_ms),
+            # Lets a near-duplicate request swap places it did not prefetch for same-category ones
+            "place_categories": {
+                p["place_id"]: cat for cat, places in all_places.items() for p in places if p.get("place_id") in used
+            },
+        }
+
+    def _adapt_itinerary(
+        self, entry: Dict[str, Any], all_places: Dict[str, List[Dict]], start_date: str, total_days: int
+    ) -> Optional[Dict[str, Any]]:
+        """A cached itinerary re-dated, cut to ``total_days`` and re-slotted onto this request's places.
+
+        None when fewer than REUSE_MIN_PLACE_OVERLAP of its places were prefetched this time.
+        """
+        data = self._itinerary_from_entry(entry, start_date)
+        if len(data.get("daily_plans", [])) < total_days:
+            return None
+        data["daily_plans"] = data["daily_plans"][:total_days]
+        data["total_days"] = total_days
+
+        place_map = self._place_map(all_places)
+        slots = list(data.get("accommodation_suggestions", []))
+        for day in data["daily_plans"]:
+            slots += day.get("activities", []) + day.get("meals", [])
+        slots = [slot for slot in slots if slot.get("place_id")]
+        missing = [slot for slot in slots if slot["place_id"] not in place_map]
+        if slots and 1 - len(missing) / len(slots) < REUSE_MIN_PLACE_OVERLAP:
+            return None
+
+        categories = entry.get("place_categories", {})
+        used = {slot["place_id"] for slot in slots} - {slot["place_id"] for slot in missing}
+        for slot in missing:
+            cat = categories.get(slot["place_id"]) or slot["place_id"].split("_")[0]
+            replacement = next((p["place_id"] for p in all_places.get(cat, []) if p.get("place_id") not in used), None)
+            if replacement:
+                slot["place_id"] = replacement
+                used.add(replacement)
+            else:
+                # Keep the suggestion as free text rather than pointing at an unknown place
+                del slot["place_id"]
+        data.pop("place_ids_used", None)
+        return self._fix_duplicate_place_ids(data, all_places)
+
+    async def _reuse_similar(
+        self, inputs: Dict[str, Any], all_places: Dict[str, List[Dict]], start_date: str, total_days: int
+    ) -> Optional[Dict[str, Any]]:
+        """Cache entry adapted from the closest indexed itinerary, if one is similar enough"""
+        if not settings.llm_similar_reuse_enabled:
+            return None
+        started = time.perf_counter()
         try:
-            await self._check_request(request)
-            resp = self.client.models.generate_content(model="gemini-2.5-flash", contents=prompt)
-            text = (resp.text or "").strip()
-            elapsed = (time.time() - start_time) * 1000
+            for similarity, meta in await itinerary_index.nearest(inputs):
+                source = await cache_service.get(LLM_CACHE_NAMESPACE, meta["key"])
+                if source is None:
+                    await itinerary_index.remove(meta["key"])
+                    continue
+                data = self._adapt_itinerary(source, all_places, start_date, total_days)
+                if data is None:
+                    itinerary_index.record_rejected()
+                    continue
+                itinerary_index.record_lookup((time.perf_counter() - started) * 1000, True, source.get("elapsed_ms", 0))
+                logger.info("Reusing itinerary %s for a similar request (similarity %.3f)", meta["key"][:12], similarity)
+                entry = self._cache_entry(
+                    data, start_date, source.get("prompt_tokens", 0), source.get("completion_tokens", 0), all_places, 0
+                )
+                entry.update({"adapted_from": meta["key"], "similarity": similarity})
+                return entry
+        except Exception as e:
+            logger.warning("Similar itinerary lookup failed: %s", e)
+        itinerary_index.record_lookup((time.perf_counter() - started) * 1000, False)
+        return None
+
+    @staticmethod
+    def _itinerary_from_entry(entry: Dict[str, Any], start_date: str) -> Dict[str, Any]:
+        """Private copy of a cached itinerary with its days moved to ``start_date``"""
+        data = copy.deepcopy(entry["itinerary"])
+        if entry.get("start_date") != start_date:
+            start = datetime.strptime(start_date, "%Y-%m-%d")
+            for i, day in enumerate(data.get("daily_plans", [])):
+                offset = day["day"] - 1 if isinstance(day.get("day"), int) and day["day"] > 0 else i
+                day["date"] = (start + timedelta(days=offset)).strftime("%Y-%m-%d")
+        return data
 
-            usage = getattr(resp, "usage_metadata", None)
-            prompt_tok = getattr(usage, "prompt_token_count", 0) if usage else len(prompt) // 4
-            completion_tok = getattr(usage, "candidates_token_count", 0) if usage else len(text) // 4
+    @staticmethod
+    def _log_cache_lookup(hit: bool, entry: Optional[Dict[str, Any]] = None) -> None:
+        ai_tracking_service.log_cache_lookup(
+            AIProvider.GEMINI, "gemini-2.5-flash", AITaskType.ITINERARY_GENERATION, hit,
+            (entry or {}).get("prompt_tokens", 0), (entry or {}).get("completion_tokens", 0),
+        )
 
-            text = _clean_json(text)
+    @staticmethod
+    @traced("json_repair")
+    def _parse_itinerary_text(text: str) -> Dict[str, Any]:
+        """Parse cleaned LLM output, fixing common JSON errors; dumps unparseable text for debugging."""
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            fixed = _fix_json(text)
             try:
-                data = json.loads(text)
-            except json.JSONDecodeError as e:
-                fixed = _fix_json(text)
+                return json.loads(fixed)
+            except json.JSONDecodeError:
+                os.makedirs("debug_responses", exist_ok=True)
+                path = f"debug_responses/failed_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(f"{e}\n---\n{text}\n---\n{fixed}\n")
+                logger.error("JSON parse failed, saved to %s", path)
+                raise
+
+    @staticmethod
+    def _fallback_itinerary(destination: str, total_days: int, budget: Optional[float]) -> Dict[str, Any]:
+        return {
+            "destination": destination, "total_days": total_days, "budget_estimate": budget,
+            "accommodation_suggestions": [], "daily_plans": [], "place_ids_used": [],
+            "travel_tips": ["Explore the local culture", "Try local cuisine"],
+        }
+
+    async def _generate_itinerary(
+        self,
+        destination: str,
+        start_date: str,
+        end_date: str,
+        budget: Optional[float],
+        budget_range: Optional[str],
+        interests: List[str],
+        travelers: int,
+        travel_companion: Optional[str],
+        trip_pace: Optional[str],
+        departure_city: Optional[str],
+        flight_class_preference: Optional[str],
+        hotel_rating_preference: Optional[str],
+        accommodation_type: Optional[str],
+        email: Optional[str],
+        dietary_preferences: List[str],
+        halal_preferences: Optional[str],
+        vegetarian_preferences: Optional[str],
+        all_places: Dict[str, List[Dict]],
+        weather_task: Optional[asyncio.Task],
+        summary_limit: Optional[int],
+        request: Optional[Request],
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]], bool]:
+        """Return (itinerary, weather, complete); complete is False for a fallback or an itinerary with missing days."""
+        gen = await self._prepare_generation(
+            destination, start_date, end_date, budget, budget_range, interests, travelers,
+            travel_companion, trip_pace, departure_city, flight_class_preference,
+            hotel_rating_preference, accommodation_type, email, dietary_preferences,
+            halal_preferences, vegetarian_preferences, all_places, weather_task, summary_limit, request
+        )
+        prompt, weather_data, total_days, inputs = gen["prompt"], gen["weather_data"], gen["total_days"], gen["inputs"]
+
+        await self._check_request(request)
+        cache_key = _inputs_key(inputs) if inputs else None
+        generated = False
+        complete = True
+
+        async def generate() -> Dict[str, Any]:
+            nonlocal generated
+            if inputs:
+                similar = await self._reuse_similar(inputs, all_places, start_date, total_days)
+                if similar:
+                    return similar
+            generated = True
+            start_time = time.time()
+            missing_days: List[int] = []
+            try:
+                if self._use_map_reduce(total_days):
+                    data, text, prompt_tok, completion_tok, missing_days = await self._generate_map_reduce(
+                        destination, start_date, total_days, gen, all_places
+                    )
+                else:
+                    text, prompt_tok, completion_tok = await self._call_llm(prompt)
+                    text = _clean_json(text)
+                    data = self._parse_itinerary_text(text)
+                data = self._expand_short_ids(data, gen["short_ids"])
+                elapsed = (time.time() - start_time) * 1000
+
+                data = self._fix_duplicate_place_ids(data, all_places)
+                await self._log_ai_usage(request, True, prompt_tok, completion_tok, prompt, text[:1000],
+                    destination, start_date, end_date, total_days, budget, interests, travelers, data, elapsed,
+                    compaction=gen["compaction"])
+                entry = self._cache_entry(data, start_date, prompt_tok, completion_tok, all_places, elapsed)
+                if missing_days:
+                    raise _IncompleteItinerary(entry, missing_days)
+                if cache_key:
+                    await itinerary_index.add(cache_key, inputs)
+                return entry
+            except (LLMBusyError, _IncompleteItinerary):
+                raise
+            except Exception as e:
+                elapsed = (time.time() - start_time) * 1000
+                logger.error("LLM generation error: %s", e)
+                await self._log_ai_usage(request, False, len(prompt) // 4, 0, prompt, "", destination,
+                    start_date, end_date, total_days, None, [], 0, None, elapsed, str(e))
+                raise
+
+        try:
+            if cache_key:
+                # Identical concurrent requests share one generation
+                entry = await cache_service.get_or_load(
+                    LLM_CACHE_NAMESPACE, cache_key, generate, ttl=settings.llm_cache_ttl_seconds
+                )
+            else:
+                entry = await generate()
+        except LLMBusyError:
+            raise
+        except _IncompleteItinerary as e:
+            # Served once, but neither cached nor indexed, so the next request generates it again
+            entry = e.entry
+            complete = False
+        except Exception:
+            return self._fallback_itinerary(destination, total_days, budget), weather_data, False
+
+        if cache_key:
+            self._log_cache_lookup(not generated, entry)
+        return self._itinerary_from_entry(entry, start_date), weather_data, complete
+
+    async def _call_llm(self, prompt: str) -> Tuple[str, int, int]:
+        """One Gemini generation in its own limiter slot, through the breaker; returns (text, prompt_tokens, completion_tokens)."""
+        async with llm_limiter.slot():
+            with span("llm"):
+                resp = await self.llm_breaker.call(
+                    lambda: self.client.aio.models.generate_content(model="gemini-2.5-flash", contents=prompt)
+                )
+        text = (resp.text or "").strip()
+        usage = getattr(resp, "usage_metadata", None)
+        prompt_tok = getattr(usage, "prompt_token_count", 0) if usage else len(prompt) // 4
+        completion_tok = getattr(usage, "candidates_token_count", 0) if usage else len(text) // 4
+        return text, prompt_tok, completion_tok
+
+    @staticmethod
+    def _use_map_reduce(total_days: int) -> bool:
+        min_days = settings.itinerary_map_reduce_min_days
+        return bool(min_days) and total_days >= min_days
+
+    @staticmethod
+    def _day_pools(all_places: Dict[str, List[Dict]], outlines: List[Dict[str, Any]]) -> List[Dict[str, List[Dict]]]:
+        """Split the non-hotel places into one disjoint pool per day, following the skeleton's areas.
+
+        A place whose address or name mentions a day's area goes to that day
+        (the emptiest one when several share the area); the rest fill the
+        emptiest pools.
+        """
+        pools: List[Dict[str, List[Dict]]] = [{cat: [] for cat in DAY_POOL_CATEGORIES} for _ in outlines]
+        areas = [
+            [part.strip() for part in AREA_SEPARATORS.split(str(o.get("area") or "").casefold()) if len(part.strip()) >= 3]
+            for o in outlines
+        ]
+        for cat in DAY_POOL_CATEGORIES:
+            for p in all_places.get(cat, []):
+                where = f"{p.get('address') or ''} {p.get('title') or p.get('name') or ''}".casefold()
+                days = [i for i, parts in enumerate(areas) if any(part in where for part in parts)] or range(len(pools))
+                pools[min(days, key=lambda i: len(pools[i][cat]))][cat].append(p)
+        return pools
+
+    async def _generate_map_reduce(
+        self,
+        destination: str,
+        start_date: str,
+        total_days: int,
+        gen: Dict[str, Any],
+        all_places: Dict[str, List[Dict]],
+    ) -> Tuple[Dict[str, Any], str, int, int, List[int]]:
+        """Skeleton call, then concurrent per-day calls; returns (itinerary, skeleton_text, prompt_tokens, completion_tokens, missing_days).
+
+        A day that keeps failing after ``itinerary_day_retries`` retries is left
+        empty and listed in missing_days; the generation fails only if every day does.
+        """
+        tokens = [0, 0]
+        brief, short_ids = gen["brief"], gen["short_ids"]
+        skeleton_prompt = self._skeleton_prompt(destination, total_days, brief, gen["summary"])
+        text, tokens[0], tokens[1] = await self._call_llm(skeleton_prompt)
+        text = _clean_json(text)
+        skeleton = self._parse_itinerary_text(text)
+
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        given = {o.get("day"): o for o in skeleton.get("days", []) if isinstance(o, dict)}
+        outlines = [
+            {**given.get(d, {}), "day": d, "date": (start + timedelta(days=d - 1)).strftime("%Y-%m-%d")}
+            for d in range(1, total_days + 1)
+        ]
+        accommodations = [a for a in skeleton.get("accommodation_suggestions", []) if isinstance(a, dict)]
+        hotel_id = next((a["place_id"] for a in accommodations if a.get("place_id")), None)
+        semaphore = asyncio.Semaphore(MAP_REDUCE_CONCURRENCY)
+
+        async def detail(outline: Dict[str, Any], pool: Dict[str, List[Dict]]) -> Optional[Dict[str, Any]]:
+            prompt = self._day_prompt(destination, total_days, brief, outline, pool, hotel_id, short_ids)
+            for attempt in range(settings.itinerary_day_retries + 1):
                 try:
-                    data = json.loads(fixed)
-                except json.JSONDecodeError:
-                    os.makedirs("debug_responses", exist_ok=True)
-                    path = f"debug_responses/failed_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-                    with open(path, "w", encoding="utf-8") as f:
-                        f.write(f"{e}\n---\n{text}\n---\n{fixed}\n")
-                    logger.error("JSON parse failed, saved to %s", path)
-                    raise
+                    async with semaphore:
+                        day_text, prompt_tok, completion_tok = await self._call_llm(prompt)
+                    tokens[0] += prompt_tok
+                    tokens[1] += completion_tok
+                    day = self._parse_itinerary_text(_clean_json(day_text))
+                    if not isinstance(day, dict) or not isinstance(day.get("activities"), list):
+                        raise ValueError("response has no activities list")
+                    day.update(day=outline["day"], date=outline["date"])
+                    day.setdefault("theme", outline.get("theme", ""))
+                    return day
+                except (CircuitOpenError, LLMBusyError) as e:
+                    logger.warning("Day %s not generated: %s", outline["day"], e)
+                    return None
+                except Exception as e:
+                    logger.warning("Day %s attempt %s failed: %s", outline["day"], attempt + 1, e)
+            return None
 
-            data = self._fix_duplicate_place_ids(data, all_places)
-            await self._log_ai_usage(request, True, prompt_tok, completion_tok, prompt, text[:1000],
-                destination, start_date, end_date, total_days, budget, interests, travelers, data, elapsed)
-            return data, weather_data
+        days = await asyncio.gather(*(detail(o, pool) for o, pool in zip(outlines, self._day_pools(all_places, outlines))))
+        failed = [o["day"] for o, day in zip(outlines, days) if day is None]
+        if len(failed) == total_days:
+            raise ValueError("every day of the map-reduce generation failed")
+        if failed:
+            logger.error("Map-reduce itinerary for %s is missing days %s", destination, failed)
 
-        except Exception as e:
-            elapsed = (time.time() - start_time) * 1000
-            logger.error("LLM generation error: %s", e)
-            await self._log_ai_usage(request, False, len(prompt) // 4, 0, prompt, "", destination,
-                start_date, end_date, total_days, None, [], 0, None, elapsed, str(e))
-            return {
-                "destination": destination, "total_days": total_days, "budget_estimate": budget,
-                "accommodation_suggestions": [], "daily_plans": [], "place_ids_used": [],
-                "travel_tips": ["Explore the local culture", "Try local cuisine"],
-            }, weather_data
+        data = {
+            "destination": destination, "total_days": total_days, "budget_estimate": 0,
+            "accommodation_suggestions": accommodations,
+            "daily_plans": [
+                day or {"day": o["day"], "date": o["date"], "theme": o.get("theme", ""),
+                        "activities": [], "meals": [], "transportation": []}
+                for o, day in zip(outlines, days)
+            ],
+            "place_ids_used": [],
+            "travel_tips": skeleton.get("travel_tips") or [],
+        }
+        return data, text, tokens[0], tokens[1], failed
 
     async def _log_ai_usage(
         self,
@@ -400,6 +1189,7 @@ Generate the itinerary now:"""
         itinerary_data: Optional[Dict],
         elapsed_ms: float,
         error_msg: Optional[str] = None,
+        compaction: Optional[Dict[str, Any]] = None,
     ) -> None:
         if not request:
             return
@@ -412,6 +1202,13 @@ Generate the itinerary now:"""
                 "daily_plans": len(itinerary_data.get("daily_plans", [])),
                 "accommodation_suggestions": len(itinerary_data.get("accommodation_suggestions", [])),
             }
+        if compaction:
+            meta["prompt_compaction"] = compaction
+            logger.info(
+                f"🗜️ Prompt places: {compaction['summary_tokens']} tokens "
+                f"(was {compaction['uncompacted_summary_tokens']}, -{compaction['reduction_pct']}%), "
+                f"{compaction['places_offered']}/{compaction['places_available']} places"
+            )
         await ai_tracking_service.log_ai_usage(
             provider=AIProvider.GEMINI,
             model="gemini-2.5-flash",
@@ -435,9 +1232,15 @@ Generate the itinerary now:"""
             response_time_ms=elapsed_ms,
         )
 
+    @traced("fix_duplicates")
     def _fix_duplicate_place_ids(
         self, data: Dict[str, Any], all_places: Dict[str, List[Dict]]
     ) -> Dict[str, Any]:
+        return self._dedupe_place_ids(data, all_places)
+
+    @staticmethod
+    def _dedupe_place_ids(data: Dict[str, Any], all_places: Dict[str, List[Dict]]) -> Dict[str, Any]:
+        """Untraced _fix_duplicate_place_ids, for per-day previews timed by an enclosing span."""
         available = {cat: [p["place_id"] for p in plcs if p.get("place_id")] for cat, plcs in all_places.items()}
 
         def unused(cat: str, exclude: Set[str]) -> Optional[str]:
@@ -508,7 +1311,13 @@ Generate the itinerary now:"""
                 ids.add(acc["place_id"])
         return ids
 
+    @traced("place_metadata")
     def _apply_place_metadata(self, itinerary: Dict, place_map: Dict[str, Dict]) -> None:
+        self._merge_place_metadata(itinerary, place_map)
+
+    @staticmethod
+    def _merge_place_metadata(itinerary: Dict, place_map: Dict[str, Dict]) -> None:
+        """Untraced _apply_place_metadata, for per-day events timed by an enclosing span."""
         if not itinerary or not place_map:
             return
         for acc in itinerary.get("accommodation_suggestions", []):
@@ -544,6 +1353,7 @@ Generate the itinerary now:"""
                 if isinstance(c, (int, float)):
                     t["cost"] = f"${c}"
 
+    @traced("budget_breakdown")
     def _budget_breakdown(
         self, itinerary: Dict, place_map: Dict
     ) -> Tuple[float, List[Dict]]:
@@ -579,6 +1389,11 @@ Generate the itinerary now:"""
             itinerary["budget_breakdown"]["per_day_average"] = f"${round(total / len(plans), 2)}"
         return total, breakdowns
 
+    @staticmethod
+    def _place_map(all_places: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+        return {p["place_id"]: p for places in all_places.values() for p in places if p.get("place_id")}
+
+    @traced("build_response")
     async def _build_response(
         self,
         itinerary: Dict[str, Any],
@@ -587,12 +1402,7 @@ Generate the itinerary now:"""
         request: Optional[Request],
     ) -> Dict[str, Any]:
         await self._check_request(request)
-        place_map = {}
-        for places in all_places.values():
-            for p in places:
-                pid = p.get("place_id")
-                if pid:
-                    place_map[pid] = p
+        place_map = self._place_map(all_places)
 
         used_ids = self._extract_used_place_ids(itinerary)
         self._apply_place_metadata(itinerary, place_map)